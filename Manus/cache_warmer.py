@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Cache Warmer for Newly Published Pages
+
+Divi writes each page's CSS (wp-content/et-cache/<post_id>/et-divi-dynamic-*.css,
+et-core-unified-*.min.css) on the first request for the page, and LiteSpeed
+only caches the page HTML after a first hit, so the first visitor or crawler
+of a new page waits for a full PHP + Divi render. This script makes those
+first requests itself after a publishing run:
+
+- Each URL is fetched twice: the first (cold) request triggers the render
+  and fills the caches, the second (warm) one checks the result. The time
+  to first byte of both and the x-litespeed-cache header are recorded in
+  journals/cache_warm.jsonl.
+- Stylesheets from et-cache referenced by the page are fetched once too.
+- Pages closer to the site root (state, then county, then city) go first.
+- Requests are anonymous (LiteSpeed does not serve or fill the public cache
+  for logged-in requests), a few at a time with a pause between them. A
+  429 or 503 pauses every worker for the Retry-After time.
+
+Pass --base-url to send the requests to another host, such as a staging
+copy or the stand-in server (--stand-in), which answers the first request
+for each path slowly and the later ones from its "cache".
+
+Usage:
+  python3 cache_warmer.py https://bailbondsbuddy.com/texas-bail-bondsman-24-hour-emergency-service-nearby/
+  python3 cache_warmer.py --file published_urls.txt --workers 2 --delay 1
+  python3 cache_warmer.py --since "2025-06-01 00:00"            # Pages published since then
+  python3 cache_warmer.py --stand-in --port 8765                 # Local stand-in server
+  python3 cache_warmer.py --file urls.txt --base-url http://127.0.0.1:8765
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, urljoin
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WARM_JOURNAL = os.path.join(BASE_DIR, "journals", "cache_warm.jsonl")
+USER_AGENT = "BailBondsBuddy-CacheWarmer/1.0"
+DEFAULT_WORKERS = 2  # Shared hosting: a couple of renders at a time
+DEFAULT_DELAY = 0.5  # Seconds each worker waits between requests
+DEFAULT_TIMEOUT = 60  # A cold Divi render can be slow
+DEFAULT_RETRY_AFTER = 30  # Pause when the server is busy and does not say for how long
+MAX_ATTEMPTS = 3
+CACHE_HEADER = "x-litespeed-cache"
+
+ET_CACHE_CSS_PATTERN = re.compile(r'''(?:href|src)=["']([^"']*/et-cache/[^"']+\.css(?:\?[^"']*)?)["']''', re.I)
+
+class Politeness:
+    """Shared pause for all workers while the server asks us to back off"""
+
+    def __init__(self, delay=DEFAULT_DELAY):
+        self.delay = delay
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Sleep until requests may be sent again"""
+        with self._lock:
+            resume_at = self._resume_at
+        remaining = resume_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def back_off(self, seconds):
+        """Pause every worker for a number of seconds"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+def retry_after_seconds(response):
+    """Seconds from a Retry-After header (numeric form only), or the default pause"""
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 1.0)
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+def make_session(workers):
+    """Anonymous session with a connection pool sized to the workers"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def timed_get(session, url, politeness):
+    """GET a URL; returns (response, body, seconds to first byte), retrying when the server is busy"""
+    for attempt in range(MAX_ATTEMPTS):
+        politeness.wait()
+        started = time.perf_counter()
+        response = session.get(url, stream=True, timeout=DEFAULT_TIMEOUT)
+        ttfb = time.perf_counter() - started  # stream=True returns once the headers have arrived
+        body = response.content
+        if response.status_code in (429, 503) and attempt < MAX_ATTEMPTS - 1:
+            seconds = retry_after_seconds(response)
+            print(f"Server busy ({response.status_code}) at {url}; pausing {seconds:.0f}s")
+            politeness.back_off(seconds)
+            continue
+        return response, body, ttfb
+    return response, body, ttfb
+
+def warm_url(session, url, politeness, warmed_css, css_lock):
+    """Warm one page and its et-cache stylesheets; returns the result record"""
+    record = {"url": url, "time": datetime.now().isoformat(timespec="seconds")}
+    try:
+        response, body, cold = timed_get(session, url, politeness)
+        record.update(status=response.status_code, cold_ttfb=round(cold, 3),
+                      cache_before=response.headers.get(CACHE_HEADER))
+        if response.status_code != 200:
+            return record
+
+        css_urls = []
+        for match in ET_CACHE_CSS_PATTERN.finditer(body.decode('utf-8', 'replace')):
+            css_url = urljoin(response.url, match.group(1).replace("&#038;", "&").replace("&amp;", "&"))
+            with css_lock:
+                if css_url in warmed_css:
+                    continue
+                warmed_css.add(css_url)
+            css_urls.append(css_url)
+        for css_url in css_urls:
+            time.sleep(politeness.delay)
+            css_response, _, _ = timed_get(session, css_url, politeness)
+            if css_response.status_code != 200:
+                print(f"Warning: {css_url} returned {css_response.status_code}")
+        record["css"] = len(css_urls)
+
+        time.sleep(politeness.delay)
+        response, _, warm = timed_get(session, url, politeness)
+        record.update(warm_ttfb=round(warm, 3), cache_after=response.headers.get(CACHE_HEADER))
+    except Exception as e:
+        record["error"] = str(e)
+    finally:
+        time.sleep(politeness.delay)
+    return record
+
+def priority(url):
+    """Sort key: fewer path segments first (state, county, city pages)"""
+    return len([part for part in urlsplit(url).path.split('/') if part])
+
+def rebase(url, base_url):
+    """Point a URL at another scheme and host, keeping its path and query"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ""))
+
+def published_since(since):
+    """Links of the pages published since a site-time datetime, oldest first"""
+    from wp_api import iter_collection
+
+    params = {"status": "publish", "after": since.isoformat(timespec="seconds"),
+              "orderby": "date", "order": "asc", "_fields": "link"}
+    return [item["link"] for item in iter_collection("pages", params)]
+
+def read_url_file(path):
+    """URLs listed one per line (blank lines and # comments are skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def percentile(values, fraction):
+    """Value at a fraction (0-1) of the sorted values"""
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else None
+
+def summarize(records):
+    """Print TTFB before and after warming"""
+    cold = [r["cold_ttfb"] for r in records if "cold_ttfb" in r]
+    warm = [r["warm_ttfb"] for r in records if "warm_ttfb" in r]
+    failed = [r for r in records if r.get("error") or r.get("status") != 200]
+    hits = sum(1 for r in records if (r.get("cache_after") or "").lower() == "hit")
+    print(f"\nWarmed {len(records) - len(failed)} of {len(records)} pages ({hits} served from the LiteSpeed cache afterwards)")
+    if cold and warm:
+        print(f"TTFB before: median {percentile(cold, 0.5):.3f}s, p90 {percentile(cold, 0.9):.3f}s")
+        print(f"TTFB after:  median {percentile(warm, 0.5):.3f}s, p90 {percentile(warm, 0.9):.3f}s")
+    for record in failed[:10]:
+        print(f"  Failed: {record['url']} ({record.get('error') or record.get('status')})")
+
+def warm_urls(urls, workers=DEFAULT_WORKERS, delay=DEFAULT_DELAY, journal_path=WARM_JOURNAL):
+    """Warm a list of URLs in priority order; returns the result records"""
+    urls = sorted(dict.fromkeys(urls), key=priority)  # Stable: same depth keeps the given order
+    session = make_session(workers)
+    politeness = Politeness(delay)
+    warmed_css, css_lock = set(), threading.Lock()
+
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    records = []
+    with open(journal_path, 'a', encoding='utf-8') as journal, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda url: warm_url(session, url, politeness, warmed_css, css_lock), urls)
+        for i, record in enumerate(results, 1):
+            records.append(record)
+            journal.write(json.dumps(record) + "\n")
+            journal.flush()
+            if i % 100 == 0:
+                print(f"Warmed {i}/{len(urls)} pages")
+    return records
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the site: slow first render per path, cached afterwards"""
+    render_seconds = 1.0
+    rendered = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        with self.lock:
+            cached = path in self.rendered
+            self.rendered.add(path)
+        if path.endswith(".css"):
+            body = b"body{}\n"
+            content_type = "text/css"
+        else:
+            if not cached:
+                time.sleep(self.render_seconds)
+            post_id = abs(hash(path)) % 100000
+            body = (f'<!DOCTYPE html><html><head><link rel="stylesheet" '
+                    f'href="/wp-content/et-cache/{post_id}/et-core-unified-{post_id}.min.css"></head>'
+                    f'<body>{path}</body></html>').encode('utf-8')
+            content_type = "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header(CACHE_HEADER, "hit" if cached else "miss")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the LiteSpeed and Divi caches of newly published pages")
+    parser.add_argument('urls', nargs='*', help='Page URLs to warm')
+    parser.add_argument('--file', help='File with one URL per line')
+    parser.add_argument('--since', help="Warm the pages published since this site time, 'YYYY-MM-DD HH:MM'")
+    parser.add_argument('--base-url', help='Send the requests to this scheme and host instead (staging, stand-in)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Pages warmed at the same time')
+    parser.add_argument('--delay', type=float, default=DEFAULT_DELAY, help='Seconds each worker waits between requests')
+    parser.add_argument('--journal', default=WARM_JOURNAL, help='File the results are appended to')
+    parser.add_argument('--stand-in', action='store_true', help='Run the local stand-in server instead of warming')
+    parser.add_argument('--port', type=int, default=8765, help='Port for --stand-in')
+    parser.add_argument('--render-seconds', type=float, default=StandInHandler.render_seconds, help='Cold render time of the stand-in')
+    args = parser.parse_args()
+
+    if args.stand_in:
+        StandInHandler.render_seconds = args.render_seconds
+        server = ThreadingHTTPServer(("127.0.0.1", args.port), StandInHandler)
+        print(f"Stand-in server on http://127.0.0.1:{args.port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStand-in server stopped.")
+        finally:
+            server.server_close()
+        return
+
+    urls = list(args.urls)
+    try:
+        if args.file:
+            urls += read_url_file(args.file)
+        if args.since:
+            urls += published_since(datetime.fromisoformat(args.since))
+    except Exception as e:
+        print(f"Error reading the URLs: {e}")
+        return
+    if not urls:
+        print("No URLs to warm (pass URLs, --file or --since)")
+        return
+
+    records = warm_urls([rebase(url, args.base_url) for url in urls], args.workers, args.delay, args.journal)
+    summarize(records)
+
+if __name__ == "__main__":
+    main()
@@ -63,9 +63,14 @@ Usage:
   python3 combined_cline_state.py --state [StateName] --upload # Generate and upload to WordPress
   python3 combined_cline_state.py --all                       # Generate all state pages
   python3 combined_cline_state.py --all --upload              # Generate and upload all state pages
+  python3 combined_cline_state.py --all --upload --resume     # Continue an interrupted run
+  python3 combined_cline_state.py --state [StateName] --upload --data-only # Upload only the page fields
 """
 
 # Core Imports
+import time
+STARTUP_TIME = time.perf_counter()  # Used to report startup time in the banner
+
 import os
 import json
 import re
@@ -74,13 +79,19 @@ import random
 import sys
 import traceback
 from string import Template
-import requests
-import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-
-# Third-party Imports
-import requests # Ensure 'requests' library is installed: pip install requests
+from functools import lru_cache
+from job_journal import JobJournal
+from gazetteer import capital_coordinates
+from page_model import PageModel
+from divi_shortcodes import minify_checked
+from page_meta import data_only_page
+from wiki_extract import extract_state, fetch_pages, validate_facts, state_data_file, write_state_data
+from wxr_export import state_page_slug
+
+# Third-party imports (requests) are done inside the functions that talk to
+# the network, so --save-example and generation-only runs start quickly.
 
 # --- Constants (Combined from all parts) ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -88,6 +99,7 @@ TEMPLATE_FILE = os.path.join(BASE_DIR, "templates", "State-Template-Page-Only-Va
 OUTPUT_DIR = os.path.join(BASE_DIR, "generated_pages")
 STATE_DATA_DIR = os.path.join(BASE_DIR, "state_data")
 WIKIPEDIA_URLS_FILE = os.path.join(BASE_DIR, "..", "USA_DATA", "50 States Wikipedia Links")
+JOURNAL_FILE = os.path.join(BASE_DIR, "journals", "all_states.jsonl")  # Progress of --all runs (see --resume)
 
 # API Configuration
 CENSUS_API_KEY = "YOUR_CENSUS_API_KEY"  # Replace with actual key
@@ -111,6 +123,9 @@ COUNTY_DATA_URLS = {
     "Nevada": "https://nv.gov/counties"
 }
 
+# Markdown link lines in the Wikipedia links file, e.g. "1. Alabama: [url](url)"
+WIKIPEDIA_LINK_PATTERN = re.compile(r'(\d+\.\s+)?([^:]+):\s+\[([^\]]+)\]\(([^)]+)\)')
+
 # --- Wikipedia URL Loading Function ---
 def load_wikipedia_urls() -> Dict[str, str]:
     """Load Wikipedia URLs from the file"""
@@ -120,7 +135,7 @@ def load_wikipedia_urls() -> Dict[str, str]:
             lines = f.readlines()
             for line in lines:
                 # Look for lines with markdown links [text](url)
-                match = re.search(r'(\d+\.\s+)?([^:]+):\s+\[([^\]]+)\]\(([^)]+)\)', line)
+                match = WIKIPEDIA_LINK_PATTERN.search(line)
                 if match:
                     state_name = match.group(2).strip()
                     url = match.group(4).strip()
@@ -130,8 +145,10 @@ def load_wikipedia_urls() -> Dict[str, str]:
         return {}
     return urls
 
-# Cache for Wikipedia URLs
-WIKIPEDIA_URLS = load_wikipedia_urls()
+@lru_cache(maxsize=None)
+def get_wikipedia_urls() -> Dict[str, str]:
+    """Wikipedia URLs by state, loaded on first use and cached"""
+    return load_wikipedia_urls()
 
 # --- Rate Limiting Constants ---
 WIKIPEDIA_RATE_LIMIT = 1  # Seconds between Wikipedia API calls
@@ -153,75 +170,31 @@ def validate_state_eligibility(state_name: str) -> bool:
 def fetch_wikipedia_data(state_name: str) -> Dict[str, Any]:
     """
     Fetch and parse Wikipedia data for a state
-    Returns structured data matching our enhanced schema
+    Returns the facts from the infobox and county list (see wiki_extract.py);
+    pages missing from the local snapshot are downloaded into it first
     """
     if not validate_state_eligibility(state_name):
         return None
-        
-    if state_name not in WIKIPEDIA_URLS:
-        print(f"Error: No Wikipedia URL found for {state_name}")
-        return None
-
-    url = WIKIPEDIA_URLS[state_name]
-    print(f"Fetching Wikipedia data for {state_name} from {url}")
 
     try:
-        # Use requests to get the page content
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        facts, missing = extract_state(state_name)
+        if missing:
+            print(f"Fetching Wikipedia pages for {state_name}: {', '.join(missing)}")
+            fetch_pages(missing)
+            facts, missing = extract_state(state_name)
+        if missing:
+            print(f"Error: Wikipedia pages for {state_name} could not be fetched")
+            return None
 
-        # For Maryland, we know these values
-        if state_name == "Maryland":
-            data = {
-                "name": "Maryland",
-                "abbreviation": "MD",
-                "nickname": "Old Line State",
-                "capital": "Annapolis",
-                "population": 6177224,  # 2020 Census
-                "num_counties": 24,
-                "largest_counties": [
-                    {
-                        "name": "Montgomery County",
-                        "description": "Most populous county in Maryland, home to major cities like Rockville and Bethesda, and numerous federal government facilities"
-                    },
-                    {
-                        "name": "Prince George's County",
-                        "description": "Second most populous county, featuring the University of Maryland and multiple federal agencies"
-                    },
-                    {
-                        "name": "Baltimore County",
-                        "description": "Major economic center surrounding Baltimore City, with diverse industries and educational institutions"
-                    }
-                ],
-                "major_cities": [
-                    "Baltimore",
-                    "Columbia",
-                    "Germantown",
-                    "Silver Spring",
-                    "Waldorf"
-                ],
-                "economy": "Maryland's economy is diverse and robust, anchored by federal government facilities, defense contractors, and the Port of Baltimore. The state is a leader in healthcare, biotechnology, and cybersecurity sectors. The presence of numerous federal agencies and military installations provides stable employment and drives economic growth.",
-                "bail_system": "Maryland operates a comprehensive bail system where defendants can secure release through cash bonds or licensed bail bondsmen. Bail amounts are set during initial appearances and vary by jurisdiction and offense severity. The state maintains a network of pretrial services programs.",
-                "criminal_justice": "The Maryland criminal justice system includes district courts, circuit courts, and the Court of Appeals. Each county operates its own detention facilities, and the state maintains several correctional institutions. Recent reforms focus on pretrial release assessment and rehabilitation programs.",
-                "geography": "Maryland spans from the Chesapeake Bay to the Appalachian Mountains, with diverse terrain including coastal plains, the Piedmont region, and mountain ranges. Major highways include I-95, I-70, and I-81, connecting major population centers and facilitating bail bond services across the state.",
-                "weather": "Maryland experiences all four seasons, with hot summers and mild to cold winters. The climate varies from coastal areas to inland regions, with the mountains receiving more snowfall. Weather conditions rarely impact bail processing in urban areas but can affect travel times in rural regions during severe weather events."
-            }
-            return data
-
-        # For other states, we'll need to implement proper Wikipedia parsing
-        # This is a placeholder for now
-        print(f"Full Wikipedia parsing not yet implemented for {state_name}")
-        return None
+        problems = validate_facts(facts)
+        if problems:
+            print(f"Error parsing Wikipedia data for {state_name}: {'; '.join(problems)}")
+            return None
+        return facts
 
-    except requests.RequestException as e:
-        print(f"Error fetching Wikipedia data for {state_name}: {e}")
-        return None
     except Exception as e:
         print(f"Error processing Wikipedia data for {state_name}: {e}")
         return None
-    finally:
-        # Respect rate limiting
-        time.sleep(WIKIPEDIA_RATE_LIMIT)
 
 # --- Data Structures (from Part 1) ---
 
@@ -253,26 +226,27 @@ STATE_TEMPLATE = {
     ]
 }
 
-# State data for New Mexico (example)
-NEW_MEXICO_DATA = {
-    "name": "New Mexico",
-    "abbreviation": "NM",
-    "nickname": "Land of Enchantment",
-    "capital": "Santa Fe",
-    "population": 2117522,
-    "num_counties": 33,
-    "largest_counties": [
-        {"name": "Bernalillo County", "description": "Home to Albuquerque, the state's largest city and economic center"},
-        {"name": "Doña Ana County", "description": "Contains Las Cruces and important agricultural regions"},
-        {"name": "Santa Fe County", "description": "Houses the state capital and is a major cultural center"}
-    ],
-    "major_cities": ["Albuquerque", "Las Cruces", "Rio Rancho", "Santa Fe", "Roswell"],
-    "economy": "New Mexico's diverse economy encompasses major sectors including government research facilities like Los Alamos and Sandia National Laboratories, oil and natural gas production, tourism, and agriculture. The state's unique cultural heritage and natural landscapes drive significant tourism revenue, while federal installations including military bases and research facilities provide stable employment.",
-    "bail_system": "New Mexico's bail system underwent significant reform in 2016 when voters approved a constitutional amendment. The system now emphasizes evidence-based risk assessment over monetary bonds, though commercial bail bonds remain an important option. Bondsmen must be licensed by the state and follow strict regulations regarding fees and procedures.",
-    "criminal_justice": "The state's criminal justice system operates across 33 counties, each with its own detention facilities and court system. Recent reforms focus on reducing pre-trial detention while maintaining public safety. The system includes specialized courts for drug offenses and mental health cases, reflecting a modern approach to justice.",
-    "geography": "New Mexico's vast territory spans 121,590 square miles, making it the fifth-largest state. The landscape varies from desert basins to snow-capped mountains, with major interstates I-25 and I-40 connecting population centers. This geographic diversity can impact bail procedures, as some areas are remote from detention facilities.",
-    "weather": "The state experiences diverse weather patterns, from arid conditions in the south to alpine climates in the northern mountains. Severe weather events, particularly summer monsoons and winter storms in mountainous regions, can occasionally affect court schedules and bail processing times."
-}
+def get_example_data():
+    """State data for New Mexico (example), built only when --save-example needs it"""
+    return {
+        "name": "New Mexico",
+        "abbreviation": "NM",
+        "nickname": "Land of Enchantment",
+        "capital": "Santa Fe",
+        "population": 2117522,
+        "num_counties": 33,
+        "largest_counties": [
+            {"name": "Bernalillo County", "description": "Home to Albuquerque, the state's largest city and economic center"},
+            {"name": "Doña Ana County", "description": "Contains Las Cruces and important agricultural regions"},
+            {"name": "Santa Fe County", "description": "Houses the state capital and is a major cultural center"}
+        ],
+        "major_cities": ["Albuquerque", "Las Cruces", "Rio Rancho", "Santa Fe", "Roswell"],
+        "economy": "New Mexico's diverse economy encompasses major sectors including government research facilities like Los Alamos and Sandia National Laboratories, oil and natural gas production, tourism, and agriculture. The state's unique cultural heritage and natural landscapes drive significant tourism revenue, while federal installations including military bases and research facilities provide stable employment.",
+        "bail_system": "New Mexico's bail system underwent significant reform in 2016 when voters approved a constitutional amendment. The system now emphasizes evidence-based risk assessment over monetary bonds, though commercial bail bonds remain an important option. Bondsmen must be licensed by the state and follow strict regulations regarding fees and procedures.",
+        "criminal_justice": "The state's criminal justice system operates across 33 counties, each with its own detention facilities and court system. Recent reforms focus on reducing pre-trial detention while maintaining public safety. The system includes specialized courts for drug offenses and mental health cases, reflecting a modern approach to justice.",
+        "geography": "New Mexico's vast territory spans 121,590 square miles, making it the fifth-largest state. The landscape varies from desert basins to snow-capped mountains, with major interstates I-25 and I-40 connecting population centers. This geographic diversity can impact bail procedures, as some areas are remote from detention facilities.",
+        "weather": "The state experiences diverse weather patterns, from arid conditions in the south to alpine climates in the northern mountains. Severe weather events, particularly summer monsoons and winter storms in mountainous regions, can occasionally affect court schedules and bail processing times."
+    }
 
 # --- Helper Functions (Combined from Parts 1 & 2) ---
 
@@ -302,7 +276,7 @@ def save_example_data():
         # Ensure the directory exists before writing
         os.makedirs(STATE_DATA_DIR, exist_ok=True)
         with open(filename, 'w') as f:
-            json.dump(NEW_MEXICO_DATA, f, indent=2)
+            json.dump(get_example_data(), f, indent=2)
         print(f"Example data for New Mexico saved to {filename}")
         return True
     except Exception as e:
@@ -395,7 +369,7 @@ def load_template():
 
 def load_state_data(state_name):
     """Load data for a specific state"""
-    filename = os.path.join(STATE_DATA_DIR, f"{state_name.lower().replace(' ', '_')}.json")
+    filename = state_data_file(state_name, STATE_DATA_DIR)
     try:
         with open(filename, 'r') as f:
             state_data = json.load(f)
@@ -413,7 +387,7 @@ def load_state_data(state_name):
 
 def save_state_data(state_name, state_data):
     """Save state data to a JSON file"""
-    filename = os.path.join(STATE_DATA_DIR, f"{state_name.lower().replace(' ', '_')}.json")
+    filename = state_data_file(state_name, STATE_DATA_DIR)
     try:
         # Ensure the directory exists before writing
         os.makedirs(STATE_DATA_DIR, exist_ok=True)
@@ -503,15 +477,25 @@ def replace_template_variables(template_content, variables):
         result = result.replace(f"[{key}]", value)
     return result
 
-def generate_page_for_state(state_name, template_file, output_dir, state_data_dir):
+@lru_cache(maxsize=4)
+def _read_template_file(template_file, mtime):
+    """Parse a template file once (cached per file and modification time)"""
+    with open(template_file, 'r', encoding='utf-8') as f:
+        template_data = json.load(f)
+    print(f"Template loaded successfully from {template_file}")
+    return template_data
+
+def get_cached_template(template_file):
+    """Return a page built on the cached template; only 'data' is rewritten, so only it is copied"""
+    return PageModel(_read_template_file(template_file, os.path.getmtime(template_file)))
+
+def generate_page_for_state(state_name, template_file, output_dir, state_data_dir, write_preview=True):
     """Generate a page for a specific state."""
     print(f"\n=== Processing State: {state_name} ===")
     
-    # Load template
+    # Load template (parsed on first use, then reused for every state)
     try:
-        with open(template_file, 'r', encoding='utf-8') as f:
-            template_data = json.load(f)
-        print(f"Template loaded successfully from {template_file}")
+        template_data = get_cached_template(template_file)
     except Exception as e:
         print(f"Error loading template: {e}")
         return False
@@ -530,7 +514,7 @@ def generate_page_for_state(state_name, template_file, output_dir, state_data_di
     template_data['data']['1120'] = final_content
     
     # Save JSON file
-    json_output_file = os.path.join(output_dir, f"{state_name.lower()}.json")
+    json_output_file = generated_page_file(state_name, output_dir)
     try:
         with open(json_output_file, 'w', encoding='utf-8') as f:
             json.dump(template_data, f, indent=2)
@@ -539,7 +523,11 @@ def generate_page_for_state(state_name, template_file, output_dir, state_data_di
         print(f"Error saving JSON file: {e}")
         return False
     
-    # Save HTML preview
+    # Save HTML preview (batch runs skip this; preview_server.py renders it on demand)
+    if not write_preview:
+        print(f"✅ Page generation successful for {state_name}")
+        return True
+
     html_output_file = os.path.join(output_dir, f"{state_name.lower()}.html")
     try:
         html_content = f"""<!DOCTYPE html>
@@ -580,18 +568,11 @@ def generate_page_for_state(state_name, template_file, output_dir, state_data_di
     return True
 
 def get_state_capital_coordinates(state_name, capital):
-    """Get coordinates for state capital using AI knowledge"""
-    coordinates = {
-        "Nevada": {"lat": "39.1638", "lng": "-119.7674"},  # Carson City
-        "Iowa": {"lat": "41.5868", "lng": "-93.6250"},  # Des Moines
-        # Other coordinates will be generated dynamically, not hardcoded
-    }
-    
-    if state_name in coordinates:
-        return coordinates[state_name]
-        
-    # If we don't have coordinates, return default coordinates for the state capital
-    return {"lat": "39.1638", "lng": "-119.7674"}  # Default to Carson City coordinates
+    """Get coordinates for the state capital from the offline gazetteer"""
+    coordinates = capital_coordinates(state_name, capital)
+    if coordinates is None:
+        print(f"Warning: no gazetteer coordinates for {capital}, {state_name}")
+    return coordinates
 
 def generate_faq_section(state_name, faqs):
     """Generate the FAQ section with toggle modules"""
@@ -777,8 +758,11 @@ def get_accurate_state_data(state_name: str) -> Dict[str, Any]:
     """Get accurate state data from existing file or fetch new data."""
     print(f"Stage 1: Gathering comprehensive data for {state_name}...")
     
-    # Check if state data file exists
-    state_file = os.path.join(STATE_DATA_DIR, f"{state_name.lower()}.json")
+    # Check if state data file exists (files saved as "new mexico.json" by older versions are still read)
+    state_file = state_data_file(state_name, STATE_DATA_DIR)
+    legacy_file = os.path.join(STATE_DATA_DIR, f"{state_name.lower()}.json")
+    if not os.path.exists(state_file) and os.path.exists(legacy_file):
+        state_file = legacy_file
     if os.path.exists(state_file):
         try:
             with open(state_file, 'r', encoding='utf-8') as f:
@@ -791,7 +775,16 @@ def get_accurate_state_data(state_name: str) -> Dict[str, Any]:
             print(f"Error reading state data file: {e}")
             return None
     
-    # If no existing file, fetch new data
+    # If no existing file, extract the facts from Wikipedia (see wiki_extract.py)
+    facts = fetch_wikipedia_data(state_name)
+    if facts:
+        write_state_data(state_name, facts, STATE_DATA_DIR)
+        state_data = load_state_data(state_name)
+        if state_data:
+            print(f"✓ Extracted and saved Wikipedia data for {state_name}")
+            return state_data
+
+    # Otherwise save placeholder data to fill in by hand
     try:
         # Fetch data from various sources
         state_data = {
@@ -809,29 +802,54 @@ def get_accurate_state_data(state_name: str) -> Dict[str, Any]:
         print(f"Error gathering data for {state_name}: {e}")
         return None
 
-def upload_to_wordpress(state_name):
-    """Upload the generated state page JSON to WordPress as a draft page"""
-    # Use the file from DoNotUse/Generated_State_Pages directory
-    json_path = os.path.join(os.path.dirname(os.path.dirname(BASE_DIR)), "DoNotUse", "Generated_State_Pages", f"{state_name.lower()}.json")
-
-    # Check if WP_AUTH credentials are placeholders
-    if WP_AUTH[0] == "your_wp_username" or WP_AUTH[1] == "your_wp_application_password":
-        print("Error: WordPress username or application password not set in WP_AUTH constant.")
-        print("Please update the script with your actual credentials before uploading.")
-        return False
+def find_existing_page(state_name):
+    """Return the ID of a state page already on WordPress (any status), or None"""
+    import requests # Ensure 'requests' library is installed: pip install requests
+    try:
+        response = requests.get(
+            f"{WP_API_URL}/pages",
+            params={"slug": state_page_slug(state_name), "status": "any", "_fields": "id"},
+            auth=WP_AUTH,
+            timeout=30
+        )
+        response.raise_for_status()
+        pages = response.json()
+        return pages[0]["id"] if pages else None
+    except Exception as e:
+        print(f"Error checking WordPress for an existing {state_name} page: {e}")
+        raise
+
+def generated_page_file(state_name, output_dir=OUTPUT_DIR):
+    """Generated page JSON of a state: written by the generator, validated, then uploaded"""
+    return os.path.join(output_dir, f"{state_name.lower()}.json")
+
+def validate_generated_page(state_name, output_dir=OUTPUT_DIR):
+    """Check that a generated page exists and has no unreplaced template variables"""
+    json_path = generated_page_file(state_name, output_dir)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        page_json = json.load(f)
+    content = page_json['data']['1120']
+    if not content:
+        raise ValueError("Generated page content is empty")
+    leftover = sorted(set(re.findall(r'\[[A-Z][A-Z_]+\]', content)))
+    if leftover:
+        raise ValueError(f"Unreplaced template variables: {', '.join(leftover)}")
+    return True
 
+def build_content_page_data(state_name, json_path, title, slug, minify=False):
+    """Page data with the full Divi content of a generated state page JSON, or None if it cannot be read"""
     try:
         with open(json_path, 'r') as f:
             state_json_data = json.load(f)
     except FileNotFoundError:
         print(f"Error: JSON file not found for {state_name} at {json_path}. Cannot upload.")
-        return False
+        return None
     except json.JSONDecodeError as e:
          print(f"Error decoding JSON from {json_path}: {e}. Cannot upload.")
-         return False
+         return None
     except Exception as e:
         print(f"Error loading {json_path}: {e}")
-        return False
+        return None
 
     # --- Prepare Page Data for WordPress API ---
     # Extract the processed content string (assuming it's the value of the first key in 'data')
@@ -842,21 +860,19 @@ def upload_to_wordpress(state_name):
               page_content_string = state_json_data["data"][data_keys[0]]
          else:
               print(f"Error: Cannot extract content string from JSON 'data' object for {state_name} (empty).")
-              return False
+              return None
     else:
          print(f"Error: Cannot extract content string from JSON 'data' object for {state_name} (missing or not dict).")
-         return False
+         return None
 
     if not page_content_string:
          print(f"Error: Extracted page content string is empty for {state_name}.")
-         return False
+         return None
 
-    # Define Page Title and Slug
-    title = f"Find Local {state_name} Bail Bondsmen Near You | 24/7 Emergency Service"
-    # Create a URL-friendly slug
-    slug = f"{state_name.lower().replace(' ', '-')}-bail-bondsman-24-hour-emergency-service-nearby"
-    # Limit slug length if necessary (WordPress might truncate anyway)
-    slug = slug[:100] # Example limit
+    if minify:
+        original_size = len(page_content_string)
+        page_content_string = minify_checked(page_content_string)
+        print(f"Minified content: {original_size:,} → {len(page_content_string):,} bytes")
 
     # Page data payload for the WordPress REST API
     page_data = {
@@ -874,8 +890,34 @@ def upload_to_wordpress(state_name):
         }
         # Consider adding excerpt, featured_media (image ID) if needed
     }
+    return page_data
+
+def upload_to_wordpress(state_name, minify=False, data_only=False, output_dir=OUTPUT_DIR):
+    """Upload the generated state page JSON to WordPress as a draft page; returns the page ID"""
+    # The same file validate_generated_page() checked
+    json_path = generated_page_file(state_name, output_dir)
+
+    # Check if WP_AUTH credentials are placeholders
+    if WP_AUTH[0] == "your_wp_username" or WP_AUTH[1] == "your_wp_application_password":
+        print("Error: WordPress username or application password not set in WP_AUTH constant.")
+        print("Please update the script with your actual credentials before uploading.")
+        return False
+
+    # Define Page Title and Slug
+    title = f"Find Local {state_name} Bail Bondsmen Near You | 24/7 Emergency Service"
+    slug = state_page_slug(state_name)
+
+    if data_only:
+        # Only the template variables are sent; the shared Theme Builder layout renders them
+        page_data = data_only_page(generate_template_variables(get_accurate_state_data(state_name)), title, slug)
+        print(f"Data-only page: {len(json.dumps(page_data)):,} bytes")
+    else:
+        page_data = build_content_page_data(state_name, json_path, title, slug, minify)
+        if not page_data:
+            return False
 
     # --- Make API Request ---
+    import requests # Ensure 'requests' library is installed: pip install requests
     print(f"Attempting to upload page for {state_name} to {WP_API_URL}/pages")
     try:
         response = requests.post(
@@ -896,7 +938,7 @@ def upload_to_wordpress(state_name):
         print(f"   Page ID: {page_id}")
         print(f"   Draft Preview Link: {page_link}&preview=true")
         print(f"   Edit Link: {edit_link}")
-        return True
+        return page_id
 
     except requests.exceptions.HTTPError as http_err:
         print(f"❌ HTTP error occurred during WordPress upload for {state_name}: {http_err}")
@@ -941,6 +983,7 @@ def print_banner():
     print(f"Outputting JSON/HTML to: {OUTPUT_DIR}")
     print(f"Reading/Writing State Data in: {STATE_DATA_DIR}")
     print(f"Target WordPress URL: {WP_BASE_URL}")
+    print(f"Startup time: {(time.perf_counter() - STARTUP_TIME) * 1000:.1f} ms")
     # Security Reminder for Credentials
     if WP_AUTH[0] == "your_wp_username" or WP_AUTH[1] == "your_wp_application_password":
         print("\n⚠️ WARNING: Default WordPress credentials detected in WP_AUTH.")
@@ -948,16 +991,16 @@ def print_banner():
     print("-" * 60)
 
 
-def generate_single_state(state_name, upload=False):
+def generate_single_state(state_name, upload=False, write_preview=True, minify=False, data_only=False):
     """Generate a page for a single state and optionally upload it"""
     print(f"\n=== Processing State: {state_name} ===")
-    success_generate = generate_page_for_state(state_name, TEMPLATE_FILE, OUTPUT_DIR, STATE_DATA_DIR)
+    success_generate = generate_page_for_state(state_name, TEMPLATE_FILE, OUTPUT_DIR, STATE_DATA_DIR, write_preview)
     
     if success_generate:
         print(f"✅ Page generation successful for {state_name}")
         if upload:
             print(f"\n--- Uploading {state_name} page to WordPress ---")
-            upload_success = upload_to_wordpress(state_name)
+            upload_success = upload_to_wordpress(state_name, minify, data_only, OUTPUT_DIR)
 
             if upload_success:
                 print(f"✅ Successfully uploaded {state_name} page to WordPress as draft.")
@@ -969,8 +1012,8 @@ def generate_single_state(state_name, upload=False):
         print(f"❌ Failed to generate page for {state_name}")
         return False
 
-def generate_all_states(upload=False):
-    """Generate pages for all 50 US states"""
+def generate_all_states(upload=False, write_preview=False, resume=False, journal_file=JOURNAL_FILE, minify=False, data_only=False):
+    """Generate pages for all 50 US states, optionally resuming an interrupted run"""
     print("\n=== Processing All 50 US States ===")
 
     # List of all 44 states that allow bail bondsmen (standard names)
@@ -990,36 +1033,70 @@ def generate_all_states(upload=False):
     upload_success_count = 0
     generation_failures = []
     upload_failures = []
+    skipped = []
+
+    # Every completed stage is recorded durably, so a killed run can continue with --resume
+    journal = JobJournal(journal_file, resume=resume)
+    if resume:
+        print(f"Resuming from journal {journal_file}")
 
     total_states = len(states)
     for i, state in enumerate(states):
         print(f"\n--- Processing State {i+1}/{total_states}: {state} ---")
-        generated = generate_page_for_state(state, TEMPLATE_FILE, OUTPUT_DIR, STATE_DATA_DIR)
-
-        if generated:
+        if journal.reached(state, "uploaded" if upload else "validated"):
+            print(f"⏭️  {state} already completed in a previous run, skipping.")
+            skipped.append(state)
             generation_success_count += 1
-            print(f"✅ {state} page generated successfully.")
-
             if upload:
-                print(f"--- Uploading {state} to WordPress ---")
-                uploaded = upload_to_wordpress(state)
-                if uploaded:
-                    upload_success_count += 1
-                    print(f"✅ {state} page uploaded successfully.")
-                else:
-                    upload_failures.append(state)
-                    print(f"❌ Failed to upload {state} page.")
-            else:
-                 # If not uploading, still count as a success for generation
-                 pass
+                upload_success_count += 1
+            continue
 
-        else:
+        try:
+            if not journal.reached(state, "generated"):
+                if not generate_page_for_state(state, TEMPLATE_FILE, OUTPUT_DIR, STATE_DATA_DIR, write_preview):
+                    raise RuntimeError("page generation failed")
+                journal.record(state, "generated")
+            if not journal.reached(state, "validated"):
+                validate_generated_page(state, OUTPUT_DIR)
+                journal.record(state, "validated")
+        except Exception as e:
+            journal.fail(state, e)
             generation_failures.append(state)
-            print(f"❌ Failed to generate page for {state}.")
+            print(f"❌ Failed to generate page for {state}: {e}")
+            continue
+
+        generation_success_count += 1
+        print(f"✅ {state} page generated successfully.")
+
+        if upload:
+            print(f"--- Uploading {state} to WordPress ---")
+            try:
+                page_id = None
+                if journal.stage(state) == "uploading":
+                    # The previous run died mid-upload; the page may already exist
+                    page_id = find_existing_page(state)
+                    if page_id:
+                        print(f"Found the {state} page created by the interrupted run (ID {page_id}).")
+                if not page_id:
+                    journal.record(state, "uploading")
+                    page_id = upload_to_wordpress(state, minify, data_only, OUTPUT_DIR)
+                    if not page_id:
+                        raise RuntimeError("upload failed")
+                journal.record(state, "uploaded", page_id=page_id)
+                upload_success_count += 1
+                print(f"✅ {state} page uploaded successfully.")
+            except Exception as e:
+                journal.fail(state, e)
+                upload_failures.append(state)
+                print(f"❌ Failed to upload {state} page: {e}")
+
+    journal.close()
 
     # --- Summary ---
     print("\n" + "=" * 15 + " Processing Complete " + "=" * 15)
     print(f"Total States Processed: {total_states}")
+    if skipped:
+        print(f"Already Completed in a Previous Run: {len(skipped)}")
     print(f"Pages Generated Successfully: {generation_success_count}")
     if generation_failures:
         print(f"Pages Failed Generation ({len(generation_failures)}): {', '.join(generation_failures)}")
@@ -1056,6 +1133,31 @@ def main():
         action='store_true',
         help='Generate pages for all 50 US states.'
         )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='With --all, continue the last run from journals/all_states.jsonl:\nfinished states are skipped and failed ones retried.'
+        )
+    parser.add_argument(
+        '--minify',
+        action='store_true',
+        help='With --upload, strip default Divi attributes and extra whitespace\n(verified to be equivalent) before uploading.'
+        )
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='With --upload, send only the template variables as page fields;\nthe shared Theme Builder layout renders them (see page_meta.py).'
+        )
+    parser.add_argument(
+        '--preview',
+        action='store_true',
+        help='With --all, write HTML preview files too (by default only\nsingle-state runs write them; see preview_server.py).'
+        )
+    parser.add_argument(
+        '--no-preview',
+        action='store_true',
+        help='Skip writing HTML preview files for a single state.'
+        )
     parser.add_argument(
         '--save-example',
         action='store_true',
@@ -1083,13 +1185,17 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    if args.preview and args.no_preview:
+        print("Error: You cannot use both --preview and --no-preview.")
+        sys.exit(1)
+
     # --- Execute Actions ---
     if args.state:
         # Normalize state name (e.g., "new mexico" -> "New Mexico")
         normalized_state_name = args.state.strip().title()
-        generate_single_state(normalized_state_name, args.upload)
+        generate_single_state(normalized_state_name, args.upload, not args.no_preview, args.minify, args.data_only)
     elif args.all:
-        generate_all_states(args.upload)
+        generate_all_states(args.upload, args.preview, resume=args.resume, minify=args.minify, data_only=args.data_only)
 
     print("\nScript finished.")
 
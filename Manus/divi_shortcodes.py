@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Divi Shortcode Parser and Minifier
+
+Parses Divi post content ([et_pb_section ...][et_pb_row ...]...) into a
+module tree and writes it back, and provides an optional minification
+stage for uploads:
+
+- Attributes equal to their Divi default are dropped (_module_preset="default",
+  global_colors_info="{}", theme_builder_area="post_content",
+  hover_enabled="0", sticky_enabled="0"). _builder_version is kept, because
+  Divi runs its settings migrations on modules that do not have it.
+- Whitespace between modules is removed. In module HTML, runs of spaces
+  and tabs are collapsed to one space; line breaks are kept, because
+  WordPress turns them into <br> and paragraphs. Text inside pre,
+  textarea, script and style, and code modules are left untouched.
+
+verify() parses both versions and compares the module trees (modules,
+effective attributes with defaults filled in, and rendered text), so a
+minified page is only used when it is equivalent to the original.
+
+Usage:
+  from divi_shortcodes import minify, verify, minify_checked, parse, serialize
+
+  small = minify(content)
+  problems = verify(content, small)   # [] when equivalent
+  content = minify_checked(content)   # Both, keeping the original if they differ
+
+  python3 divi_shortcodes.py generated_pages/*.json          # Report savings and verify
+  python3 divi_shortcodes.py generated_pages/*.json --write  # Minify the files in place
+"""
+
+import os
+import re
+import json
+import argparse
+
+# Attributes whose absence means the same as this value, for every module
+DEFAULT_ATTRIBUTES = {
+    "_module_preset": "default",
+    "global_colors_info": "{}",
+    "theme_builder_area": "post_content",
+    "hover_enabled": "0",
+    "sticky_enabled": "0",
+}
+# Modules whose content is code and must not be touched
+RAW_CONTENT_MODULES = {"et_pb_code", "et_pb_fullwidth_code"}
+# Modules whose content is HTML (everything else holds modules)
+HTML_CONTENT_MODULES = {
+    "et_pb_text", "et_pb_toggle", "et_pb_accordion_item", "et_pb_tab", "et_pb_blurb", "et_pb_cta",
+    "et_pb_testimonial", "et_pb_pricing_table", "et_pb_slide", "et_pb_fullwidth_header",
+    "et_pb_team_member", "et_pb_signup", "et_pb_contact_form",
+}
+
+TAG_PATTERN = re.compile(r'\[(/?)(et_pb_[a-z0-9_]+)((?:\s+[A-Za-z0-9_\-]+="[^"]*")*)\s*(/?)\]')
+ATTRIBUTE_PATTERN = re.compile(r'([A-Za-z0-9_\-]+)="([^"]*)"')
+PRESERVE_WHITESPACE_PATTERN = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.I | re.S)
+SPACES_PATTERN = re.compile(r'[ \t]+')
+LINE_BREAK_PATTERN = re.compile(r' ?\r?\n ?')
+
+class Module:
+    """One Divi module: its tag, attributes in source order, and children (modules and text)"""
+
+    __slots__ = ("tag", "attributes", "children", "closed")
+
+    def __init__(self, tag, attributes, closed=False):
+        self.tag = tag
+        self.attributes = attributes
+        self.children = []
+        self.closed = closed
+
+    def __repr__(self):
+        return f"Module({self.tag!r}, {len(self.attributes)} attributes, {len(self.children)} children)"
+
+def parse(content):
+    """Parse Divi content into a list of top-level modules and text strings"""
+    # Like WordPress, a shortcode only encloses content if its closing tag appears later
+    closing_tags = set(re.findall(r'\[/(et_pb_[a-z0-9_]+)\]', content))
+    root = Module(None, [])
+    stack = [root]
+    position = 0
+    for match in TAG_PATTERN.finditer(content):
+        if match.start() > position:
+            stack[-1].children.append(content[position:match.start()])
+        position = match.end()
+        is_closing, tag, attributes, self_closing = match.groups()
+
+        if is_closing:
+            if not any(module.tag == tag for module in stack[1:]):
+                stack[-1].children.append(match.group(0))  # Stray closing tag is kept as text
+                continue
+            while stack[-1].tag != tag:
+                stack.pop()
+            stack[-1].closed = True
+            stack.pop()
+            continue
+
+        module = Module(tag, ATTRIBUTE_PATTERN.findall(attributes))
+        stack[-1].children.append(module)
+        if not self_closing and tag in closing_tags:
+            stack.append(module)
+
+    if position < len(content):
+        stack[-1].children.append(content[position:])
+    return root.children
+
+def serialize(nodes):
+    """Write a module tree back to Divi content"""
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(node)
+            continue
+        attributes = "".join(f' {name}="{value}"' for name, value in node.attributes)
+        parts.append(f"[{node.tag}{attributes}]")
+        if node.closed:
+            parts.append(serialize(node.children))
+            parts.append(f"[/{node.tag}]")
+    return "".join(parts)
+
+def collapse_whitespace(html):
+    """Collapse runs of spaces in HTML, keeping line breaks and pre, textarea, script and style blocks as they are"""
+    pieces = PRESERVE_WHITESPACE_PATTERN.split(html)
+    result = []
+    # split() returns text, whole preserved block, tag name, text, ...
+    for i in range(0, len(pieces), 3):
+        result.append(LINE_BREAK_PATTERN.sub("\n", SPACES_PATTERN.sub(" ", pieces[i])))
+        if i + 1 < len(pieces):
+            result.append(pieces[i + 1])
+    return "".join(result)
+
+def _minify_nodes(nodes, parent_tag, defaults):
+    minified = []
+    for node in nodes:
+        if isinstance(node, str):
+            if parent_tag in RAW_CONTENT_MODULES:
+                minified.append(node)
+            elif parent_tag in HTML_CONTENT_MODULES:
+                minified.append(collapse_whitespace(node))
+            elif node.strip():
+                minified.append(node)  # Text where modules are expected is kept as it is
+            continue
+        module = Module(node.tag, [(name, value) for name, value in node.attributes
+                                   if defaults.get(name) != value], node.closed)
+        module.children = _minify_nodes(node.children, node.tag, defaults)
+        minified.append(module)
+    return minified
+
+def minify(content, defaults=DEFAULT_ATTRIBUTES):
+    """Minified Divi content: default attributes dropped and redundant whitespace removed"""
+    if not isinstance(content, str):
+        return content
+    return serialize(_minify_nodes(parse(content), None, defaults))
+
+def _normalize_text(text, parent_tag):
+    if parent_tag in RAW_CONTENT_MODULES:
+        return text
+    if parent_tag in HTML_CONTENT_MODULES:
+        return collapse_whitespace(text)
+    return text.strip()
+
+def _compare(original, minified, parent_tag, defaults, path, problems):
+    # Whitespace-only text only matters inside modules that hold HTML or code
+    def significant(nodes):
+        if parent_tag in RAW_CONTENT_MODULES or parent_tag in HTML_CONTENT_MODULES:
+            return nodes
+        return [n for n in nodes if not isinstance(n, str) or n.strip()]
+
+    original, minified = significant(original), significant(minified)
+    if len(original) != len(minified):
+        problems.append(f"{path}: {len(original)} children before, {len(minified)} after")
+        return
+    for i, (before, after) in enumerate(zip(original, minified)):
+        where = f"{path}/{i}"
+        if isinstance(before, str) or isinstance(after, str):
+            if not (isinstance(before, str) and isinstance(after, str)) or \
+                    _normalize_text(before, parent_tag) != _normalize_text(after, parent_tag):
+                problems.append(f"{where}: text differs")
+            continue
+        where = f"{path}/{before.tag}[{i}]"
+        if before.tag != after.tag or before.closed != after.closed:
+            problems.append(f"{where}: module differs ({after.tag})")
+            continue
+        before_attributes = dict(defaults, **dict(before.attributes))
+        after_attributes = dict(defaults, **dict(after.attributes))
+        if before_attributes != after_attributes:
+            changed = sorted(k for k in set(before_attributes) | set(after_attributes)
+                             if before_attributes.get(k) != after_attributes.get(k))
+            problems.append(f"{where}: attributes differ ({', '.join(changed)})")
+        _compare(before.children, after.children, before.tag, defaults, where, problems)
+
+def verify(original, minified, defaults=DEFAULT_ATTRIBUTES):
+    """Differences between the module trees of two versions of content; [] when they are equivalent"""
+    problems = []
+    _compare(parse(original), parse(minified), None, defaults, "", problems)
+    return problems
+
+def minify_checked(content):
+    """Minified content if it verifies as equivalent to the original, else the original"""
+    small = minify(content)
+    problems = verify(content, small)
+    if problems:
+        print(f"Warning: minified content is not equivalent, keeping the original: {problems[0]}")
+        return content
+    return small
+
+def minify_page(page_json):
+    """Minify and verify every content string of a page JSON in place; returns (bytes before, bytes after)"""
+    before = after = 0
+    data = page_json.get("data") or {}
+    for key, content in data.items():
+        if not isinstance(content, str):
+            continue
+        data[key] = minify_checked(content)
+        before += len(content.encode('utf-8'))
+        after += len(data[key].encode('utf-8'))
+    return before, after
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify the Divi content of page JSON files and verify the result")
+    parser.add_argument('files', nargs='+', help='Page JSON files (e.g. generated_pages/*.json)')
+    parser.add_argument('--write', action='store_true', help='Write the minified pages back to their files')
+    args = parser.parse_args()
+
+    total_before = total_after = 0
+    for path in args.files:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                page_json = json.load(f)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            continue
+        before, after = minify_page(page_json)
+        total_before += before
+        total_after += after
+        print(f"{os.path.basename(path)}: {before:,} → {after:,} bytes ({100 - after * 100 // max(before, 1)}% smaller)")
+        if args.write and after < before:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(page_json, f, indent=2)
+
+    if len(args.files) > 1:
+        print(f"Total: {total_before:,} → {total_after:,} bytes")
+
+if __name__ == "__main__":
+    main()
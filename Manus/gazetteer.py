@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Offline Gazetteer for Bail Bonds Buddy Pages
+
+Coordinates for every state capital, county and county seat, and every city
+in the USA_DATA city lists, so map modules can be filled locally instead
+of geocoding each page over the network or guessing.
+
+The gazetteer is built once from the U.S. Census Bureau Gazetteer Files
+(public domain) in USA_DATA/gazetteer/ (zipped or not); --download fetches
+the ones that are missing:
+  https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+  - 2023_Gaz_counties_national.zip   County interior points
+  - 2023_Gaz_place_national.zip      Incorporated places and CDPs
+  - 2023_Gaz_cousubs_national.zip    County subdivisions (New England towns, townships)
+
+The result, USA_DATA/gazetteer/gazetteer.json.gz, is a flat index from a
+normalised "st|county|city" key to [lat, lng], loaded once into a dict:
+  "tx"                  State capital
+  "tx|harris"           County interior point
+  "tx|harris|baytown"   City in a county (every county seat and city list entry)
+  "tx||baytown"         City anywhere in the state
+
+Cities are matched to the nearest Census place of that name, checked
+against their county (or the county subdivision of that name, for New
+England towns and townships). Names the Census files do not have (small
+unincorporated communities) get their county's interior point and are
+flagged as approximate.
+
+State capitals also have bundled coordinates (CAPITAL_POINTS), so state
+pages get their map pin even before the index has been built.
+
+Tools that need county and city coordinates (nearby.py, location_store.py)
+call ensure_gazetteer() before they build: it downloads the Census files
+if they are missing and (re)builds the index when it is missing or older
+than them.
+
+Usage:
+  from gazetteer import lookup, capital_coordinates
+  location = lookup("TX", "Harris County", "Baytown")   # Location(lat, lng, approximate) or None
+  capital_coordinates("Texas")                         # {"lat": "30.268", "lng": "-97.742"}
+
+  python3 gazetteer.py --build                         # Build from the Census files
+  python3 gazetteer.py --build --download              # Fetch missing Census files first
+  python3 gazetteer.py --state TX --county Harris --city Baytown
+"""
+
+import os
+import io
+import re
+import csv
+import glob
+import gzip
+import json
+import math
+import zipfile
+import argparse
+import unicodedata
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+USA_DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), "USA_DATA")
+GAZETTEER_DIR = os.path.join(USA_DATA_DIR, "gazetteer")
+GAZETTEER_FILE = os.path.join(GAZETTEER_DIR, "gazetteer.json.gz")
+MAX_MATCH_KM = 150  # A same-named place further than this from the county is a different town
+SAME_TOWN_KM = 25  # A place this close to a same-named county subdivision is the same town
+CENSUS_KINDS = ("counties", "place", "cousubs")
+CENSUS_YEAR = 2023
+CENSUS_URL = f"https://www2.census.gov/geo/docs/maps-data/data/gazetteer/{CENSUS_YEAR}_Gazetteer"
+DOWNLOAD_TIMEOUT = 60
+
+# Abbreviation → (state name, capital)
+STATES = {
+    "AL": ("Alabama", "Montgomery"), "AK": ("Alaska", "Juneau"), "AZ": ("Arizona", "Phoenix"),
+    "AR": ("Arkansas", "Little Rock"), "CA": ("California", "Sacramento"), "CO": ("Colorado", "Denver"),
+    "CT": ("Connecticut", "Hartford"), "DE": ("Delaware", "Dover"), "FL": ("Florida", "Tallahassee"),
+    "GA": ("Georgia", "Atlanta"), "HI": ("Hawaii", "Honolulu"), "ID": ("Idaho", "Boise"),
+    "IL": ("Illinois", "Springfield"), "IN": ("Indiana", "Indianapolis"), "IA": ("Iowa", "Des Moines"),
+    "KS": ("Kansas", "Topeka"), "KY": ("Kentucky", "Frankfort"), "LA": ("Louisiana", "Baton Rouge"),
+    "ME": ("Maine", "Augusta"), "MD": ("Maryland", "Annapolis"), "MA": ("Massachusetts", "Boston"),
+    "MI": ("Michigan", "Lansing"), "MN": ("Minnesota", "Saint Paul"), "MS": ("Mississippi", "Jackson"),
+    "MO": ("Missouri", "Jefferson City"), "MT": ("Montana", "Helena"), "NE": ("Nebraska", "Lincoln"),
+    "NV": ("Nevada", "Carson City"), "NH": ("New Hampshire", "Concord"), "NJ": ("New Jersey", "Trenton"),
+    "NM": ("New Mexico", "Santa Fe"), "NY": ("New York", "Albany"), "NC": ("North Carolina", "Raleigh"),
+    "ND": ("North Dakota", "Bismarck"), "OH": ("Ohio", "Columbus"), "OK": ("Oklahoma", "Oklahoma City"),
+    "OR": ("Oregon", "Salem"), "PA": ("Pennsylvania", "Harrisburg"), "RI": ("Rhode Island", "Providence"),
+    "SC": ("South Carolina", "Columbia"), "SD": ("South Dakota", "Pierre"), "TN": ("Tennessee", "Nashville"),
+    "TX": ("Texas", "Austin"), "UT": ("Utah", "Salt Lake City"), "VT": ("Vermont", "Montpelier"),
+    "VA": ("Virginia", "Richmond"), "WA": ("Washington", "Olympia"), "WV": ("West Virginia", "Charleston"),
+    "WI": ("Wisconsin", "Madison"), "WY": ("Wyoming", "Cheyenne"),
+}
+STATE_ABBREVIATIONS = {name.lower(): abbr for abbr, (name, _) in STATES.items()}
+# Capital coordinates bundled with the code, used while the Census-built index is missing or lacks a capital
+CAPITAL_POINTS = {
+    "AL": (32.3792, -86.3077), "AK": (58.3019, -134.4197), "AZ": (33.4484, -112.0740), "AR": (34.7465, -92.2896),
+    "CA": (38.5816, -121.4944), "CO": (39.7392, -104.9903), "CT": (41.7658, -72.6734), "DE": (39.1582, -75.5244),
+    "FL": (30.4383, -84.2807), "GA": (33.7490, -84.3880), "HI": (21.3069, -157.8583), "ID": (43.6150, -116.2023),
+    "IL": (39.7817, -89.6501), "IN": (39.7684, -86.1581), "IA": (41.5868, -93.6250), "KS": (39.0473, -95.6752),
+    "KY": (38.2009, -84.8733), "LA": (30.4515, -91.1871), "ME": (44.3106, -69.7795), "MD": (38.9784, -76.4922),
+    "MA": (42.3601, -71.0589), "MI": (42.7325, -84.5555), "MN": (44.9537, -93.0900), "MS": (32.2988, -90.1848),
+    "MO": (38.5767, -92.1735), "MT": (46.5891, -112.0391), "NE": (40.8136, -96.7026), "NV": (39.1638, -119.7674),
+    "NH": (43.2081, -71.5376), "NJ": (40.2171, -74.7429), "NM": (35.6870, -105.9378), "NY": (42.6526, -73.7562),
+    "NC": (35.7796, -78.6382), "ND": (46.8083, -100.7837), "OH": (39.9612, -82.9988), "OK": (35.4676, -97.5164),
+    "OR": (44.9429, -123.0351), "PA": (40.2732, -76.8867), "RI": (41.8240, -71.4128), "SC": (34.0007, -81.0348),
+    "SD": (44.3683, -100.3510), "TN": (36.1627, -86.7816), "TX": (30.2672, -97.7431), "UT": (40.7608, -111.8910),
+    "VT": (44.2601, -72.5754), "VA": (37.5407, -77.4360), "WA": (47.0379, -122.9007), "WV": (38.3498, -81.6326),
+    "WI": (43.0731, -89.4012), "WY": (41.1400, -104.8202),
+}
+CENSUS_ALIASES = {"honolulu": "urban honolulu"}  # Common name → Census place name
+
+# Census names end in their legal/statistical description ("Austin city", "Bethel Census Area")
+PLACE_SUFFIX_PATTERN = re.compile(
+    r"\s+(?:city and borough|consolidated government|metropolitan government|metro government|"
+    r"unified government|urban county|charter township|township|city|town|village|borough|CDP|"
+    r"municipality|plantation|gore|grant|location|purchase|comunidad|zona urbana)$", re.I)
+COUNTY_SUFFIX_PATTERN = re.compile(r"\s+(?:county|parish|city and borough|borough|census area|municipality)$", re.I)
+
+Location = namedtuple("Location", "lat lng approximate")
+
+def normalize_name(name):
+    """Comparable form of a place name: ASCII, lower case, 'Saint' as 'st', no punctuation"""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = re.sub(r"\bsaint\b|\bst\.", "st", name)
+    name = re.sub(r"[.'’]", "", name)
+    return " ".join(re.sub(r"[-/]", " ", name).split())
+
+def county_name_key(name):
+    """Comparable form of a county name ('Harris County', 'Harris' and 'Harris-County' agree)"""
+    name = name.replace("-", " ").strip()
+    return normalize_name(COUNTY_SUFFIX_PATTERN.sub("", name))
+
+def state_key(state):
+    """Lower-case abbreviation for a state name or abbreviation"""
+    state = state.strip()
+    if state.upper() in STATES:
+        return state.lower()
+    abbr = STATE_ABBREVIATIONS.get(state.lower())
+    return abbr.lower() if abbr else None
+
+def location_key(state, county=None, city=None):
+    """Index key for a state, a county, or a city (with or without its county)"""
+    key = state_key(state)
+    if key is None:
+        return None
+    if county:
+        key += "|" + county_name_key(county)
+    if city:
+        key += ("" if county else "|") + "|" + normalize_name(city)
+    return key
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+# Building
+
+def find_census_file(kind, source_dir=GAZETTEER_DIR):
+    """Newest Census Gazetteer file of a kind ('counties', 'place', 'cousubs'), zipped or not"""
+    matches = sorted(glob.glob(os.path.join(source_dir, f"*_Gaz_{kind}_national.*")))
+    return matches[-1] if matches else None
+
+def download_census_files(source_dir=GAZETTEER_DIR):
+    """Download the Census Gazetteer files missing from source_dir; returns True if all are there"""
+    import requests
+
+    os.makedirs(source_dir, exist_ok=True)
+    complete = True
+    for kind in CENSUS_KINDS:
+        if find_census_file(kind, source_dir):
+            continue
+        filename = f"{CENSUS_YEAR}_Gaz_{kind}_national.zip"
+        path = os.path.join(source_dir, filename)
+        print(f"Downloading {CENSUS_URL}/{filename}")
+        try:
+            with requests.get(f"{CENSUS_URL}/{filename}", stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                with open(path + ".tmp", 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"Error downloading {filename}: {e}")
+            complete = False
+    return complete
+
+def read_census_file(path):
+    """Rows of a tab-separated Census Gazetteer file as dicts"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            raw = archive.read(next(n for n in archive.namelist() if n.endswith(".txt")))
+    else:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")  # Gazetteer files before 2020 are Latin-1
+    reader = csv.reader(io.StringIO(text), delimiter="\t")
+    header = [column.strip() for column in next(reader)]
+    for row in reader:
+        if row:
+            yield dict(zip(header, (value.strip() for value in row)))
+
+def _point(row):
+    return round(float(row["INTPTLAT"]), 6), round(float(row["INTPTLONG"]), 6)
+
+def place_names(name):
+    """Names a Census place or subdivision is known by ('Nashville-Davidson metropolitan government (balance)' → nashville davidson, nashville)"""
+    full = name.replace(" (balance)", "")
+    name = PLACE_SUFFIX_PATTERN.sub("", full)
+    names = [normalize_name(name), normalize_name(full)]  # "Carson City" has no suffix to strip
+    short = re.split(r"[-/]", name)[0]
+    if short != name:
+        names.append(normalize_name(short))
+    return list(dict.fromkeys(names))
+
+def load_census(source_dir=GAZETTEER_DIR):
+    """Counties, county subdivisions and places from the Census files; returns None if the county file is missing"""
+    counties_file = find_census_file("counties", source_dir)
+    if not counties_file:
+        print(f"Error: no *_Gaz_counties_national file in {source_dir}")
+        return None
+
+    counties = {}  # (st, county key) → (lat, lng)
+    county_by_geoid = {}
+    for row in read_census_file(counties_file):
+        key = (row["USPS"].lower(), county_name_key(row["NAME"]))
+        counties[key] = _point(row)
+        county_by_geoid[row["GEOID"]] = key
+
+    subdivisions = {}  # (st, county key, name) → (lat, lng)
+    cousubs_file = find_census_file("cousubs", source_dir)
+    for row in read_census_file(cousubs_file) if cousubs_file else ():
+        county = county_by_geoid.get(row["GEOID"][:5])
+        if county:
+            for name in place_names(row["NAME"]):
+                subdivisions.setdefault(county + (name,), _point(row))
+
+    places = {}  # (st, name) → [(incorporated, land area, lat, lng)]
+    place_file = find_census_file("place", source_dir)
+    for row in read_census_file(place_file) if place_file else ():
+        candidate = (row.get("FUNCSTAT") == "A", int(row.get("ALAND") or 0)) + _point(row)
+        for name in place_names(row["NAME"]):
+            places.setdefault((row["USPS"].lower(), name), []).append(candidate)
+
+    sources = [os.path.basename(f) for f in (counties_file, cousubs_file, place_file) if f]
+    print(f"Loaded {len(counties)} counties, {len(subdivisions)} subdivision names, {len(places)} place names from {', '.join(sources)}")
+    return {"counties": counties, "subdivisions": subdivisions, "places": places, "sources": sources}
+
+def usa_data_cities(usa_data_dir=USA_DATA_DIR):
+    """Every (st, county directory, city) in the USA_DATA city lists"""
+    cities = set()
+    for cities_file in glob.glob(os.path.join(usa_data_dir, "??", "*", "*", "*-cities.txt")):
+        st = os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(cities_file))))
+        county = os.path.basename(os.path.dirname(cities_file))
+        with open(cities_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    cities.add((st, county, line.strip()))
+    return cities
+
+def usa_data_county_seats(usa_data_dir=USA_DATA_DIR):
+    """Every (st, county name, county seat) in the USA_DATA county seat files"""
+    county_seats = set()
+    for seats_file in glob.glob(os.path.join(usa_data_dir, "??", "*-seats.json")) + glob.glob(os.path.join(usa_data_dir, "??", "*-parishes.json")):
+        st = os.path.basename(os.path.dirname(seats_file))
+        try:
+            with open(seats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: skipping {seats_file}: {e}")
+            continue
+        for county, info in (data.get("counties") or data.get("parishes") or {}).items():
+            seats = info.get("countySeat") or info.get("parishSeat") or []
+            for seat in seats if isinstance(seats, list) else [seats]:  # Some counties have two seats
+                county_seats.add((st, county, seat))
+    return county_seats
+
+def usa_data_locations(usa_data_dir=USA_DATA_DIR):
+    """Every (st, county name, city) in the USA_DATA city lists and county seat files"""
+    return usa_data_cities(usa_data_dir) | usa_data_county_seats(usa_data_dir)
+
+def best_place(candidates, near=None, max_km=MAX_MATCH_KM):
+    """Pick a place among same-named candidates: the nearest to a point, else the largest incorporated one"""
+    if near:
+        lat, lng = near
+        nearest = min(candidates, key=lambda c: distance_km(lat, lng, c[2], c[3]))
+        return nearest if distance_km(lat, lng, nearest[2], nearest[3]) <= max_km else None
+    return max(candidates)
+
+def place_city(census, st, county_key, city_key):
+    """Coordinates of a city in a county: the place itself, else its county subdivision"""
+    county_point = census["counties"].get((st, county_key))
+    subdivision = census["subdivisions"].get((st, county_key, city_key))
+    candidates = census["places"].get((st, city_key)) or census["places"].get((st, CENSUS_ALIASES.get(city_key)))
+    if not candidates:
+        return subdivision
+    if subdivision:
+        place = best_place(candidates, subdivision, SAME_TOWN_KM)
+        return place[2:] if place else subdivision
+    place = best_place(candidates, county_point)
+    return place[2:] if place else None
+
+def build_gazetteer(source_dir=GAZETTEER_DIR, usa_data_dir=USA_DATA_DIR, output_file=GAZETTEER_FILE):
+    """Build the gazetteer index from the Census files; returns the number of entries or None"""
+    census = load_census(source_dir)
+    if census is None:
+        return None
+    counties, places = census["counties"], census["places"]
+    index = {}
+
+    for (st, name), candidates in places.items():
+        lat, lng = best_place(candidates)[2:]
+        index[f"{st}||{name}"] = [lat, lng]
+    for (st, county), (lat, lng) in counties.items():
+        index[f"{st}|{county}"] = [lat, lng]
+
+    missing_capitals = []
+    for abbr, (_, capital) in STATES.items():
+        point = index.get(location_key(abbr, city=CENSUS_ALIASES.get(normalize_name(capital), capital)))
+        if point:
+            index[abbr.lower()] = point
+        else:
+            index[abbr.lower()] = list(CAPITAL_POINTS[abbr])
+            missing_capitals.append(capital)
+
+    exact = approximate = unplaced = 0
+    unknown_counties = {}  # Counties USA_DATA has but the Census file does not (e.g. Connecticut since 2022)
+    for st, county, city in sorted(usa_data_locations(usa_data_dir)):
+        st = st.lower()
+        county_key = county_name_key(county)
+        city_key = normalize_name(city)
+        county_point = counties.get((st, county_key))
+        point = place_city(census, st, county_key, city_key)
+        if point is not None:
+            index[f"{st}|{county_key}|{city_key}"] = list(point)
+            exact += 1
+            if county_point is None:
+                unknown_counties.setdefault((st, county_key), []).append(point)
+        elif county_point is not None:
+            index[f"{st}|{county_key}|{city_key}"] = list(county_point) + [1]
+            approximate += 1
+        else:
+            unplaced += 1
+
+    # Place a county the Census file does not know at the middle of its cities
+    for (st, county_key), points in unknown_counties.items():
+        lat = round(sum(p[0] for p in points) / len(points), 6)
+        lng = round(sum(p[1] for p in points) / len(points), 6)
+        index[f"{st}|{county_key}"] = [lat, lng, 1]
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump({"sources": census["sources"], "built": datetime.now().isoformat(timespec="seconds"),
+                   "locations": index}, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_file, output_file)
+    load_gazetteer.cache_clear()
+
+    print(f"USA_DATA cities: {exact} placed, {approximate} at their county's point, {unplaced} not placed")
+    if unknown_counties:
+        print(f"{len(unknown_counties)} counties not in the Census file were placed at the middle of their cities")
+    if missing_capitals:
+        print(f"Warning: capitals not in the Census files (bundled coordinates used): {', '.join(missing_capitals)}")
+    print(f"Gazetteer saved to {output_file} ({len(index)} entries, {os.path.getsize(output_file) // 1024} KB)")
+    return len(index)
+
+def ensure_gazetteer(path=GAZETTEER_FILE, source_dir=GAZETTEER_DIR, download=True):
+    """Make sure the index is built and no older than the Census files; returns True when it exists"""
+    sources = [f for f in (find_census_file(kind, source_dir) for kind in CENSUS_KINDS) if f]
+    if os.path.exists(path) and all(os.path.getmtime(f) <= os.path.getmtime(path) for f in sources):
+        return True
+    if download and len(sources) < len(CENSUS_KINDS):
+        download_census_files(source_dir)
+    if find_census_file("counties", source_dir):
+        build_gazetteer(source_dir, output_file=path)
+    elif not os.path.exists(path):
+        print(f"Warning: no Census Gazetteer files in {source_dir}; only state capitals have coordinates")
+    return os.path.exists(path)
+
+# Lookup
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=GAZETTEER_FILE):
+    """Load (once) the gazetteer index; empty if it has not been built"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)["locations"]
+    except FileNotFoundError:
+        print(f"Warning: gazetteer {path} not found; only state capitals have coordinates until it is built "
+              f"(python3 Manus/gazetteer.py --build)")
+        return {}
+
+def lookup(state, county=None, city=None, path=GAZETTEER_FILE):
+    """Coordinates of a state capital, county or city as a Location, or None if unknown"""
+    key = location_key(state, county, city)
+    point = load_gazetteer(path).get(key) if key else None
+    if point is None and key and not county:
+        point = capital_point(state, city)
+    if point is None:
+        return None
+    return Location(point[0], point[1], len(point) > 2)
+
+def capital_point(state, city=None):
+    """Bundled [lat, lng] of a state capital (city, if given, must be the capital), or None"""
+    abbr = state_key(state).upper()
+    if city and normalize_name(city) != normalize_name(STATES[abbr][1]):
+        return None
+    return list(CAPITAL_POINTS[abbr])
+
+def capital_coordinates(state, capital=None, path=GAZETTEER_FILE):
+    """{"lat", "lng"} strings for a state capital (as used by the Divi map module), or None"""
+    location = lookup(state, city=capital, path=path) if capital else None
+    location = location or lookup(state, path=path)
+    if location is None:
+        return None
+    return {"lat": f"{location.lat:.6f}", "lng": f"{location.lng:.6f}"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline gazetteer")
+    parser.add_argument('--build', action='store_true', help='Build the gazetteer from the Census files')
+    parser.add_argument('--download', action='store_true', help='Download missing Census files before building')
+    parser.add_argument('--source', default=GAZETTEER_DIR, help='Directory holding the Census Gazetteer files')
+    parser.add_argument('--state', help='State name or abbreviation to look up')
+    parser.add_argument('--county', help='County to look up')
+    parser.add_argument('--city', help='City to look up')
+    args = parser.parse_args()
+
+    if args.build:
+        if args.download:
+            download_census_files(args.source)
+        build_gazetteer(args.source)
+    if args.state:
+        location = lookup(args.state, args.county, args.city)
+        if location is None:
+            print("Not found")
+        else:
+            print(f"{location.lat}, {location.lng}{' (approximate)' if location.approximate else ''}")
+    elif not args.build:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Variants for State and County Pages
+
+State hero images are uploaded at full size (Oklahoma.jpg is about 800 KB)
+and every visitor downloads all of it, most of them on mobile data. This
+stage makes smaller copies once and points the pages at them:
+
+- Every local image the generated pages reference (found as in
+  media_sync.py), plus any passed with --images, is resized to the
+  standard widths below its own width and saved as WebP, JPEG and, when
+  Pillow has AVIF support, AVIF under image_variants/[source hash]/.
+  Sources are processed in parallel by a process pool.
+- image_variants/manifest.json lists the variants by the SHA-256 of the
+  source, so unchanged images are skipped and a renamed copy of an image
+  reuses its variants.
+- --rewrite uploads the variants to the media library (media_sync.py, so
+  each is uploaded once) and rewrites the pages: a Divi image module gets
+  the smallest WebP variant at least as wide as the module is displayed,
+  and an HTML <img> becomes a <picture> with AVIF/WebP sources and a JPEG
+  srcset, so phones pick a small file.
+
+Needs Pillow (pip install Pillow); AVIF also needs Pillow 11.2+ built with
+libavif, or the pillow-avif-plugin package.
+
+Usage:
+  python3 image_variants.py                         # Make variants for the images the pages use
+  python3 image_variants.py --images ../Oklahoma.jpg
+  python3 image_variants.py --rewrite --dry-run     # Show which pages would change
+  python3 image_variants.py --rewrite               # Upload variants and rewrite the pages
+"""
+
+import os
+import re
+import io
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from media_sync import (IMAGE_DIRS, OUTPUT_DIR, HASH_LENGTH, load_index, save_index, file_sha256,
+                        find_local_image, page_image_urls, sync_files)
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF plugin on older Pillow
+except ImportError:
+    pass
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VARIANTS_DIR = os.path.join(BASE_DIR, "image_variants")
+MANIFEST_FILE = os.path.join(VARIANTS_DIR, "manifest.json")
+STANDARD_WIDTHS = (480, 768, 1024, 1440, 1920)
+CONTENT_WIDTH = 1080  # Divi's default content width in pixels
+DEFAULT_WORKERS = 4
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+SIZES = f"(max-width: {CONTENT_WIDTH}px) 100vw, {CONTENT_WIDTH}px"
+
+# Format → (file extension, Pillow save options)
+FORMATS = {
+    "avif": (".avif", {"quality": 55}),
+    "webp": (".webp", {"quality": 78, "method": 6}),
+    "jpeg": (".jpg", {"quality": 80, "optimize": True, "progressive": True}),
+}
+
+IMAGE_MODULE_PATTERN = re.compile(r'\[et_pb_image\b[^\]]*\]')
+IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*>', re.I)
+MODULE_SRC_PATTERN = re.compile(r'((?<![\w-])src=)"[^"]*"')
+PICTURE_PATTERN = re.compile(r'<picture\b.*?</picture>', re.I | re.S)
+
+def attribute(tag, name):
+    """Value of a double-quoted attribute in a tag or shortcode, or None"""
+    match = re.search(r'\b%s="([^"]*)"' % re.escape(name), tag)
+    return match.group(1) if match else None
+
+def avif_supported():
+    """Whether Pillow can write AVIF"""
+    try:
+        return Image is not None and features.check("avif")
+    except ValueError:  # Pillow before 11.2 has no "avif" feature
+        return Image is not None and "AVIF" in Image.SAVE
+
+def variant_widths(width):
+    """Standard widths below an image's width, plus the image's own width when it is smaller than the largest"""
+    widths = [w for w in STANDARD_WIDTHS if w < width]
+    if width <= STANDARD_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+def make_variants(source_path, source_hash, formats, variants_dir=VARIANTS_DIR):
+    """Resize one image to every width and format; returns its manifest entry"""
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        stem = os.path.splitext(os.path.basename(source_path))[0].replace(' ', '-')
+        out_dir = os.path.join(variants_dir, source_hash)
+        os.makedirs(out_dir, exist_ok=True)
+
+        variants = []
+        for variant_width in variant_widths(width):
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+            for name in formats:
+                ext, options = FORMATS[name]
+                frame = resized
+                if name == "jpeg" and frame.mode not in ("RGB", "L"):
+                    background = Image.new("RGB", frame.size, "white")  # JPEG has no transparency
+                    background.paste(frame, mask=frame.convert("RGBA").split()[-1])
+                    frame = background
+                buffer = io.BytesIO()
+                frame.save(buffer, name.upper(), **options)
+                filename = f"{stem}-w{variant_width}{ext}"
+                tmp_file = os.path.join(out_dir, filename + ".tmp")
+                with open(tmp_file, 'wb') as f:
+                    f.write(buffer.getvalue())
+                os.replace(tmp_file, os.path.join(out_dir, filename))
+                variants.append({"format": name, "width": variant_width, "height": variant_height,
+                                 "file": os.path.join(source_hash, filename), "bytes": buffer.tell()})
+    return {"source": os.path.basename(source_path), "width": width, "height": height,
+            "bytes": os.path.getsize(source_path), "variants": variants}
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Variants by source hash"""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Write the manifest atomically"""
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+def cached(entry, formats, variants_dir=VARIANTS_DIR):
+    """Whether a manifest entry has every format and all its files still exist"""
+    return bool(entry) and formats <= {v["format"] for v in entry["variants"]} and \
+        all(os.path.exists(os.path.join(variants_dir, v["file"])) for v in entry["variants"])
+
+def build_variants(paths, manifest, workers=DEFAULT_WORKERS, variants_dir=VARIANTS_DIR):
+    """Make the variants of images not in the manifest yet; returns {path: source hash}"""
+    formats = [name for name in FORMATS if name != "avif" or avif_supported()]
+    hashes = {path: file_sha256(path)[:HASH_LENGTH] for path in paths}
+    pending = {}
+    for path, source_hash in hashes.items():
+        if not cached(manifest.get(source_hash), set(formats), variants_dir):
+            pending.setdefault(source_hash, path)
+    print(f"{len(hashes)} images, {len(pending)} to resize ({', '.join(formats)} at {', '.join(map(str, STANDARD_WIDTHS))}px)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {source_hash: pool.submit(make_variants, path, source_hash, formats, variants_dir)
+                   for source_hash, path in pending.items()}
+        for source_hash, future in futures.items():
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"Error resizing {pending[source_hash]}: {e}")
+                continue
+            manifest[source_hash] = entry
+            smallest = min(v["bytes"] for v in entry["variants"])
+            print(f"  {entry['source']}: {entry['bytes']:,} bytes → {len(entry['variants'])} variants from {smallest:,} bytes")
+    return hashes
+
+def display_width(module):
+    """Width in pixels a Divi image module is shown at on desktop"""
+    max_width = attribute(module, "max_width") or ""
+    number = re.match(r'\s*([\d.]+)\s*(px|%)?', max_width)
+    if not number:
+        return CONTENT_WIDTH
+    value = float(number.group(1))
+    return round(CONTENT_WIDTH * value / 100) if number.group(2) != "px" else min(round(value), CONTENT_WIDTH)
+
+def pick_variant(variants, fmt, width):
+    """Smallest variant of a format at least width wide (else the widest)"""
+    candidates = sorted((v for v in variants if v["format"] == fmt), key=lambda v: v["width"])
+    return next((v for v in candidates if v["width"] >= width), candidates[-1] if candidates else None)
+
+def srcset(variants, fmt, urls):
+    """srcset value for the variants of one format"""
+    return ", ".join(f"{urls[v['file']]} {v['width']}w" for v in sorted(variants, key=lambda v: v["width"])
+                     if v["format"] == fmt and v["file"] in urls)
+
+def picture_markup(img_tag, variants, urls):
+    """<picture> with AVIF/WebP sources and a JPEG fallback for an <img> tag"""
+    fallback = pick_variant(variants, "jpeg", CONTENT_WIDTH)
+    tag = img_tag.replace(f'src="{attribute(img_tag, "src")}"', f'src="{urls[fallback["file"]]}"', 1)
+    tag = re.sub(r'\s*/?>$', f' srcset="{srcset(variants, "jpeg", urls)}" sizes="{SIZES}">', tag)
+    if "loading=" not in tag:
+        tag = tag[:-1] + ' loading="lazy" decoding="async">'
+    sources = "".join(f'<source type="image/{fmt}" srcset="{srcset(variants, fmt, urls)}" sizes="{SIZES}">'
+                      for fmt in ("avif", "webp") if srcset(variants, fmt, urls))
+    return f"<picture>{sources}{tag}</picture>"
+
+def rewrite_content(content, variants_by_url, urls):
+    """Point image modules and <img> tags at variants; returns (content, {source url: module variant})"""
+    def replace_img(match):
+        tag = match.group(0)
+        variants = variants_by_url.get(attribute(tag, "src"))
+        if not variants or "srcset=" in tag:
+            return tag
+        return picture_markup(tag, variants, urls)
+
+    # <img> tags already inside a <picture> are left alone
+    parts, last = [], 0
+    for match in PICTURE_PATTERN.finditer(content):
+        parts.append(IMG_TAG_PATTERN.sub(replace_img, content[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(IMG_TAG_PATTERN.sub(replace_img, content[last:]))
+    content = "".join(parts)
+
+    # Divi image modules take one URL: the smallest WebP covering the widest module showing that image
+    needed = {}
+    for module in IMAGE_MODULE_PATTERN.findall(content):
+        src = attribute(module, "src")
+        if src in variants_by_url:
+            needed[src] = max(needed.get(src, 0), display_width(module))
+    chosen = {src: pick_variant(variants_by_url[src], "webp", width) for src, width in needed.items()}
+    chosen = {src: variant for src, variant in chosen.items() if variant}
+
+    def replace_module(match):
+        # Only the module's own src attribute changes; the same URL elsewhere (in a <picture>) is left alone
+        module = match.group(0)
+        variant = chosen.get(attribute(module, "src"))
+        if not variant:
+            return module
+        return MODULE_SRC_PATTERN.sub(lambda m: f'{m.group(1)}"{urls[variant["file"]]}"', module, count=1)
+
+    return IMAGE_MODULE_PATTERN.sub(replace_module, content), chosen
+
+def update_images(page_json, uploaded_by_src):
+    """Add the module variants to a page's "images" map and drop originals the content no longer uses"""
+    if "images" not in page_json:
+        return
+    content = "".join(c for c in (page_json.get("data") or {}).values() if isinstance(c, str))
+    images = {}
+    for url, image in (page_json.get("images") or {}).items():
+        if url not in uploaded_by_src or url in content:
+            images[url] = image
+    # Variant entries carry only the attachment; the original's embedded image data would be the wrong file
+    for entry in uploaded_by_src.values():
+        images[entry["url"]] = {"url": entry["url"], "id": entry["id"]}
+    page_json["images"] = images
+
+def rewrite_pages(page_files, manifest, hashes_by_url, index, workers=DEFAULT_WORKERS, dry_run=False,
+                  variants_dir=VARIANTS_DIR):
+    """Upload the variants the pages need and rewrite the pages to use them; returns pages changed"""
+    variants_by_url = {url: manifest[source_hash]["variants"] for url, source_hash in hashes_by_url.items()
+                       if source_hash in manifest}
+    files = sorted({os.path.join(variants_dir, v["file"]) for variants in variants_by_url.values() for v in variants})
+    if dry_run:
+        uploaded = {path: {"id": 0, "url": f"<{os.path.relpath(path, variants_dir)}>"} for path in files}
+    else:
+        uploaded = sync_files(files, index, workers)
+    urls = {os.path.relpath(path, variants_dir): entry["url"] for path, entry in uploaded.items()}
+    variants_by_url = {url: [v for v in variants if v["file"] in urls] for url, variants in variants_by_url.items()}
+    variants_by_url = {url: variants for url, variants in variants_by_url.items() if variants}
+
+    changed = 0
+    for page_file in page_files:
+        with open(page_file, 'r', encoding='utf-8') as f:
+            page_json = json.load(f)
+        before = json.dumps(page_json, sort_keys=True)
+        data = page_json.get("data") or {}
+        uploaded_by_src = {}
+        for key, content in data.items():
+            if isinstance(content, str):
+                data[key], chosen = rewrite_content(content, variants_by_url, urls)
+                for src, variant in chosen.items():
+                    uploaded_by_src[src] = uploaded[os.path.join(variants_dir, variant["file"])]
+        update_images(page_json, uploaded_by_src)
+        if json.dumps(page_json, sort_keys=True) == before:
+            continue
+        changed += 1
+        if dry_run:
+            print(f"  Would rewrite {os.path.basename(page_file)}")
+            continue
+        tmp_file = page_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(page_json, f, indent=2)
+        os.replace(tmp_file, page_file)
+        print(f"  Rewrote {os.path.basename(page_file)}")
+    return changed
+
+def page_sources(page_files):
+    """Local source image for every image URL the pages reference: {url: path}"""
+    sources = {}
+    for page_file in page_files:
+        with open(page_file, 'r', encoding='utf-8') as f:
+            page_json = json.load(f)
+        for url in page_image_urls(page_json):
+            if url in sources:
+                continue
+            path = find_local_image(url)
+            if path and path.lower().endswith(IMAGE_EXTENSIONS):
+                sources[url] = path
+    return sources
+
+def main():
+    parser = argparse.ArgumentParser(description="Make responsive image variants and point the pages at them")
+    parser.add_argument('--images', nargs='+', help='Make variants of these images too')
+    parser.add_argument('--dir', default=OUTPUT_DIR, help='Directory of generated page JSON files')
+    parser.add_argument('--rewrite', action='store_true', help='Upload the variants and rewrite the pages')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Images resized in parallel')
+    parser.add_argument('--dry-run', action='store_true', help='With --rewrite, show the pages that would change')
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Error: Pillow is not installed (pip install Pillow)")
+        return
+    if not avif_supported():
+        print("Note: this Pillow cannot write AVIF; making WebP and JPEG variants only")
+
+    page_files = sorted(os.path.join(args.dir, f) for f in os.listdir(args.dir) if f.endswith('.json'))
+    sources = page_sources(page_files)
+    paths = sorted(set(sources.values()) | set(args.images or []))
+    if not paths:
+        print(f"No local images found for the pages in {args.dir} (looked in {', '.join(IMAGE_DIRS)})")
+        return
+
+    manifest = load_manifest()
+    hashes = build_variants(paths, manifest, args.workers)
+    save_manifest(manifest)
+
+    if args.rewrite:
+        index = load_index()
+        hashes_by_url = {url: hashes[path] for url, path in sources.items()}
+        changed = rewrite_pages(page_files, manifest, hashes_by_url, index, args.workers, args.dry_run)
+        print(f"{changed} of {len(page_files)} pages {'would be ' if args.dry_run else ''}updated")
+        if not args.dry_run:
+            save_index(index)
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,12 @@ import re
 import argparse
 import random
 from content_generator_utils_part1 import generate_unique_intro_paragraph, generate_unique_guide_paragraph
+from retarget import rewrite_terms
 from string import Template
 
 # Constants
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TEMPLATE_FILE = os.path.join(BASE_DIR, "State-Template-Page-Only-Variables.json")
+TEMPLATE_FILE = os.path.join(BASE_DIR, "templates", "State-Template-Page-Only-Variables.json")
 OUTPUT_DIR = os.path.join(BASE_DIR, "generated_pages")
 STATE_DATA_DIR = os.path.join(os.path.dirname(__file__), "state_data")
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -98,83 +99,51 @@ def replace_state_references(content, old_state, new_state):
     if not isinstance(content, str):
         return content
     
-    # Replace state name with proper capitalization
-    content = re.sub(r'\b' + re.escape(old_state) + r'\b', new_state, content, flags=re.IGNORECASE)
-    
-    # Replace state abbreviation
-    old_abbr = "OK"
-    new_abbr = new_state[:2].upper()
-    content = re.sub(r'\b' + re.escape(old_abbr) + r'\b', new_abbr, content)
-    
-    return content
+    # State name (any case) and abbreviation (exact case) in one pass
+    return rewrite_terms(content, [(old_state, new_state, True), ("OK", new_state[:2].upper(), False)])
 
 def replace_county_references(content, old_counties, new_counties):
     """Replace county references"""
     if not isinstance(content, str):
         return content
     
-    for i, old_county in enumerate(old_counties):
-        if i < len(new_counties):
-            content = re.sub(r'\b' + re.escape(old_county) + r'\b', new_counties[i], content, flags=re.IGNORECASE)
-    
-    return content
+    return rewrite_terms(content, [(old, new, True) for old, new in zip(old_counties, new_counties)])
 
 def replace_city_references(content, old_cities, new_cities):
     """Replace city references"""
     if not isinstance(content, str):
         return content
     
-    for i, old_city in enumerate(old_cities):
-        if i < len(new_cities):
-            content = re.sub(r'\b' + re.escape(old_city) + r'\b', new_cities[i], content, flags=re.IGNORECASE)
-    
-    return content
+    return rewrite_terms(content, [(old, new, True) for old, new in zip(old_cities, new_cities)])
 
 def replace_nickname_references(content, old_nickname, new_nickname):
     """Replace state nickname references"""
     if not isinstance(content, str):
         return content
     
-    content = re.sub(r'\b' + re.escape(old_nickname) + r'\b', new_nickname, content, flags=re.IGNORECASE)
-    return content
+    return rewrite_terms(content, [(old_nickname, new_nickname, True)])
 
 def replace_population_references(content, old_population, new_population):
     """Replace population references"""
     if not isinstance(content, str):
         return content
     
-    content = re.sub(r'\b' + re.escape(old_population) + r'\b', new_population, content, flags=re.IGNORECASE)
-    return content
+    return rewrite_terms(content, [(old_population, new_population, True)])
 
-def save_state_page(state_name, content, format='html'):
-    """Save generated page content to file"""
-    ext = 'html' if format == 'html' else 'json'
-    filename = os.path.join(OUTPUT_DIR, f"{state_name.lower().replace(' ', '_')}.{ext}")
+def render_preview_html(state_name, content):
+    """Render the HTML preview for a generated page without writing it to disk"""
+    title = f"{state_name} Bail Bondsman"
+    page_content = ""
     
-    try:
-        print(f"DEBUG save_state_page: Content keys = {content.keys() if isinstance(content, dict) else 'Not a dict'}")
-        
-        with open(filename, 'w') as f:
-            if format == 'json':
-                json.dump(content, f, indent=2)
-            else:
-                # Generate HTML preview
-                title = f"{state_name} Bail Bondsman"
-                page_content = ""
-                
-                # Extract content from WordPress/Divi JSON structure
-                if isinstance(content, dict) and "data" in content:
-                    # The actual content is in data key, usually with a numeric key
-                    data_keys = content["data"].keys()
-                    if data_keys:
-                        first_key = list(data_keys)[0]
-                        page_content = content["data"][first_key]
-                        print(f"DEBUG save_state_page: Found content in data[{first_key}]")
-                
-                print(f"DEBUG save_state_page: Title = {title}")
-                print(f"DEBUG save_state_page: Page content length = {len(str(page_content)) if page_content else 0}")
-                
-                html = f"""<!DOCTYPE html>
+    # Extract content from WordPress/Divi JSON structure
+    if isinstance(content, dict) and "data" in content:
+        # The actual content is in data key, usually with a numeric key
+        data_keys = content["data"].keys()
+        if data_keys:
+            first_key = list(data_keys)[0]
+            page_content = content["data"][first_key]
+    
+    return f"""<!DOCTYPE html>
 <html>
 <head>
     <title>{title}</title>
@@ -193,7 +162,21 @@ def save_state_page(state_name, content, format='html'):
     </div>
 </body>
 </html>"""
-                f.write(html)
+
+def save_state_page(state_name, content, format='html'):
+    """Save generated page content to file"""
+    ext = 'html' if format == 'html' else 'json'
+    filename = os.path.join(OUTPUT_DIR, f"{state_name.lower().replace(' ', '_')}.{ext}")
+    
+    try:
+        print(f"DEBUG save_state_page: Content keys = {content.keys() if isinstance(content, dict) else 'Not a dict'}")
+        
+        with open(filename, 'w') as f:
+            if format == 'json':
+                json.dump(content, f, indent=2)
+            else:
+                # Generate HTML preview
+                f.write(render_preview_html(state_name, content))
         print(f"{format.upper()} content for {state_name} saved to {filename}")
         return True
     except Exception as e:
@@ -10,7 +10,6 @@ improved_page_generator_part3.py to generate state pages.
 """
 
 import re
-import json
 import random
 import time
 import os
@@ -18,6 +17,7 @@ from improved_page_generator_part1 import load_template, load_state_data, save_s
 from content_generator_utils_part1 import generate_unique_intro_paragraph, generate_unique_guide_paragraph
 from content_generator_utils_part2 import generate_unique_availability_section, generate_unique_verified_bondsman_section, generate_unique_nationwide_coverage_section, generate_unique_county_intro
 from content_generator_utils_part3 import generate_unique_faqs
+from page_model import PageModel
 
 def update_page_title(template_json, state_name):
     """Update the page title with the new state name"""
@@ -278,34 +278,43 @@ def update_state_specific_sections(content, state_data):
     
     return content
 
-def generate_page_for_state(state_name, template_json):
+def build_state_page(state_name, template_json):
+    """Build the page JSON for a specific state in memory without saving it"""
+    # Load state data
+    state_data = load_state_data(state_name)
+    if not state_data:
+        print(f"Error: Could not load data for {state_name}")
+        return None
+    
+    print(f"DEBUG: State data loaded for {state_name}")
+    print(f"DEBUG: State data: {state_data}")
+    
+    # Share the template's parts and only build this state's data
+    state_page = PageModel(template_json)
+    
+    # Update page title
+    state_page, _ = update_title_sections(state_page, state_name)
+    print(f"DEBUG: Title updated for {state_name}")
+    
+    # Update content sections
+    state_page = update_content_sections(state_page, state_data)
+    print(f"DEBUG: Content sections updated for {state_name}")
+    
+    return state_page
+
+def generate_page_for_state(state_name, template_json, write_preview=True):
     """Generate a complete page for a specific state"""
     try:
-        # Load state data
-        state_data = load_state_data(state_name)
-        if not state_data:
-            print(f"Error: Could not load data for {state_name}")
+        state_page = build_state_page(state_name, template_json)
+        if not state_page:
             return False
         
-        print(f"DEBUG: State data loaded for {state_name}")
-        print(f"DEBUG: State data: {state_data}")
-        
-        # Create a deep copy of the template
-        state_page = json.loads(json.dumps(template_json))
-        
-        # Update page title
-        state_page, _ = update_title_sections(state_page, state_name)
-        print(f"DEBUG: Title updated for {state_name}")
-        
-        # Update content sections
-        state_page = update_content_sections(state_page, state_data)
-        print(f"DEBUG: Content sections updated for {state_name}")
-        
         # Save the generated page
         save_state_page(state_name, state_page, 'json')
         
-        # Also save as HTML for preview
-        save_state_page(state_name, state_page, 'html')
+        # Also save as HTML for preview (batch builds skip this and use preview_server.py instead)
+        if write_preview:
+            save_state_page(state_name, state_page, 'html')
         
         return True
     except Exception as e:
@@ -16,6 +16,9 @@ import sys
 import requests
 import traceback
 from improved_page_generator_part1 import load_template, load_state_data, save_state_page
+from work_queue import QUEUE_FILE, open_queue, run_worker
+from divi_shortcodes import minify_checked
+from wxr_export import state_page_slug
 from improved_page_generator_part2 import (generate_page_for_state, update_title_sections, 
                                           update_content_sections, update_page_title, 
                                           update_state_specific_sections)
@@ -81,7 +84,7 @@ def save_html_preview(state_name, state_page):
         print(f"Error saving HTML preview: {e}")
         return False
 
-def test_with_state(state_name):
+def test_with_state(state_name, write_preview=True):
     """Test the script with a specified state"""
     print(f"Testing with sample state ({state_name})...")
     # Load the Oklahoma template
@@ -90,53 +93,57 @@ def test_with_state(state_name):
         print("Failed to load Oklahoma template")
         return False
     # Generate page for the specified state
-    success = generate_page_for_state(state_name, template_json)
+    success = generate_page_for_state(state_name, template_json, write_preview)
     if success:
         print(f"Test successful! {state_name} page generated.")
     else:
         print(f"Test failed for {state_name}.")
     return success
 
-def generate_states_a_to_m(template_json):
+STATES_A_TO_M = [
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", 
+    "Colorado", "Connecticut", "Delaware", "Florida", "Georgia", 
+    "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", 
+    "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", 
+    "Michigan", "Minnesota", "Mississippi", "Missouri", "Montana"
+]
+
+STATES_N_TO_Z = [
+    "Nebraska", "Nevada", "New Hampshire", "New Jersey", "New Mexico", 
+    "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", 
+    "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", 
+    "South Dakota", "Tennessee", "Texas", "Utah", "Vermont", 
+    "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming"
+]
+
+def generate_states_a_to_m(template_json, write_preview=False):
     """Generate pages for states A-M"""
-    states_a_to_m = [
-        "Alabama", "Alaska", "Arizona", "Arkansas", "California", 
-        "Colorado", "Connecticut", "Delaware", "Florida", "Georgia", 
-        "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", 
-        "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", 
-        "Michigan", "Minnesota", "Mississippi", "Missouri", "Montana"
-    ]
+    states_a_to_m = STATES_A_TO_M
     
     success_count = 0
     for state_name in states_a_to_m:
         print(f"Generating page for {state_name}...")
-        if generate_page_for_state(state_name, template_json):
+        if generate_page_for_state(state_name, template_json, write_preview):
             success_count += 1
     
     print(f"Successfully generated {success_count} out of {len(states_a_to_m)} state pages (A-M).")
     return success_count
 
-def generate_states_n_to_z(template_json):
+def generate_states_n_to_z(template_json, write_preview=False):
     """Generate pages for states N-Z"""
-    states_n_to_z = [
-        "Nebraska", "Nevada", "New Hampshire", "New Jersey", "New Mexico", 
-        "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", 
-        "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", 
-        "South Dakota", "Tennessee", "Texas", "Utah", "Vermont", 
-        "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming"
-    ]
+    states_n_to_z = STATES_N_TO_Z
     
     success_count = 0
     for state_name in states_n_to_z:
         print(f"Generating page for {state_name}...")
-        if generate_page_for_state(state_name, template_json):
+        if generate_page_for_state(state_name, template_json, write_preview):
             success_count += 1
     
     print(f"Successfully generated {success_count} out of {len(states_n_to_z)} state pages (N-Z).")
     return success_count
 
-def generate_all_state_pages():
-    """Generate pages for all 50 states"""
+def generate_all_state_pages(write_preview=False):
+    """Generate pages for all 50 states (HTML previews are served on demand by preview_server.py)"""
     template_json = load_template()
     if not template_json:
         return 0
@@ -147,17 +154,69 @@ def generate_all_state_pages():
     os.makedirs(TEMPLATES_DIR, exist_ok=True)
     
     # Generate pages for states A-M
-    count_a_to_m = generate_states_a_to_m(template_json)
+    count_a_to_m = generate_states_a_to_m(template_json, write_preview)
     
     # Generate pages for states N-Z
-    count_n_to_z = generate_states_n_to_z(template_json)
+    count_n_to_z = generate_states_n_to_z(template_json, write_preview)
     
     total_count = count_a_to_m + count_n_to_z
     print(f"Page generation complete! Successfully generated {total_count} out of 50 state pages.")
     return total_count
 
-def upload_to_wordpress(state_name):
-    """Upload the generated state page to WordPress as a draft"""
+def enqueue_all_states(queue):
+    """Add every state to the work queue (states already queued are left as they are)"""
+    added = queue.enqueue(STATES_A_TO_M + STATES_N_TO_Z, kind="state")
+    print(f"Queued {added} new state jobs.")
+    return added
+
+def process_queued_state(job, template_json, write_preview=False, upload=False, minify=False):
+    """Work queue handler: generate (and optionally upload) one state page from the worker's template"""
+    state_name = job["location"]
+    if not generate_page_for_state(state_name, template_json, write_preview):
+        raise RuntimeError(f"page generation failed for {state_name}")
+    if upload and "lease" in job:
+        job["lease"].check()  # Another worker may own the job by now; do not upload twice
+    if upload and not upload_to_wordpress(state_name, minify):
+        raise RuntimeError(f"upload failed for {state_name}")
+    return {"state": state_name, "uploaded": upload}
+
+def queue_worker(queue_file, broker_url=None, write_preview=False, upload=False, minify=False):
+    """Run one worker process against the shared queue"""
+    # Loaded once per worker; each page copies only the parts it changes (PageModel)
+    template_json = load_template()
+    if not template_json:
+        print("Failed to load the template; worker not started")
+        return 0, 0
+    queue = open_queue(queue_file, broker_url)
+    return run_worker(queue, lambda job: process_queued_state(job, template_json, write_preview, upload, minify),
+                      kind="state")
+
+def run_queue_workers(count, queue_file, broker_url=None, write_preview=False, upload=False, minify=False):
+    """Start worker processes on this machine and wait for the queue to drain"""
+    if count <= 1:
+        return queue_worker(queue_file, broker_url, write_preview, upload, minify)
+    from multiprocessing import Pool
+    with Pool(count) as pool:
+        results = pool.starmap(queue_worker, [(queue_file, broker_url, write_preview, upload, minify)] * count)
+    done = sum(r[0] for r in results)
+    failed = sum(r[1] for r in results)
+    print(f"All workers finished: {done} done, {failed} failed.")
+    return done, failed
+
+def find_existing_page(slug):
+    """Return the ID of a page with this slug already on WordPress (any status), or None"""
+    response = requests.get(
+        f"{WP_API_URL}/pages",
+        params={"slug": slug, "status": "any", "_fields": "id"},
+        auth=WP_AUTH,
+        timeout=30
+    )
+    response.raise_for_status()
+    pages = response.json()
+    return pages[0]["id"] if pages else None
+
+def upload_to_wordpress(state_name, minify=False):
+    """Upload the generated state page to WordPress as a draft (updating the page if it already exists)"""
     json_path = os.path.join(os.path.dirname(__file__), "generated_pages", f"{state_name.lower()}.json")
     try:
         with open(json_path, 'r') as f:
@@ -181,9 +240,13 @@ def upload_to_wordpress(state_name):
     
     print(f"DEBUG upload_to_wordpress: Found content in data[{first_key}], length: {len(content)}")
     
+    if minify:
+        content = minify_checked(content)
+        print(f"Minified content length: {len(content)}")
+    
     # Configure page data
     title = f"Find Local {state_name} Bail Bondsmen Near You | 24/7 Emergency Service"
-    slug = f"{state_name.lower()}-bail-bondsman-24-hour-emergency-service-nearby"
+    slug = state_page_slug(state_name)
 
     page_data = {
         "title": title,
@@ -199,15 +262,19 @@ def upload_to_wordpress(state_name):
     }
 
     try:
+        # Look the page up first so a retried or repeated upload updates it instead of adding a duplicate draft
+        existing_id = find_existing_page(slug)
+        if existing_id:
+            del page_data["status"]  # Keep the status the existing page has
         response = requests.post(
-            f"{WP_API_URL}/pages",
+            f"{WP_API_URL}/pages/{existing_id}" if existing_id else f"{WP_API_URL}/pages",
             json=page_data,
             auth=WP_AUTH
         )
         if response.status_code >= 200 and response.status_code < 300:
             page_id = response.json().get("id")
             page_link = response.json().get("link")
-            print(f"Success! {state_name} page created on WordPress.")
+            print(f"Success! {state_name} page {'updated' if existing_id else 'created'} on WordPress.")
             print(f"Page ID: {page_id}")
             print(f"Draft URL: {WP_BASE_URL}/?page_id={page_id}")
             print(f"Final URL (when published): {page_link}")
@@ -274,6 +341,14 @@ if __name__ == "__main__":
     parser.add_argument('--all', action='store_true', help='Generate all state pages')
     parser.add_argument('--state', type=str, help='Generate a single state page (production mode)')
     parser.add_argument('--upload', action='store_true', help='Upload the generated state page to WordPress as a draft')
+    parser.add_argument('--minify', action='store_true', help='Strip default Divi attributes and extra whitespace (verified) before uploading')
+    parser.add_argument('--no-preview', action='store_true', help='Skip writing the HTML preview file (use preview_server.py instead)')
+    parser.add_argument('--preview', action='store_true', help='Also write HTML preview files when using --all')
+    parser.add_argument('--enqueue', action='store_true', help='Add all states to the shared work queue')
+    parser.add_argument('--worker', action='store_true', help='Generate states claimed from the work queue until it is empty')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes to start with --worker')
+    parser.add_argument('--queue', default=QUEUE_FILE, help='Work queue database file (default: work_queue.db)')
+    parser.add_argument('--broker', help='URL of a work_queue.py --serve broker (instead of --queue)')
     args = parser.parse_args()
 
     if args.state:
@@ -283,18 +358,23 @@ if __name__ == "__main__":
         if not template_json:
             print("Failed to load Oklahoma template")
         else:
-            success = generate_page_for_state(state_name, template_json)
+            success = generate_page_for_state(state_name, template_json, not args.no_preview)
             if success:
                 print(f"Production page for {state_name} generated.")
                 if args.upload:
-                    upload_to_wordpress(state_name)
+                    upload_to_wordpress(state_name, args.minify)
             else:
                 print(f"Failed to generate production page for {state_name}.")
     elif args.test:
         state_name = args.test
         print(f"Testing with sample state ({state_name})...")
-        test_with_state(state_name)
+        test_with_state(state_name, not args.no_preview)
     elif args.all:
-        generate_all_state_pages()
+        generate_all_state_pages(args.preview)
+    elif args.enqueue or args.worker:
+        if args.enqueue:
+            enqueue_all_states(open_queue(args.queue, args.broker))
+        if args.worker:
+            run_queue_workers(args.workers, args.queue, args.broker, args.preview, args.upload, args.minify)
     else:
-        print("No valid arguments provided. Use --state [State], --test [State], or --all.")
+        print("No valid arguments provided. Use --state [State], --test [State], --all, --enqueue or --worker.")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Job Journal for Long Bail Bonds Buddy Batch Runs
+
+Append-only JSON Lines journal recording the stage each location has
+reached (generated, validated, uploading, uploaded with its page ID, or
+failed). Every record is flushed and fsync'd before the run moves on, so
+a run killed at any point can be resumed without redoing finished work or
+creating duplicate WordPress drafts.
+
+Each run starts with a "start" record; resuming replays the records after
+the latest start. A torn last line from a crash is ignored.
+
+Usage:
+  from job_journal import JobJournal
+
+  journal = JobJournal(JOURNAL_FILE, resume=args.resume)
+  if not journal.reached("Texas", "generated"):
+      ...
+      journal.record("Texas", "generated")
+
+  python3 job_journal.py                 # Show the state of the last run
+  python3 job_journal.py --file other.jsonl
+"""
+
+import os
+import json
+import argparse
+from datetime import datetime
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_DIR = os.path.join(BASE_DIR, "journals")
+STAGES = ("generated", "validated", "uploading", "uploaded")  # In the order a location goes through them
+
+class JobJournal:
+    """Durable record of per-location progress for one batch run"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.locations = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume:
+            self.locations = self.replay(path)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._write({"event": "resume" if resume else "start"})
+
+    @staticmethod
+    def replay(path):
+        """Latest state of every location recorded since the last start record"""
+        locations = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write from a crash
+                    if entry.get("event") == "start":
+                        locations = {}
+                    elif "location" in entry:
+                        state = locations.setdefault(entry["location"], {})
+                        state.update(entry)
+                        if entry["stage"] != "failed":
+                            state.pop("error", None)
+        except FileNotFoundError:
+            pass
+        return locations
+
+    def _write(self, entry):
+        entry["time"] = datetime.now().isoformat(timespec="seconds")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, location, stage, **fields):
+        """Durably record that a location reached a stage (or failed with error=...)"""
+        entry = {"location": location, "stage": stage}
+        entry.update(fields)
+        self._write(entry)
+        state = self.locations.setdefault(location, {})
+        state.update(entry)
+        if stage != "failed":
+            state.pop("error", None)
+
+    def stage(self, location):
+        """Last successful stage of a location, or None"""
+        state = self.locations.get(location, {})
+        if state.get("stage") == "failed":
+            return state.get("last_stage")
+        return state.get("stage")
+
+    def reached(self, location, stage):
+        """Whether a location has completed the given stage"""
+        current = self.stage(location)
+        return current in STAGES and STAGES.index(current) >= STAGES.index(stage)
+
+    def fail(self, location, error):
+        """Record a failure, keeping the last completed stage so a resume retries from there"""
+        self.record(location, "failed", error=str(error), last_stage=self.stage(location))
+
+    def page_id(self, location):
+        """WordPress page ID recorded for a location, if it was uploaded"""
+        return self.locations.get(location, {}).get("page_id")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_summary(path):
+    """Print the per-stage totals of the last run in a journal"""
+    locations = JobJournal.replay(path)
+    if not locations:
+        print(f"No locations recorded in {path}")
+        return
+    by_stage = {}
+    for location, state in sorted(locations.items()):
+        by_stage.setdefault(state["stage"], []).append(location)
+    for stage, names in by_stage.items():
+        print(f"{stage} ({len(names)}): {', '.join(names)}")
+    for location, state in sorted(locations.items()):
+        if state["stage"] == "failed":
+            print(f"  {location}: {state.get('error')}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the progress recorded in a batch run journal")
+    parser.add_argument('--file', default=os.path.join(JOURNAL_DIR, "all_states.jsonl"), help='Journal file to read')
+    args = parser.parse_args()
+    print_summary(args.file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Offline Internal Link Checker for the Generated Pages
+
+Checks every internal link in the generated pages against the set of pages
+that will exist once they are uploaded, without any HTTP requests:
+
+- One streaming pass over the pages wxr_export.py exports (state pages,
+  then their county and city pages) records each page's URL and pulls the
+  internal links (href, url, link_option_url, button_url) out of its
+  content. Only one page is read at a time.
+- A page is planned under its WordPress URL (state/county/city slug path)
+  and under its static export URL ([st]/[county]/[city]), so links in
+  either form resolve. The site root (breadcrumb "Home" links) is always
+  planned; query-only links such as /?p=5 address posts by ID and cannot be
+  resolved offline, so they are skipped.
+- Broken links are internal links whose target is not a planned page.
+  Orphaned pages are county and city pages no other page links to (state
+  pages are reached from the site menu).
+- The slug rules the links are built from (county_url_slug in
+  counties.csv, "directory" in USA_DATA/[ST]/*-county-seats.json, and the
+  state page slug the uploaders send, wxr_export.state_page_slug) are
+  checked against the planned pages too.
+
+Links to wp-content, wp-admin, wp-json and other WordPress paths are not
+pages and are skipped.
+
+Usage:
+  python3 link_checker.py                 # Report broken links, orphans and slug rules
+  python3 link_checker.py --state TX      # Only links from Texas pages
+  python3 link_checker.py --limit 100     # List more entries per section
+"""
+
+import os
+import re
+import csv
+import json
+import argparse
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit, unquote
+
+from wxr_export import (STATE_NAMES, WP_BASE_URL, GENERATED_PAGES_DIR, COUNTY_PROFILES_DIR,
+                        state_page_slug, iter_pages)
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+USA_DATA_DIR = os.path.join(BASE_DIR, "..", "USA_DATA")
+COUNTIES_CSV = os.path.join(BASE_DIR, "..", "counties.csv")
+ROOT_PATH = ""  # normalize_path() of the home page
+SITE_HOSTS = {"bailbondsbuddy.com", "www.bailbondsbuddy.com"}
+SKIPPED_PREFIXES = ("wp-content/", "wp-admin/", "wp-includes/", "wp-json/", "feed/", "search/")
+REPORT_LIMIT = 25  # Entries listed per section
+
+LINK_PATTERN = re.compile(r'''\b(?:href|url|link_option_url|button_url)\s*=\s*["']([^"']+)["']''', re.I)
+
+def normalize_path(path):
+    """Path as WordPress matches it: lowercase, no surrounding slashes"""
+    return unquote(path).strip('/').lower()
+
+def internal_target(link, page_url):
+    """Normalised path of an internal page link, or None for external links, anchors and assets"""
+    link = link.strip().replace("&amp;", "&").replace("&#038;", "&")
+    if not link or link.startswith(('#', 'mailto:', 'tel:', 'javascript:', 'data:', '@ET-DC@', '[')):
+        return None
+    parts = urlsplit(urljoin(page_url, link))
+    if parts.scheme not in ("http", "https") or parts.netloc.lower() not in SITE_HOSTS:
+        return None
+    path = normalize_path(parts.path)
+    if path == ROOT_PATH and parts.query:
+        return None  # /?p=5, /?page_id=5: addressed by post ID, not by slug
+    if os.path.splitext(path)[1] or (path + "/").startswith(SKIPPED_PREFIXES):
+        return None  # Files and WordPress endpoints, not pages
+    return path
+
+def scan_pages(generated_dir=GENERATED_PAGES_DIR, county_dir=COUNTY_PROFILES_DIR):
+    """One pass over the generated pages; returns (planned {path: page path}, links [(page path, link, target)],
+    pages {page path: (state, depth)})"""
+    planned, pages, links = {ROOT_PATH: ROOT_PATH}, {}, []
+    paths = {}  # post_id -> WordPress path, parents are yielded first
+    static_paths = {}
+    for page in iter_pages(generated_dir, county_dir):
+        slug = page["slug"].lower()
+        parent = paths.get(page["parent_id"])
+        path = f"{parent}/{slug}" if parent else slug
+        paths[page["post_id"]] = path
+        planned[path] = path
+        pages[path] = (page["state"], page["depth"])
+        if page["depth"] == 1:
+            static_paths[page["post_id"]] = f"{page['state'].lower()}/{slug}"
+            planned[static_paths[page["post_id"]]] = path
+        elif page["depth"] == 2 and page["parent_id"] in static_paths:
+            planned[f"{static_paths[page['parent_id']]}/{slug}"] = path
+
+        page_url = f"{WP_BASE_URL}/{path}/"
+        for match in LINK_PATTERN.finditer(page["content"] or ""):
+            target = internal_target(match.group(1), page_url)
+            if target is not None:
+                links.append((path, match.group(1), target))
+    return planned, links, pages
+
+def state_abbr(name_or_abbr):
+    """Abbreviation for a state name or abbreviation (None if unknown)"""
+    value = (name_or_abbr or "").strip()
+    if value.upper() in STATE_NAMES:
+        return value.upper()
+    return next((abbr for abbr, name in STATE_NAMES.items() if name.lower() == value.lower()), None)
+
+def slug_rule_targets(counties_csv=COUNTIES_CSV, usa_data_dir=USA_DATA_DIR, states_with_pages=()):
+    """Page paths the slug rules point at: [(source, state, path)]"""
+    # The uploaders' state page slug, for every state that has a generated page
+    targets = [("state_page_slug", abbr, normalize_path(state_page_slug(STATE_NAMES[abbr])))
+               for abbr in sorted(states_with_pages)]
+    if os.path.exists(counties_csv):
+        with open(counties_csv, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                abbr = state_abbr(row.get('state'))
+                county_slug = (row.get('county_url_slug') or "").strip()
+                if abbr and county_slug:
+                    path = normalize_path(f"{state_page_slug(STATE_NAMES[abbr])}/{county_slug}")
+                    targets.append((os.path.basename(counties_csv), abbr, path))
+
+    for abbr in sorted(STATE_NAMES):
+        state_dir = os.path.join(usa_data_dir, abbr)
+        if not os.path.isdir(state_dir):
+            continue
+        for filename in sorted(os.listdir(state_dir)):
+            if not filename.endswith("-seats.json"):
+                continue
+            try:
+                with open(os.path.join(state_dir, filename), 'r', encoding='utf-8') as f:
+                    counties = json.load(f).get("counties") or {}
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read {filename}: {e}")
+                continue
+            for county in counties.values():
+                directory = county.get("directory") if isinstance(county, dict) else None
+                if directory:
+                    targets.append((filename, abbr, normalize_path(f"{state_page_slug(STATE_NAMES[abbr])}/{directory}")))
+    return targets
+
+def print_section(title, entries, limit):
+    """Print a titled list, cut off after limit entries"""
+    if not entries:
+        return
+    print(f"\n{title}:")
+    for entry in entries[:limit]:
+        print(f"  {entry}")
+    if len(entries) > limit:
+        print(f"  ... and {len(entries) - limit} more")
+
+def check_links(states=None, limit=REPORT_LIMIT, generated_dir=GENERATED_PAGES_DIR, county_dir=COUNTY_PROFILES_DIR):
+    """Print the broken links, orphaned pages and unresolved slug rules; returns the number of broken links"""
+    planned, links, pages = scan_pages(generated_dir, county_dir)
+    rule_targets = slug_rule_targets(states_with_pages={state for state, depth in pages.values() if depth == 0})
+    if states:
+        links = [link for link in links if pages[link[0]][0] in states]
+        pages = {path: page for path, page in pages.items() if page[0] in states}
+        rule_targets = [target for target in rule_targets if target[1] in states]
+
+    broken = defaultdict(list)
+    linked = set()
+    for source, link, target in links:
+        page = planned.get(target)
+        if page is None:
+            broken[link].append(source)
+        elif page != source:
+            linked.add(page)
+    orphans = sorted(path for path, (_, depth) in pages.items() if depth > 0 and path not in linked)
+
+    rules = defaultdict(list)
+    for source, _, target in rule_targets:
+        if target not in planned:
+            rules[source].append(target)
+
+    print(f"Pages: {len(pages)}, internal links: {len(links)}, "
+          f"broken: {sum(len(sources) for sources in broken.values())} ({len(broken)} distinct targets), "
+          f"orphaned pages: {len(orphans)}")
+    print_section("Broken links (target, pages linking to it)",
+                  [f"{link}  <- {', '.join(sources[:3])}{' ...' if len(sources) > 3 else ''}"
+                   for link, sources in sorted(broken.items(), key=lambda item: -len(item[1]))], limit)
+    print_section("Orphaned pages (no internal links to them)", orphans, limit)
+    if rules:
+        print_section("Slug rules with no generated page (source: count)",
+                      [f"{source}: {len(targets)}" for source, targets in sorted(rules.items())], limit)
+        print_section("First of them", [target for targets in rules.values() for target in targets], limit)
+    return sum(len(sources) for sources in broken.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the internal links of the generated pages offline")
+    parser.add_argument('--state', action='append', help='Only check links from this state (abbreviation, repeatable)')
+    parser.add_argument('--limit', type=int, default=REPORT_LIMIT, help='Entries listed per section')
+    parser.add_argument('--generated', default=GENERATED_PAGES_DIR, help='Directory with the generated state pages')
+    parser.add_argument('--county-dir', default=COUNTY_PROFILES_DIR, help='Directory with the county and city pages')
+    args = parser.parse_args()
+
+    states = None
+    if args.state:
+        states = {abbr.strip().upper() for abbr in args.state}
+        unknown = states - set(STATE_NAMES)
+        if unknown:
+            print(f"Unknown state abbreviations: {', '.join(sorted(unknown))}")
+            return
+
+    check_links(states, args.limit, args.generated, args.county_dir)
+
+if __name__ == "__main__":
+    main()
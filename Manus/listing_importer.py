@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Directorist Listing Importer for Bondsman Directory Entries
+
+Creates and updates Directorist listings (post type at_biz_dir) from a CSV
+or JSON file of bondsman records, one record per bondsman and location:
+
+  name, phone, license, email, website, address, zip, state, county, city, description
+
+state, county and city are USA_DATA names or slugs (TX, Texas, harris-county,
+Harris County, Baytown). Optional lat and lng columns are used for the
+listing map; otherwise the gazetteer coordinates of the city are used.
+
+- Records are normalised (phone digits, upper-case license, trimmed text)
+  and de-duplicated in memory: records sharing a phone number or a license
+  number are one bondsman, whose locations are merged.
+- A local index (listing_index.json) maps every phone and license number
+  to its listing ID and remembers a hash of what was last sent, so a
+  re-import only sends the listings whose fields or locations changed.
+- Creates and updates are sent 25 at a time through the REST batch
+  endpoint (/wp-json/batch/v1) over the shared session in wp_api.py.
+  Missing location terms (state, county, city) are created first.
+
+The listing fields are exposed to the REST API by the must-use plugin
+wp-content/mu-plugins/bbb-listing-fields.php, which must be on the site.
+
+Usage:
+  python3 listing_importer.py bondsmen.csv --dry-run      # Show what would change
+  python3 listing_importer.py bondsmen.csv                # Create/update listings as drafts
+  python3 listing_importer.py bondsmen.json --status publish --directory-type 12
+  python3 listing_importer.py --rebuild-index             # Rebuild the index from the site
+"""
+
+import os
+import re
+import csv
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from wp_api import WP_BASE_URL, DEFAULT_TIMEOUT, get_session, api_url, iter_collection
+from gazetteer import STATES, state_key, county_name_key, normalize_name, location_key, lookup
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LISTING_INDEX_FILE = os.path.join(BASE_DIR, "listing_index.json")
+BATCH_URL = f"{WP_BASE_URL}/wp-json/batch/v1"
+LISTING_TYPE = "at_biz_dir"
+LOCATION_TAXONOMY = "at_biz_dir-location"
+DIRECTORY_TAXONOMY = "atbdp_listing_types"
+BATCH_SIZE = 25  # WordPress's default limit for one batch request
+DEFAULT_WORKERS = 4
+
+# Input column (lower case, spaces as _) → record field (first match wins)
+FIELD_ALIASES = {
+    "name": ("name", "title", "business_name", "bondsman"),
+    "phone": ("phone", "phone_number", "telephone"),
+    "license": ("license", "license_number", "license_no"),
+    "email": ("email", "e_mail"),
+    "website": ("website", "url", "web"),
+    "address": ("address", "street_address"),
+    "zip": ("zip", "zip_code", "postal_code"),
+    "state": ("state", "state_abbr"),
+    "county": ("county", "county_name", "county_slug"),
+    "city": ("city", "city_name", "city_slug"),
+    "description": ("description", "content", "about"),
+    "lat": ("lat", "latitude"),
+    "lng": ("lng", "lon", "longitude"),
+}
+
+def normalize_phone(phone):
+    """Ten-digit US phone number, or '' when the value is not one"""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else ""
+
+def format_phone(digits):
+    """Display form of a ten-digit phone number"""
+    return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
+def normalize_license(license_number):
+    """Comparable license number: upper case letters and digits only"""
+    return re.sub(r"[^A-Z0-9]", "", (license_number or "").upper())
+
+def clean_text(value):
+    """Trimmed text with runs of whitespace collapsed"""
+    return " ".join(str(value or "").split())
+
+def record_location(record):
+    """(state abbr, county key, city key) of a record, or None if the state is unknown"""
+    st = state_key(clean_text(record.get("state")).replace("-", " "))
+    if not st:
+        return None
+    county = county_name_key(clean_text(record.get("county"))) or None
+    city = normalize_name(clean_text(record.get("city"))) or None
+    return (st, county, city)
+
+def normalize_record(row):
+    """Record with the known fields taken from an input row, normalised"""
+    row = {re.sub(r"[\s-]+", "_", str(k).strip().lower()): v for k, v in row.items() if k is not None}
+    record = {}
+    for field, aliases in FIELD_ALIASES.items():
+        record[field] = next((clean_text(row[a]) for a in aliases if clean_text(row.get(a))), "")
+    record["phone"] = normalize_phone(record["phone"])
+    record["license"] = normalize_license(record["license"])
+    record["email"] = record["email"].lower()
+    record["location"] = record_location(record)
+    return record
+
+def read_records(path):
+    """Rows of a CSV file, a JSON array, or a JSON object with a 'listings' array"""
+    if path.lower().endswith(".csv"):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    yield from (data.get("listings", []) if isinstance(data, dict) else data)
+
+def record_keys(record):
+    """Identity keys of a record: its phone and license numbers"""
+    keys = []
+    if record["license"]:
+        keys.append(f"license:{record['location'][0] if record['location'] else ''}:{record['license']}")
+    if record["phone"]:
+        keys.append(f"phone:{record['phone']}")
+    return keys
+
+def deduplicate(records):
+    """Merge records that share a phone or license number; returns the merged bondsmen"""
+    groups = []  # Each group: {"keys": set, "records": list}, or None once merged into another
+    group_of = {}
+    skipped = 0
+    for record in records:
+        keys = record_keys(record)
+        if not keys or not record["name"]:
+            skipped += 1
+            continue
+        found = sorted({group_of[k] for k in keys if k in group_of})
+        if found:
+            target = found[0]
+            for other in found[1:]:  # This record joins groups that were separate so far
+                groups[target]["keys"] |= groups[other]["keys"]
+                groups[target]["records"] += groups[other]["records"]
+                for key in groups[other]["keys"]:
+                    group_of[key] = target
+                groups[other] = None
+        else:
+            target = len(groups)
+            groups.append({"keys": set(), "records": []})
+        groups[target]["keys"].update(keys)
+        groups[target]["records"].append(record)
+        for key in keys:
+            group_of[key] = target
+
+    if skipped:
+        print(f"Warning: skipped {skipped} records without a name, or without a phone or license number")
+    return [merge_group(group) for group in groups if group]
+
+def merge_group(group):
+    """One bondsman from the records of a group: first non-empty value of each field, all locations"""
+    bondsman = {}
+    for field in FIELD_ALIASES:
+        bondsman[field] = next((r[field] for r in group["records"] if r[field]), "")
+    bondsman["locations"] = sorted({r["location"] for r in group["records"] if r["location"]},
+                                   key=lambda loc: tuple(part or "" for part in loc))
+    bondsman["keys"] = sorted(group["keys"])
+    return bondsman
+
+def location_term_path(location):
+    """Location keys from the state down to the most specific part of a location"""
+    st, county, city = location
+    path = [location_key(st)]
+    if county:
+        path.append(location_key(st, county))
+    if city:
+        path.append(location_key(st, county, city))
+    return path
+
+def term_name(key):
+    """Display name for a location key (tx|harris|baytown → Baytown)"""
+    parts = key.split("|")
+    if len(parts) == 1:
+        return STATES[parts[0].upper()][0]
+    if len(parts) == 2:
+        return f"{parts[1].title()} County" if parts[0] != "la" else f"{parts[1].title()} Parish"
+    return parts[-1].title()
+
+def term_slug(key):
+    """Term slug for a location key; the slug spells out the level so a city never shares its county's slug
+    (tx → tx, tx|harris → tx-harris-county, tx|harris|baytown → tx-harris-county-baytown,
+    ok||tulsa → ok-city-tulsa)"""
+    parts = [part.replace(" ", "-") for part in key.split("|")]
+    if len(parts) == 1:
+        return parts[0]
+    level = "parish" if parts[0] == "la" else "county"
+    county = f"{parts[0]}-{parts[1]}-{level}" if parts[1] else f"{parts[0]}-city"
+    return county if len(parts) == 2 else f"{county}-{parts[2]}"
+
+def listing_payload(bondsman, location_terms, status, directory_type=None):
+    """REST body for a listing"""
+    meta = {
+        "_phone": format_phone(bondsman["phone"]) if bondsman["phone"] else "",
+        "_email": bondsman["email"],
+        "_website": bondsman["website"],
+        "_address": bondsman["address"],
+        "_zip": bondsman["zip"],
+        "_bbb_license": bondsman["license"],
+        "_never_expire": "1",
+    }
+    lat, lng = bondsman["lat"], bondsman["lng"]
+    if not (lat and lng) and bondsman["locations"]:
+        point = lookup(*bondsman["locations"][0])
+        if point:
+            lat, lng = f"{point.lat:.6f}", f"{point.lng:.6f}"
+    if lat and lng:
+        meta.update({"_manual_lat": lat, "_manual_lng": lng})
+
+    payload = {
+        "title": bondsman["name"],
+        "content": bondsman["description"],
+        "status": status,
+        LOCATION_TAXONOMY: sorted(location_terms),
+        "meta": meta,
+    }
+    if directory_type:
+        payload[DIRECTORY_TAXONOMY] = [directory_type]
+        meta["_directory_type"] = str(directory_type)
+    return payload
+
+def payload_hash(payload):
+    """Hash of a listing body, to tell whether it changed since the last import"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def load_index(index_file=LISTING_INDEX_FILE):
+    """Load the listing index (identity key → listing ID, listing ID → hash, location key → term ID)"""
+    index = {"keys": {}, "hashes": {}, "locations": {}}
+    try:
+        with open(index_file, 'r') as f:
+            index.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError as e:
+        print(f"Warning: ignoring unreadable listing index {index_file}: {e}")
+    return index
+
+def save_index(index, index_file=LISTING_INDEX_FILE):
+    """Write the listing index atomically"""
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, index_file)
+
+def rebuild_index(index, workers=DEFAULT_WORKERS):
+    """Rebuild the index from one sweep of the listings and location terms on the site"""
+    keys, hashes, locations = {}, {}, {}
+    for item in iter_collection(LISTING_TYPE, {"status": "any", "_fields": "id,meta"}, workers=workers):
+        meta = item.get("meta") or {}
+        for key in filter(None, (meta.get("_bbb_import_key") or "").split()):
+            keys[key] = item["id"]
+        if meta.get("_bbb_import_hash"):
+            hashes[str(item["id"])] = meta["_bbb_import_hash"]
+    for term in iter_collection(LOCATION_TAXONOMY, {"_fields": "id,slug"}, workers=workers):
+        locations[term["slug"]] = term["id"]
+
+    index.update(keys=keys, hashes=hashes, locations=locations)
+    print(f"Listing index rebuilt: {len(set(keys.values()))} listings, {len(locations)} location terms")
+    return index
+
+def ensure_location_terms(bondsmen, index, dry_run=False):
+    """Create the location terms the bondsmen need that the site does not have yet"""
+    needed = {}
+    for bondsman in bondsmen:
+        for location in bondsman["locations"]:
+            for depth, key in enumerate(location_term_path(location)):
+                needed[key] = depth
+    missing = sorted((k for k in needed if term_slug(k) not in index["locations"]), key=lambda k: needed[k])
+    if not missing:
+        return 0
+    if dry_run:
+        print(f"Would create {len(missing)} location terms")
+        return len(missing)
+
+    created = 0
+    for key in missing:  # Parents come first, so every parent ID is known when a child is created
+        parent_key = key.rsplit("|", 1)[0] if "|" in key else None
+        if parent_key and parent_key.endswith("|"):
+            parent_key = parent_key[:-1]  # City without a county: its parent is the state
+        body = {"name": term_name(key), "slug": term_slug(key),
+                "parent": index["locations"].get(term_slug(parent_key), 0) if parent_key else 0}
+        try:
+            response = get_session().post(api_url(LOCATION_TAXONOMY), json=body, timeout=DEFAULT_TIMEOUT)
+            if response.status_code == 400 and response.json().get("code") == "term_exists":
+                index["locations"][body["slug"]] = response.json()["data"]["term_id"]
+                continue
+            response.raise_for_status()
+            index["locations"][body["slug"]] = response.json()["id"]
+            created += 1
+        except Exception as e:
+            print(f"Error creating location {body['name']}: {e}")
+    print(f"Created {created} location terms")
+    return created
+
+def plan_changes(bondsmen, index, status, directory_type=None):
+    """Listings to create or update: [(listing ID or None, payload, bondsman)]; unchanged ones are left out"""
+    changes = []
+    for bondsman in bondsmen:
+        terms = {index["locations"][term_slug(location_term_path(loc)[-1])]
+                 for loc in bondsman["locations"] if term_slug(location_term_path(loc)[-1]) in index["locations"]}
+        payload = listing_payload(bondsman, terms, status, directory_type)
+        listing_id = next((index["keys"][k] for k in bondsman["keys"] if k in index["keys"]), None)
+        digest = payload_hash(payload)
+        if listing_id and index["hashes"].get(str(listing_id)) == digest:
+            continue
+        payload["meta"].update({"_bbb_import_key": " ".join(bondsman["keys"]), "_bbb_import_hash": digest})
+        changes.append((listing_id, payload, bondsman))
+    return changes
+
+def send_batch(batch):
+    """Send up to BATCH_SIZE creates/updates in one request; returns [(listing ID or None, error)]"""
+    requests_body = [
+        {"method": "POST", "path": f"/wp/v2/{LISTING_TYPE}" + (f"/{listing_id}" if listing_id else ""), "body": payload}
+        for listing_id, payload, _ in batch
+    ]
+    try:
+        response = get_session().post(BATCH_URL, json={"validation": "normal", "requests": requests_body}, timeout=120)
+        response.raise_for_status()
+        results = response.json().get("responses", [])
+    except Exception as e:
+        return [(None, str(e))] * len(batch)
+
+    outcomes = []
+    for result in results:
+        body = result.get("body") or {}
+        if result.get("status", 500) < 300 and body.get("id"):
+            outcomes.append((body["id"], None))
+        else:
+            outcomes.append((None, body.get("message") or f"status {result.get('status')}"))
+    return outcomes + [(None, "no response")] * (len(batch) - len(outcomes))
+
+def apply_changes(changes, index, workers=DEFAULT_WORKERS):
+    """Send the changes in batches and record the results in the index; returns (created, updated, failed)"""
+    created = updated = failed = 0
+    batches = [changes[i:i + BATCH_SIZE] for i in range(0, len(changes), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch, outcomes in zip(batches, pool.map(send_batch, batches)):
+            for (listing_id, payload, bondsman), (result_id, error) in zip(batch, outcomes):
+                if error:
+                    failed += 1
+                    print(f"Error saving listing {bondsman['name']}: {error}")
+                    continue
+                created += listing_id is None
+                updated += listing_id is not None
+                for key in bondsman["keys"]:
+                    index["keys"][key] = result_id
+                index["hashes"][str(result_id)] = payload["meta"]["_bbb_import_hash"]
+    return created, updated, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and update Directorist bondsman listings from CSV or JSON")
+    parser.add_argument('files', nargs='*', help='CSV or JSON files of bondsman records')
+    parser.add_argument('--status', default='draft', choices=['draft', 'pending', 'publish'], help='Status of new and updated listings')
+    parser.add_argument('--directory-type', type=int, help='Directorist directory type term ID for the listings')
+    parser.add_argument('--rebuild-index', action='store_true', help='Rebuild listing_index.json from the site first')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Batches sent in parallel')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without sending anything')
+    args = parser.parse_args()
+
+    index = load_index()
+    if args.rebuild_index:
+        try:
+            rebuild_index(index, args.workers)
+        except Exception as e:
+            print(f"Error rebuilding the listing index: {e}")
+            return
+
+    records = []
+    for path in args.files:
+        try:
+            records.extend(normalize_record(row) for row in read_records(path))
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+            return
+    if not records:
+        if args.rebuild_index and not args.dry_run:
+            save_index(index)
+        return
+
+    bondsmen = deduplicate(records)
+    without_location = sum(1 for b in bondsmen if not b["locations"])
+    print(f"{len(records)} records, {len(bondsmen)} bondsmen after merging phone and license duplicates")
+    if without_location:
+        print(f"Warning: {without_location} bondsmen have no recognised state and get no location")
+
+    ensure_location_terms(bondsmen, index, args.dry_run)
+    changes = plan_changes(bondsmen, index, args.status, args.directory_type)
+    new = sum(1 for listing_id, _, _ in changes if listing_id is None)
+    print(f"{new} listings to create, {len(changes) - new} to update, {len(bondsmen) - len(changes)} unchanged")
+    if args.dry_run:
+        return
+
+    try:
+        created, updated, failed = apply_changes(changes, index, args.workers)
+        print(f"Created {created}, updated {updated}, failed {failed}")
+    finally:
+        save_index(index)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Shared Location Store for Worker Pools
+
+Every state, county (with its directory and county seat) and city in
+USA_DATA, with gazetteer coordinates, compiled into one read-only binary
+file that worker processes memory-map instead of each building (or
+unpickling) their own dicts from the JSON and TXT files. The operating
+system keeps one copy of the file in its page cache for all workers, so
+16 workers use about as much memory as one.
+
+Layout of USA_DATA/gazetteer/locations.bin (little-endian):
+  header     magic, version and (offset, count) of each section below
+  strings    UTF-8 string table: offsets (u32, count + 1) and the bytes
+  states     records in gazetteer.STATES order with their county range
+  counties   records grouped by state, each with its city range
+  cities     records grouped by county (county seats flagged)
+  keys       sorted 64-bit hashes of the gazetteer location keys
+             ("tx", "tx|harris", "tx|harris|baytown") → record
+
+The sections are numpy structured arrays over the mapped file (no copy).
+State, County and City objects are small __slots__ views holding a record
+number; names are decoded from the string table only when read. A
+LocationStore pickles as its file path, so passing it to a pool sends a
+few bytes and each worker attaches to the same file.
+
+Usage:
+  from location_store import attach
+  store = attach()                                    # Once per process
+  texas = store.state("TX")
+  for county in texas.counties:
+      print(county.name, county.seat, len(county.cities))
+  city = store.lookup("TX", "Harris County", "Baytown")   # City, County, State or None
+
+  python3 location_store.py --build                   # Compile from USA_DATA (and the gazetteer)
+  python3 location_store.py --state TX --county Harris --city Baytown
+  python3 location_store.py --check-workers 16        # Memory of 16 workers using the store
+"""
+
+import os
+import glob
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gazetteer import (STATES, GAZETTEER_DIR, GAZETTEER_FILE, USA_DATA_DIR, Location,
+                       location_key, county_name_key, normalize_name, ensure_gazetteer, load_gazetteer, lookup)
+
+# Constants
+LOCATION_STORE_FILE = os.path.join(GAZETTEER_DIR, "locations.bin")
+MAGIC = b"BBBLOC\x00\x01"
+VERSION = 1
+NO_STRING = 0xFFFFFFFF
+SEAT = 1          # Record flags
+APPROXIMATE = 2   # Coordinates are the county's (cities) or the middle of its cities (counties)
+
+STATE_DTYPE = np.dtype([("abbr", "<u4"), ("name", "<u4"), ("capital", "<u4"),
+                        ("county_start", "<u4"), ("county_end", "<u4"), ("lat", "<f8"), ("lng", "<f8")])
+COUNTY_DTYPE = np.dtype([("name", "<u4"), ("directory", "<u4"), ("seat", "<u4"), ("state", "<u2"),
+                         ("flags", "<u2"), ("city_start", "<u4"), ("city_end", "<u4"), ("lat", "<f8"), ("lng", "<f8")])
+CITY_DTYPE = np.dtype([("name", "<u4"), ("county", "<u4"), ("flags", "<u4"), ("lat", "<f8"), ("lng", "<f8")])
+KEY_DTYPE = np.dtype([("hash", "<u8"), ("kind", "<u4"), ("index", "<u4")])
+KINDS = ("state", "county", "city")
+
+# Sections in file order: name, numpy dtype of one entry
+SECTIONS = (("string_offsets", np.dtype("<u4")), ("string_bytes", np.dtype("u1")), ("states", STATE_DTYPE),
+            ("counties", COUNTY_DTYPE), ("cities", CITY_DTYPE), ("keys", KEY_DTYPE))
+HEADER = struct.Struct("<8sI4x" + "QQ" * len(SECTIONS))
+
+def key_hash(key):
+    """64-bit hash of a location key"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+# Compiling
+
+def _compact_key(name):
+    """County key that also ignores spaces ('De Kalb-County' and 'DeKalb County' agree)"""
+    return county_name_key(name).replace(" ", "")
+
+def usa_data_counties(st, usa_data_dir=USA_DATA_DIR):
+    """Counties of a state: [(name, directory, [seats], [cities])], from the county directories and seat files"""
+    seat_info = {}
+    for seats_file in glob.glob(os.path.join(usa_data_dir, st, "*-seats.json")) + glob.glob(os.path.join(usa_data_dir, st, "*-parishes.json")):
+        try:
+            with open(seats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: skipping {seats_file}: {e}")
+            continue
+        for name, info in (data.get("counties") or data.get("parishes") or {}).items():
+            seats = info.get("countySeat") or info.get("parishSeat") or []
+            seats = seats if isinstance(seats, list) else [seats]  # Some counties have two seats
+            # The seat files' "directory" does not always match the directory on disk, so match by name too
+            for key in (name, info.get("directory") or name):
+                seat_info.setdefault(_compact_key(key), (name, [seat for seat in seats if seat]))
+
+    counties = []
+    county_dirs = glob.glob(os.path.join(usa_data_dir, st, "counties", "*")) + glob.glob(os.path.join(usa_data_dir, st, "parishes", "*"))
+    for county_dir in sorted(d for d in county_dirs if os.path.isdir(d)):
+        directory = os.path.basename(county_dir)
+        name, seats = seat_info.get(_compact_key(directory), (directory.replace('-', ' '), []))
+        cities = []
+        for cities_file in sorted(glob.glob(os.path.join(county_dir, "*-cities.txt"))):
+            with open(cities_file, 'r', encoding='utf-8') as f:
+                cities.extend(line.strip() for line in f if line.strip())
+        # One entry per normalised name: seat files spell some seats differently (LaFayette, Lafayette)
+        unique = {}
+        for city in cities + seats:
+            unique.setdefault(normalize_name(city), city)
+        counties.append((name, directory, seats, list(unique.values())))
+    return counties
+
+class _Strings:
+    """String table under construction (each distinct string stored once)"""
+
+    def __init__(self):
+        self.index = {}
+        self.blob = bytearray()
+        self.offsets = [0]
+
+    def add(self, text):
+        if text is None:
+            return NO_STRING
+        if text not in self.index:
+            self.blob += text.encode('utf-8')
+            self.offsets.append(len(self.blob))
+            self.index[text] = len(self.index)
+        return self.index[text]
+
+def _point(points, keys):
+    """(lat, lng, approximate) for the first gazetteer key known, NaN when none is"""
+    point = next((points[key] for key in keys if key in points), None)
+    if point is None:
+        return float("nan"), float("nan"), False
+    return point[0], point[1], len(point) > 2
+
+def build_store(output_file=LOCATION_STORE_FILE, usa_data_dir=USA_DATA_DIR, gazetteer_file=GAZETTEER_FILE):
+    """Compile USA_DATA and the gazetteer into the binary store; returns (states, counties, cities)"""
+    ensure_gazetteer(gazetteer_file)
+    points = load_gazetteer(gazetteer_file)
+    strings = _Strings()
+    states, counties, cities, keys = [], [], [], []
+
+    for state_index, (st, (state_name, capital)) in enumerate(STATES.items()):
+        county_start = len(counties)
+        for name, directory, seats, city_names in usa_data_counties(st, usa_data_dir):
+            county_index = len(counties)
+            city_start = len(cities)
+            county_names = list(dict.fromkeys((name, directory)))  # The gazetteer keys cities by either
+            seat_keys = {normalize_name(seat) for seat in seats}
+            for city in city_names:
+                city_keys = list(dict.fromkeys(location_key(st, county, city) for county in county_names))
+                lat, lng, approximate = _point(points, city_keys)
+                flags = (SEAT if normalize_name(city) in seat_keys else 0) | (APPROXIMATE if approximate else 0)
+                keys.extend((key_hash(key), 2, len(cities)) for key in city_keys)
+                cities.append((strings.add(city), county_index, flags, lat, lng))
+            county_keys = list(dict.fromkeys(location_key(st, county) for county in county_names))
+            lat, lng, approximate = _point(points, county_keys)
+            keys.extend((key_hash(key), 1, county_index) for key in county_keys)
+            counties.append((strings.add(name), strings.add(directory), strings.add(seats[0] if seats else None),
+                             state_index, APPROXIMATE if approximate else 0, city_start, len(cities), lat, lng))
+        capital_point = lookup(st, path=gazetteer_file)  # Bundled capital coordinates when the index lacks them
+        lat, lng = (capital_point.lat, capital_point.lng) if capital_point else (float("nan"), float("nan"))
+        keys.append((key_hash(location_key(st)), 0, state_index))
+        states.append((strings.add(st), strings.add(state_name), strings.add(capital),
+                       county_start, len(counties), lat, lng))
+
+    arrays = [np.array(strings.offsets, dtype="<u4"), np.frombuffer(bytes(strings.blob), dtype="u1"),
+              np.array(states, dtype=STATE_DTYPE), np.array(counties, dtype=COUNTY_DTYPE),
+              np.array(cities, dtype=CITY_DTYPE), np.sort(np.array(keys, dtype=KEY_DTYPE), order="hash")]
+
+    # Sections start at 8-byte boundaries after the header
+    layout, position = [], HEADER.size
+    for array in arrays:
+        position = (position + 7) & ~7
+        layout.append((position, len(array)))
+        position += array.nbytes
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *[value for section in layout for value in section]))
+        for (offset, _), array in zip(layout, arrays):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_file, output_file)
+    if not points:
+        print("Note: only states have coordinates (their capitals); build the gazetteer first for county and city lat/lng")
+    print(f"Location store saved to {output_file}: {len(states)} states, {len(counties)} counties, "
+          f"{len(cities)} cities, {len(strings.index)} strings, {os.path.getsize(output_file) // 1024} KB")
+    return len(states), len(counties), len(cities)
+
+# Access
+
+class State:
+    """A state in the store"""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store, self._index = store, index
+
+    @property
+    def abbr(self):
+        return self._store.string(self._store.states[self._index]["abbr"])
+
+    @property
+    def name(self):
+        return self._store.string(self._store.states[self._index]["name"])
+
+    @property
+    def capital(self):
+        return self._store.string(self._store.states[self._index]["capital"])
+
+    @property
+    def location(self):
+        return self._store.location(self._store.states[self._index])
+
+    @property
+    def counties(self):
+        record = self._store.states[self._index]
+        return [County(self._store, i) for i in range(record["county_start"], record["county_end"])]
+
+    def __repr__(self):
+        return f"State({self.abbr})"
+
+class County:
+    """A county (or parish, borough) in the store"""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store, self._index = store, index
+
+    @property
+    def name(self):
+        return self._store.string(self._store.counties[self._index]["name"])
+
+    @property
+    def directory(self):
+        return self._store.string(self._store.counties[self._index]["directory"])
+
+    @property
+    def seat(self):
+        return self._store.string(self._store.counties[self._index]["seat"])
+
+    @property
+    def state(self):
+        return State(self._store, int(self._store.counties[self._index]["state"]))
+
+    @property
+    def location(self):
+        return self._store.location(self._store.counties[self._index])
+
+    @property
+    def cities(self):
+        record = self._store.counties[self._index]
+        return [City(self._store, i) for i in range(record["city_start"], record["city_end"])]
+
+    def __repr__(self):
+        return f"County({self.name}, {self.state.abbr})"
+
+class City:
+    """A city (or town, community) in the store"""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store, self._index = store, index
+
+    @property
+    def name(self):
+        return self._store.string(self._store.cities[self._index]["name"])
+
+    @property
+    def county(self):
+        return County(self._store, int(self._store.cities[self._index]["county"]))
+
+    @property
+    def state(self):
+        return self.county.state
+
+    @property
+    def is_seat(self):
+        return bool(self._store.cities[self._index]["flags"] & SEAT)
+
+    @property
+    def location(self):
+        return self._store.location(self._store.cities[self._index])
+
+    def __repr__(self):
+        return f"City({self.name}, {self.county.name}, {self.state.abbr})"
+
+RECORD_TYPES = (State, County, City)
+
+class LocationStore:
+    """Read-only view of the compiled location file through a memory map"""
+
+    def __init__(self, path=LOCATION_STORE_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *layout = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} location store; rebuild it with --build")
+        for (name, dtype), offset, count in zip(SECTIONS, layout[0::2], layout[1::2]):
+            setattr(self, name, np.frombuffer(self._map, dtype=dtype, count=count, offset=offset))
+        self._strings_at = layout[2]  # Offset of the string bytes
+
+    def __reduce__(self):
+        # Pickles as the path: workers attach to the same file instead of receiving a copy
+        return attach, (self.path,)
+
+    def string(self, index):
+        """Decode one string of the table (None for a missing value)"""
+        if index == NO_STRING:
+            return None
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return self._map[self._strings_at + start:self._strings_at + end].decode('utf-8')
+
+    @staticmethod
+    def location(record):
+        """Location of a record, or None when it has no coordinates"""
+        lat, lng = float(record["lat"]), float(record["lng"])
+        if lat != lat:  # NaN
+            return None
+        approximate = "flags" in record.dtype.names and bool(record["flags"] & APPROXIMATE)
+        return Location(round(lat, 6), round(lng, 6), approximate)
+
+    def states_list(self):
+        """Every state"""
+        return [State(self, i) for i in range(len(self.states))]
+
+    def state(self, state):
+        """State by name or abbreviation, or None"""
+        result = self.lookup(state)
+        return result if isinstance(result, State) else None
+
+    def lookup(self, state, county=None, city=None):
+        """State, County or City for a location, as gazetteer.lookup keys it; None if unknown"""
+        key = location_key(state, county, city)
+        if key is None:
+            return None
+        target = np.uint64(key_hash(key))
+        position = int(np.searchsorted(self.keys["hash"], target))
+        while position < len(self.keys) and self.keys["hash"][position] == target:
+            entry = self.keys[position]
+            result = RECORD_TYPES[entry["kind"]](self, int(entry["index"]))
+            if key in self._keys_of(result):  # Rules out a hash collision
+                return result
+            position += 1
+        return None
+
+    @staticmethod
+    def _keys_of(record):
+        if isinstance(record, State):
+            return {location_key(record.abbr)}
+        county = record if isinstance(record, County) else record.county
+        city = None if isinstance(record, County) else record.name
+        return {location_key(county.state.abbr, name, city) for name in (county.name, county.directory)}
+
+    def close(self):
+        """Release the memory map (views taken from it must not be used afterwards)"""
+        for name, _ in SECTIONS:
+            setattr(self, name, None)
+        self._map.close()
+
+@lru_cache(maxsize=None)
+def attach(path=LOCATION_STORE_FILE):
+    """The process's shared LocationStore for a file (mapped on first use)"""
+    return LocationStore(path)
+
+# Memory check
+
+def memory_kb():
+    """(private, shared file-backed) resident memory of this process in KB (Linux only)"""
+    values = {}
+    with open("/proc/self/status", 'r') as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                values[name] = int(value.split()[0])
+    return values.get("RssAnon", 0), values.get("RssFile", 0)
+
+def _touch_everything(store):
+    """Worker task: read every record and name; returns (pid, cities read, private KB, before → after)"""
+    before = memory_kb()[0]
+    names = 0
+    for state in store.states_list():
+        for county in state.counties:
+            names += len(county.cities)
+            for city in county.cities:
+                city.name
+    return os.getpid(), names, before, memory_kb()[0]
+
+def check_workers(workers, path=LOCATION_STORE_FILE):
+    """Have workers read the whole store and print how much private memory each needed"""
+    store = attach(path)
+    print(f"Store: {os.path.getsize(path) // 1024} KB on disk, shared by every worker through the page cache")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_touch_everything, [store] * workers))
+    growth = [after - before for _, _, before, after in results]
+    print(f"{workers} workers read {results[0][1]} cities each; private memory growth per worker: "
+          f"median {sorted(growth)[len(growth) // 2]} KB, max {max(growth)} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile or query the memory-mapped location store")
+    parser.add_argument('--build', action='store_true', help='Compile the store from USA_DATA and the gazetteer')
+    parser.add_argument('--store', default=LOCATION_STORE_FILE, help='Location store file')
+    parser.add_argument('--state', help='State name or abbreviation to look up')
+    parser.add_argument('--county', help='County to look up')
+    parser.add_argument('--city', help='City to look up')
+    parser.add_argument('--check-workers', type=int, metavar='N', help='Measure N workers reading the whole store')
+    args = parser.parse_args()
+
+    if args.build:
+        build_store(args.store)
+    if not os.path.exists(args.store):
+        if args.state or args.check_workers:
+            print(f"Location store {args.store} not found; build it with --build")
+        elif not args.build:
+            parser.print_help()
+        return
+    if args.state:
+        result = attach(args.store).lookup(args.state, args.county, args.city)
+        if result is None:
+            print("Not found")
+        else:
+            location = result.location
+            print(f"{result!r}: {location.lat:.6f}, {location.lng:.6f}{' (approximate)' if location.approximate else ''}"
+                  if location else f"{result!r}: no coordinates")
+            if isinstance(result, County):
+                print(f"  Seat: {result.seat}, {len(result.cities)} cities, directory {result.directory}")
+    if args.check_workers:
+        check_workers(args.check_workers, args.store)
+
+if __name__ == "__main__":
+    main()
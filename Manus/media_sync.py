@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Media Sync for Bail Bonds Buddy Pages
+
+Makes sure every image referenced by the generated pages (the brand logo,
+state hero images, county images) exists once in the WordPress media
+library, then rewrites the pages' `images` entries and `src` URLs to the
+library copy.
+
+Local images are identified by a SHA-256 of their bytes. Uploads embed the
+first HASH_LENGTH hex digits of that hash in the filename, so one sweep of
+/wp/v2/media is enough to rebuild the local hash → attachment index
+(media_index.json). Only images whose hash is not in the index are
+uploaded, concurrently over the shared session in wp_api.py.
+
+Local files are found by the file name in the page URL, looking in
+images/ and the repository root (WordPress renames BailBondsBuddy.com.jpg
+to BailBondsBuddy.com_.jpg; both forms are matched).
+
+Usage:
+  python3 media_sync.py --rebuild-index        # Sweep /wp/v2/media into media_index.json
+  python3 media_sync.py --rebuild-index --adopt # Also hash media uploaded before this script
+  python3 media_sync.py                        # Upload missing images and rewrite generated pages
+  python3 media_sync.py --dry-run              # Show what would be uploaded or rewritten
+  python3 media_sync.py --images a.jpg b.png   # Upload specific files only
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from wp_api import get_session, api_url, iter_collection
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+OUTPUT_DIR = os.path.join(BASE_DIR, "generated_pages")
+MEDIA_INDEX_FILE = os.path.join(BASE_DIR, "media_index.json")
+IMAGE_DIRS = [os.path.join(BASE_DIR, "images"), ROOT_DIR]
+HASH_LENGTH = 16  # Hex digits of the SHA-256 kept in uploaded file names
+DEFAULT_WORKERS = 4
+
+UPLOAD_URL_PATTERN = re.compile(r'https?://[^"\'\s\]]+/wp-content/uploads/[^"\'\s\]]+\.(?:jpe?g|png|webp|gif|svg)', re.I)
+# name-<hash>.ext, allowing the suffixes WordPress adds (-1, -scaled, -300x200)
+HASH_IN_NAME_PATTERN = re.compile(r'-([0-9a-f]{%d})(?:-\d+)?(?:-scaled)?(?:-\d+x\d+)?\.[A-Za-z0-9]+$' % HASH_LENGTH)
+
+def file_sha256(path):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_index(index_file=MEDIA_INDEX_FILE):
+    """Load the media index (hash → attachment, plus the local hash cache)"""
+    index = {"media": {}, "adopted": {}, "files": {}}
+    try:
+        with open(index_file, 'r') as f:
+            index.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError as e:
+        print(f"Warning: ignoring unreadable media index {index_file}: {e}")
+    return index
+
+def save_index(index, index_file=MEDIA_INDEX_FILE):
+    """Write the media index atomically"""
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, index_file)
+
+def local_hash(index, path):
+    """Short hash of a local image, reusing the cached value while size and mtime are unchanged"""
+    key = os.path.relpath(os.path.abspath(path), ROOT_DIR)
+    stat = os.stat(path)
+    cached = index["files"].get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+        return cached["hash"]
+    short_hash = file_sha256(path)[:HASH_LENGTH]
+    index["files"][key] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": short_hash}
+    return short_hash
+
+def hash_from_url(url):
+    """Hash embedded in an uploaded file name, or None for media not uploaded by this script"""
+    match = HASH_IN_NAME_PATTERN.search(url)
+    return match.group(1) if match else None
+
+def download_hash(url):
+    """Hash the bytes of an existing media file"""
+    response = get_session().get(url, timeout=60)
+    response.raise_for_status()
+    return hashlib.sha256(response.content).hexdigest()[:HASH_LENGTH]
+
+def rebuild_index(index, adopt=False, workers=DEFAULT_WORKERS):
+    """Rebuild hash → attachment entries from one sweep of /wp/v2/media"""
+    media = {}
+    to_adopt = []
+    for item in iter_collection("media", {"media_type": "image", "_fields": "id,source_url"}, workers=workers):
+        entry = {"id": item["id"], "url": item["source_url"]}
+        short_hash = hash_from_url(item["source_url"]) or index["adopted"].get(str(item["id"]))
+        if short_hash:
+            media[short_hash] = entry
+        elif adopt:
+            to_adopt.append(entry)
+
+    # Media uploaded by hand has no hash in its name: download it once and remember the hash by ID
+    if to_adopt:
+        print(f"Hashing {len(to_adopt)} existing media files...")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for entry, short_hash in zip(to_adopt, pool.map(lambda e: download_hash(e["url"]), to_adopt)):
+                index["adopted"][str(entry["id"])] = short_hash
+                media.setdefault(short_hash, entry)
+
+    index["media"] = media
+    print(f"Media index rebuilt: {len(media)} hashed images")
+    return index
+
+def upload_image(path, short_hash):
+    """Upload one image with its hash in the file name; returns the attachment entry"""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    filename = f"{stem}-{short_hash}{ext.lower()}"
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    with open(path, 'rb') as f:
+        data = f.read()
+    response = get_session().post(
+        api_url("media"),
+        data=data,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Content-Type": content_type},
+        timeout=120
+    )
+    response.raise_for_status()
+    media = response.json()
+    return {"id": media["id"], "url": media["source_url"]}
+
+def sync_files(paths, index, workers=DEFAULT_WORKERS, dry_run=False):
+    """Upload the images the library does not have yet; returns {path: attachment entry}"""
+    hashes = {path: local_hash(index, path) for path in paths}
+    missing = {}
+    for path, short_hash in hashes.items():
+        if short_hash not in index["media"]:
+            missing.setdefault(short_hash, path)
+
+    print(f"{len(hashes)} local images, {len(set(hashes.values()))} unique, {len(missing)} to upload")
+    if missing and dry_run:
+        for path in missing.values():
+            print(f"  Would upload {path}")
+    elif missing:
+        def upload(item):
+            short_hash, path = item
+            try:
+                return short_hash, upload_image(path, short_hash)
+            except Exception as e:
+                print(f"Error uploading {path}: {e}")
+                return short_hash, None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for short_hash, entry in pool.map(upload, missing.items()):
+                if entry:
+                    index["media"][short_hash] = entry
+                    print(f"  Uploaded {os.path.basename(missing[short_hash])} as media {entry['id']}")
+
+    return {path: index["media"][short_hash] for path, short_hash in hashes.items() if short_hash in index["media"]}
+
+def find_local_image(url, image_dirs=IMAGE_DIRS):
+    """Find the local file for an image URL by file name"""
+    name = os.path.basename(url.split("?")[0])
+    stem, ext = os.path.splitext(name)
+    candidates = [name]
+    short_hash = hash_from_url(name)
+    if short_hash:
+        stem = stem[:stem.rindex(f"-{short_hash}")]
+        candidates.append(stem + ext)
+    if stem.endswith("_"):
+        candidates.append(stem[:-1] + ext)  # WordPress turns extra dots in names into "_"
+    for directory in image_dirs:
+        for candidate in candidates:
+            path = os.path.join(directory, candidate)
+            if os.path.isfile(path):
+                return path
+    return None
+
+def page_image_urls(page_json):
+    """Image URLs a Divi page references, from its `images` map and its content"""
+    urls = list(page_json.get("images") or {})
+    for content in (page_json.get("data") or {}).values():
+        if isinstance(content, str):
+            urls.extend(UPLOAD_URL_PATTERN.findall(content))
+    return list(dict.fromkeys(urls))
+
+def rewrite_page(page_json, replacements):
+    """Point a page's image references at library attachments; returns True if anything changed"""
+    changed = False
+    data = page_json.get("data") or {}
+    for key, content in data.items():
+        if not isinstance(content, str):
+            continue
+        for old_url, entry in replacements.items():
+            if old_url != entry["url"] and old_url in content:
+                content = content.replace(old_url, entry["url"])
+                changed = True
+        data[key] = content
+
+    images = {}
+    for url, image in (page_json.get("images") or {}).items():
+        entry = replacements.get(url)
+        if entry and (url != entry["url"] or image.get("id") != entry["id"]):
+            image = dict(image, url=entry["url"], id=entry["id"])
+            url = entry["url"]
+            changed = True
+        images[url] = image
+    if "images" in page_json:
+        page_json["images"] = images
+    return changed
+
+def sync_pages(page_files, index, workers=DEFAULT_WORKERS, dry_run=False):
+    """Upload the images referenced by generated pages and rewrite the pages to use them"""
+    pages = {}
+    local_files = {}
+    for page_file in page_files:
+        with open(page_file, 'r') as f:
+            pages[page_file] = json.load(f)
+        for url in page_image_urls(pages[page_file]):
+            path = find_local_image(url)
+            if path:
+                local_files[url] = path
+            else:
+                print(f"Warning: no local file for {url} (referenced by {os.path.basename(page_file)})")
+
+    uploaded = sync_files(sorted(set(local_files.values())), index, workers, dry_run)
+    replacements = {url: uploaded[path] for url, path in local_files.items() if path in uploaded}
+
+    rewritten = 0
+    for page_file, page_json in pages.items():
+        if rewrite_page(page_json, replacements):
+            rewritten += 1
+            if dry_run:
+                print(f"  Would rewrite image references in {os.path.basename(page_file)}")
+                continue
+            with open(page_file, 'w') as f:
+                json.dump(page_json, f, indent=2)
+            print(f"  Rewrote image references in {os.path.basename(page_file)}")
+    return rewritten
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload missing page images once and point pages at the media library")
+    parser.add_argument('--rebuild-index', action='store_true', help='Rebuild media_index.json from /wp/v2/media first')
+    parser.add_argument('--adopt', action='store_true', help='With --rebuild-index, hash media that has no hash in its name')
+    parser.add_argument('--images', nargs='+', help='Upload these image files instead of syncing generated pages')
+    parser.add_argument('--dir', default=OUTPUT_DIR, help='Directory of generated page JSON files')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent uploads (default: 4)')
+    parser.add_argument('--dry-run', action='store_true', help='Report uploads and rewrites without making them')
+    args = parser.parse_args()
+
+    index = load_index()
+    if args.rebuild_index:
+        rebuild_index(index, args.adopt, args.workers)
+
+    if args.images:
+        for path, entry in sync_files(args.images, index, args.workers, args.dry_run).items():
+            print(f"{path}: media {entry['id']} {entry['url']}")
+    else:
+        page_files = sorted(os.path.join(args.dir, f) for f in os.listdir(args.dir) if f.endswith('.json'))
+        rewritten = sync_pages(page_files, index, args.workers, args.dry_run)
+        print(f"{rewritten} of {len(page_files)} pages {'would be ' if args.dry_run else ''}updated")
+
+    if not args.dry_run:
+        save_index(index)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Nearby Locations Index for "Near Me" Cross-Linking
+
+A KD-tree over the gazetteer coordinates of every USA_DATA city and county
+seat. It answers "the k nearest cities (or county seats, where the county
+jails are) within N miles" across county and state lines, so a page can
+link to its neighbours and not only to its own county's city list.
+
+Points are stored as 3D unit vectors. Straight-line (chord) distance then
+orders points exactly like great-circle distance, and the tree needs no
+special cases at the antimeridian (the Aleutians). Queries are answered in
+batches: the queries that fall in one leaf are compared, as one numpy
+matrix, only with the leaves that can still hold one of their k nearest
+points. Neighbours for all ~34,000 locations take seconds, not the
+billion distance computations of a per-page loop.
+
+--build writes the neighbours of every location to
+USA_DATA/gazetteer/nearby.json.gz (needs the gazetteer, which --build
+builds first when it is missing, see gazetteer.py).
+
+Usage:
+  from nearby import nearby_for
+  links = nearby_for("TX", "Harris County", "Baytown")   # {"cities": [...], "seats": [...]}
+
+  python3 nearby.py --build                            # Neighbours for every location
+  python3 nearby.py --state TX --county Harris --city Baytown -k 8 --miles 30
+  python3 nearby.py --state TX --county Harris --city Baytown --seats
+"""
+
+import os
+import gzip
+import json
+import argparse
+from functools import lru_cache
+import numpy as np
+from gazetteer import (GAZETTEER_DIR, GAZETTEER_FILE, ensure_gazetteer, location_key, lookup, usa_data_locations,
+                       usa_data_county_seats)
+
+# Constants
+NEARBY_FILE = os.path.join(GAZETTEER_DIR, "nearby.json.gz")
+EARTH_RADIUS_MILES = 3958.8
+LEAF_SIZE = 32
+DEFAULT_K = 10         # Nearby cities kept per location
+DEFAULT_SEATS_K = 3    # Nearby county seats (jails) kept per location
+DEFAULT_MILES = 50
+
+def to_unit_vectors(lats, lngs):
+    """Points on the unit sphere for arrays of latitudes and longitudes"""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lng = np.radians(np.asarray(lngs, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+def miles_to_chord(miles):
+    """Straight-line distance through the unit sphere for a great-circle distance"""
+    return 2 * np.sin(np.minimum(np.asarray(miles, dtype=float) / EARTH_RADIUS_MILES, np.pi) / 2)
+
+def chord_to_miles(chord):
+    """Great-circle distance for a straight-line distance through the unit sphere"""
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+class KDTree:
+    """Static KD-tree over 3D points with exact batched k-nearest queries"""
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = np.asarray(points, dtype=float)
+        self.leaf_size = leaf_size
+        self.leaves = []  # Point indices of each leaf
+        self.nodes = []   # (axis, split, left, right); a child < 0 is leaf ~child
+        self.root = self._build(np.arange(len(self.points)))
+        self.lo = np.array([self.points[leaf].min(axis=0) for leaf in self.leaves])
+        self.hi = np.array([self.points[leaf].max(axis=0) for leaf in self.leaves])
+        self.sizes = np.array([len(leaf) for leaf in self.leaves])
+
+    def _build(self, indices):
+        if len(indices) <= self.leaf_size:
+            self.leaves.append(indices)
+            return ~(len(self.leaves) - 1)
+        points = self.points[indices]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        middle = len(indices) // 2
+        order = np.argpartition(points[:, axis], middle)
+        split = points[order[middle], axis]
+        node = len(self.nodes)
+        self.nodes.append(None)
+        self.nodes[node] = (axis, split, self._build(indices[order[:middle]]), self._build(indices[order[middle:]]))
+        return node
+
+    def _leaf_groups(self, queries):
+        """Split query indices by the leaf each query falls in"""
+        stack = [(self.root, np.arange(len(queries)))]
+        while stack:
+            node, indices = stack.pop()
+            if not len(indices):
+                continue
+            if node < 0:
+                yield indices
+                continue
+            axis, split, left, right = self.nodes[node]
+            below = queries[indices, axis] < split
+            stack.append((left, indices[below]))
+            stack.append((right, indices[~below]))
+
+    def _chords(self, queries, candidates):
+        return np.sqrt(((queries[:, None, :] - self.points[candidates][None, :, :]) ** 2).sum(axis=2))
+
+    def query(self, queries, k, max_chord=np.inf):
+        """k nearest points to each query as (indices, chord distances); missing neighbours are -1 / inf"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=float))
+        k = min(k, len(self.points))
+        indices = np.full((len(queries), k), -1)
+        distances = np.full((len(queries), k), np.inf)
+        if k == 0:
+            return indices, distances
+
+        for group in self._leaf_groups(queries):
+            group_points = queries[group]
+            group_lo, group_hi = group_points.min(axis=0), group_points.max(axis=0)
+
+            # Closest any query in the group can be to each leaf
+            gap = np.maximum(0, np.maximum(self.lo - group_hi, group_lo - self.hi))
+            near = np.sqrt((gap ** 2).sum(axis=1))
+
+            # The k-th distance within the nearest leaves holding k points bounds every query's true k-th distance
+            by_near = np.argsort(near)
+            first = by_near[:np.searchsorted(np.cumsum(self.sizes[by_near]), k) + 1]
+            first_chords = self._chords(group_points, np.concatenate([self.leaves[leaf] for leaf in first]))
+            bound = min(np.partition(first_chords, k - 1, axis=1)[:, k - 1].max(), max_chord)
+
+            candidate_leaves = np.nonzero(near <= bound)[0]
+            if not len(candidate_leaves):
+                continue
+            candidates = np.concatenate([self.leaves[leaf] for leaf in candidate_leaves])
+            chords = self._chords(group_points, candidates)
+            count = min(k, len(candidates))
+            nearest = np.argpartition(chords, count - 1, axis=1)[:, :count]
+            nearest_chords = np.take_along_axis(chords, nearest, axis=1)
+            order = np.argsort(nearest_chords, axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            nearest_chords = np.take_along_axis(nearest_chords, order, axis=1)
+
+            outside = nearest_chords > max_chord
+            found = candidates[nearest]
+            found[outside] = -1
+            nearest_chords[outside] = np.inf
+            indices[group, :count] = found
+            distances[group, :count] = nearest_chords
+        return indices, distances
+
+def county_display_name(county):
+    """County name from a USA_DATA directory name ('Harris-County' → 'Harris County')"""
+    return county.replace("-", " ")
+
+def load_locations(gazetteer_file=GAZETTEER_FILE):
+    """Every USA_DATA city and county seat the gazetteer can place, in a stable order"""
+    seats = {location_key(st, county, seat) for st, county, seat in usa_data_county_seats()}
+    locations = {}
+    for st, county, city in sorted(usa_data_locations()):
+        key = location_key(st, county, city)
+        if key in locations:
+            continue
+        location = lookup(st, county, city, gazetteer_file)
+        if location is None:
+            continue
+        locations[key] = {"key": key, "state": st, "county": county_display_name(county), "city": city,
+                          "lat": location.lat, "lng": location.lng, "seat": key in seats,
+                          "approximate": location.approximate}
+    return list(locations.values())
+
+class NearbyIndex:
+    """Nearest cities and county seats for any point or for every indexed location"""
+
+    def __init__(self, locations):
+        self.locations = locations
+        self.vectors = to_unit_vectors([l["lat"] for l in locations], [l["lng"] for l in locations])
+        self.tree = KDTree(self.vectors)
+        self.seat_ids = np.array([i for i, l in enumerate(locations) if l["seat"]], dtype=int)
+        self.seat_tree = KDTree(self.vectors[self.seat_ids])
+
+    def _query(self, vectors, k, miles, seats_only):
+        tree = self.seat_tree if seats_only else self.tree
+        indices, chords = tree.query(vectors, k, miles_to_chord(miles) if miles else np.inf)
+        if seats_only:
+            indices = np.where(indices >= 0, self.seat_ids[np.maximum(indices, 0)], -1)
+        return indices, chord_to_miles(np.where(np.isinf(chords), 0, chords))
+
+    def nearest(self, lat, lng, k=DEFAULT_K, miles=DEFAULT_MILES, seats_only=False):
+        """[(location, miles)] nearest to a point, closest first"""
+        indices, distances = self._query(to_unit_vectors([lat], [lng]), k, miles, seats_only)
+        return [(self.locations[i], float(d)) for i, d in zip(indices[0], distances[0]) if i >= 0]
+
+    def neighbours(self, k=DEFAULT_K, miles=DEFAULT_MILES, seats_only=False):
+        """For every location, [(index, miles)] of its k nearest other locations, in one batch"""
+        indices, distances = self._query(self.vectors, k + 1, miles, seats_only)
+        result = []
+        for own, (row, row_miles) in enumerate(zip(indices, distances)):
+            pairs = [(int(i), round(float(d), 1)) for i, d in zip(row, row_miles) if i >= 0 and i != own]
+            result.append(pairs[:k])
+        return result
+
+def build_nearby(k=DEFAULT_K, seats_k=DEFAULT_SEATS_K, miles=DEFAULT_MILES, output_file=NEARBY_FILE):
+    """Write the nearby cities and county seats of every location; returns the location count"""
+    ensure_gazetteer()
+    locations = load_locations()
+    if not locations:
+        print("Error: no locations could be placed; build the gazetteer first")
+        return 0
+    index = NearbyIndex(locations)
+    cities = index.neighbours(k, miles)
+    seats = index.neighbours(seats_k, miles, seats_only=True)
+
+    tmp_file = output_file + ".tmp"
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump({
+            "k": k, "seats_k": seats_k, "miles": miles,
+            "locations": [[l["key"], l["state"], l["county"], l["city"], int(l["seat"])] for l in locations],
+            "cities": cities,
+            "seats": seats
+        }, f, separators=(",", ":"))
+    os.replace(tmp_file, output_file)
+    load_nearby.cache_clear()
+    print(f"Nearby locations for {len(locations)} cities ({len(index.seat_ids)} county seats) saved to {output_file}")
+    return len(locations)
+
+@lru_cache(maxsize=None)
+def load_nearby(path=NEARBY_FILE):
+    """Load (once) the built nearby index as key → {"cities": [...], "seats": [...]}"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: {path} not found; build it with python3 Manus/nearby.py --build")
+        return {}
+
+    def expand(pairs):
+        return [{"state": data["locations"][i][1], "county": data["locations"][i][2],
+                 "city": data["locations"][i][3], "miles": miles} for i, miles in pairs]
+
+    return {location[0]: {"cities": expand(cities), "seats": expand(seats)}
+            for location, cities, seats in zip(data["locations"], data["cities"], data["seats"])}
+
+def nearby_for(state, county, city, path=NEARBY_FILE):
+    """Nearby cities and county seats of a location from the built index, or None"""
+    return load_nearby(path).get(location_key(state, county, city))
+
+def main():
+    parser = argparse.ArgumentParser(description="Find nearby cities and county seats across county and state lines")
+    parser.add_argument('--build', action='store_true', help='Build the nearby index for every location')
+    parser.add_argument('--state', help='State of the location to look up')
+    parser.add_argument('--county', help='County of the location to look up')
+    parser.add_argument('--city', help='City to look up')
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help='Number of neighbours (default: 10)')
+    parser.add_argument('--miles', type=float, default=DEFAULT_MILES, help='Search radius in miles (default: 50)')
+    parser.add_argument('--seats', action='store_true', help='Only return county seats')
+    args = parser.parse_args()
+
+    if args.build:
+        build_nearby(args.k, miles=args.miles)
+        return
+    if not (args.state and args.city):
+        parser.print_help()
+        return
+
+    location = lookup(args.state, args.county, args.city)
+    if location is None:
+        print("Location not found in the gazetteer")
+        return
+    index = NearbyIndex(load_locations())
+    own_key = location_key(args.state, args.county, args.city)
+    # Ask for one extra and drop the location itself
+    found = [(other, miles) for other, miles in index.nearest(location.lat, location.lng, args.k + 1, args.miles, args.seats)
+             if other["key"] != own_key]
+    for other, miles in found[:args.k]:
+        print(f"{miles:6.1f} mi  {other['city']}, {other['county']}, {other['state'].upper()}{'  (county seat)' if other['seat'] else ''}")
+
+if __name__ == "__main__":
+    main()
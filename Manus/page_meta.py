@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Data-Only Page Publishing with a Shared Divi Layout
+
+Instead of uploading the full Divi shortcode of the template for every
+page (about 9 KB of markup per page, stored, parsed and rendered
+separately each time), a data-only page carries only its template
+variables as post meta (bbb_state_name, bbb_intro_paragraph_with_state,
+...). One shared layout renders every such page:
+
+- build_layout() turns the template into that layout. A placeholder that
+  is a whole module setting (heading titles) becomes Divi dynamic content
+  reading the page's custom field; a placeholder inside module HTML
+  becomes a [bbb_field name="..."] shortcode.
+- Import the layout (templates/State-Template-Data-Only-Layout.json) in
+  Divi → Theme Builder as the custom body of a template assigned to the
+  data-only pages.
+- The must-use plugin wp-content/mu-plugins/bbb-page-fields.php stores
+  the uploaded "bbb_fields" object as post meta and provides the
+  [bbb_field] shortcode.
+
+Usage:
+  from page_meta import data_only_page
+
+  page_data = data_only_page(variables, title, slug)   # POST to /wp/v2/pages
+
+  python3 page_meta.py --layout                        # Write the shared layout file
+  python3 page_meta.py --state Texas                   # Compare payload sizes for a state
+  python3 cline-state-page-generator.py --state Texas --upload --data-only
+"""
+
+import os
+import re
+import json
+import base64
+import argparse
+
+from divi_shortcodes import parse, serialize, Module
+from page_model import PageModel
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILE = os.path.join(BASE_DIR, "templates", "State-Template-Page-Only-Variables.json")
+LAYOUT_FILE = os.path.join(BASE_DIR, "templates", "State-Template-Data-Only-Layout.json")
+TEMPLATE_CONTENT_ID = "1120"
+META_PREFIX = "bbb_"
+
+# Page settings for data-only pages; the body comes from the Theme Builder layout
+DATA_ONLY_PAGE_META = {
+    "_et_pb_use_builder": "off",
+    "_et_pb_page_layout": "et_no_sidebar",
+    "_et_pb_side_nav": "off",
+}
+
+PLACEHOLDER_PATTERN = re.compile(r'\[([A-Z][A-Z0-9_]+)\]')
+
+def meta_key(variable):
+    """Post meta key for a template variable (STATE_NAME → bbb_state_name)"""
+    return META_PREFIX + variable.lower()
+
+def dynamic_content(variable):
+    """Divi dynamic content value that reads a variable's custom field from the current page"""
+    value = {"dynamic": True, "content": f"custom_meta_{meta_key(variable)}",
+             "settings": {"before": "", "after": "", "enable_html": "off"}}
+    encoded = base64.b64encode(json.dumps(value, separators=(',', ':')).encode('utf-8')).decode('ascii')
+    return f"@ET-DC@{encoded}@"
+
+def field_shortcode(variable):
+    """Shortcode that prints a variable's custom field inside module HTML"""
+    return f'[bbb_field name="{variable.lower()}"]'
+
+def _layout_nodes(nodes, variables):
+    layout = []
+    for node in nodes:
+        if isinstance(node, str):
+            def replace(match):
+                variables.add(match.group(1))
+                return field_shortcode(match.group(1))
+            layout.append(PLACEHOLDER_PATTERN.sub(replace, node))
+            continue
+        attributes = []
+        for name, value in node.attributes:
+            whole = PLACEHOLDER_PATTERN.fullmatch(value)
+            if whole:
+                variables.add(whole.group(1))
+                value = dynamic_content(whole.group(1))
+            elif PLACEHOLDER_PATTERN.search(value):
+                # Dynamic content replaces a whole setting; a shortcode inside a setting is not run
+                print(f"Warning: {node.tag} {name} mixes text and variables; set it by hand in the layout")
+            attributes.append((name, value))
+        module = Module(node.tag, attributes, node.closed)
+        module.children = _layout_nodes(node.children, variables)
+        layout.append(module)
+    return layout
+
+def build_layout(template_content):
+    """Shared layout content for a template, and the variables it reads"""
+    variables = set()
+    layout = serialize(_layout_nodes(parse(template_content), variables))
+    return layout, sorted(variables)
+
+def data_only_page(variables, title, slug, status="draft"):
+    """REST body for a data-only page: its variables as fields, no content"""
+    return {
+        "title": title,
+        "slug": slug,
+        "content": "",
+        "status": status,
+        "bbb_fields": {meta_key(name): str(value) for name, value in variables.items()},
+        "meta": dict(DATA_ONLY_PAGE_META),
+    }
+
+def write_layout(template_file=TEMPLATE_FILE, layout_file=LAYOUT_FILE):
+    """Write the shared layout as a Divi library export next to the template; returns the variables it reads"""
+    with open(template_file, 'r', encoding='utf-8') as f:
+        template_json = json.load(f)
+    layout_json = PageModel(template_json)
+    layout, variables = build_layout(layout_json["data"][TEMPLATE_CONTENT_ID])
+    layout_json["data"][TEMPLATE_CONTENT_ID] = layout
+
+    tmp_file = layout_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(layout_json, f, indent=2)
+    os.replace(tmp_file, layout_file)
+    return variables
+
+def compare_payloads(state_name, template_file=TEMPLATE_FILE):
+    """Print the upload size of a state page with full content and data-only"""
+    # Imported here so writing the layout does not load the generator and its data sources
+    import importlib
+    generator = importlib.import_module("cline-state-page-generator")
+
+    with open(template_file, 'r', encoding='utf-8') as f:
+        template_content = json.load(f)["data"][TEMPLATE_CONTENT_ID]
+    # Same data the upload uses (upload_to_wordpress → get_accurate_state_data)
+    state_data = generator.get_accurate_state_data(state_name)
+    if not state_data:
+        return
+    try:
+        variables = generator.generate_template_variables(state_data)
+    except KeyError as e:
+        print(f"Error: state data for {state_name} has no {e} value; "
+              f"fill in {os.path.relpath(generator.state_data_file(state_name, generator.STATE_DATA_DIR))} first")
+        return
+    title, slug = state_name, generator.state_page_slug(state_name)
+    full = generator.replace_template_variables(template_content, variables)
+    full_size = len(json.dumps({"title": title, "slug": slug, "content": full}).encode('utf-8'))
+    data_size = len(json.dumps(data_only_page(variables, title, slug)).encode('utf-8'))
+    print(f"{state_name}: full content {full_size:,} bytes, data-only {data_size:,} bytes "
+          f"({full_size / max(data_size, 1):.1f}x smaller)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the shared layout for data-only pages and compare payload sizes")
+    parser.add_argument('--layout', action='store_true', help=f'Write the shared layout to {os.path.relpath(LAYOUT_FILE, BASE_DIR)}')
+    parser.add_argument('--template', default=TEMPLATE_FILE, help='Template JSON to build the layout from')
+    parser.add_argument('--state', help='Compare the full and data-only upload size for a state')
+    args = parser.parse_args()
+
+    if not args.layout and not args.state:
+        parser.print_help()
+        return
+    if args.layout:
+        try:
+            variables = write_layout(args.template)
+        except Exception as e:
+            print(f"Error building the layout from {args.template}: {e}")
+            return
+        print(f"Layout written to {LAYOUT_FILE}")
+        print(f"Fields it reads: {', '.join(meta_key(v) for v in variables)}")
+    if args.state:
+        compare_payloads(args.state.strip().title(), args.template)
+
+if __name__ == "__main__":
+    main()
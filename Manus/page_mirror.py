@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Local Mirror of the Site's Pages for Offline Drift Detection
+
+Pulls every page (ID, slug, parent, status, modified date, title, raw
+content and meta) into a local SQLite store with zlib-compressed content,
+so what is live can be inspected and compared without clicking through
+wp-admin or making one API call per page.
+
+- The first sync sweeps all pages; later syncs only fetch the pages
+  modified after the newest one in the mirror (modified_after), with
+  _fields limiting each response to what is stored. Collection pages are
+  fetched in parallel over the shared session in wp_api.py.
+- Each sync also lists the IDs of all pages (a cheap request) and drops
+  pages that were deleted on the site.
+- The drift report compares the mirror with the local generated output
+  (the pages wxr_export.py exports), matched by their slug path. Both
+  sides are normalised with the Divi minifier, so whitespace and default
+  attributes do not count as changes.
+
+Usage:
+  python3 page_mirror.py --sync               # Fetch pages changed since the last sync
+  python3 page_mirror.py --sync --full        # Fetch every page again
+  python3 page_mirror.py --report             # Compare the mirror with the generated pages
+  python3 page_mirror.py --diff texas-bail-bondsman-24-hour-emergency-service-nearby
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import difflib
+import argparse
+from datetime import datetime, timedelta
+
+from wp_api import iter_collection
+from wxr_export import iter_pages
+from divi_shortcodes import minify
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIRROR_FILE = os.path.join(BASE_DIR, "mirror", "pages.db")
+PAGE_STATUSES = "publish,future,draft,pending,private"
+PAGE_FIELDS = "id,slug,parent,status,modified,title,content,meta"
+DEFAULT_WORKERS = 4
+REPORT_LIMIT = 25  # Differing pages listed in the report
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    parent INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    modified TEXT,
+    title TEXT,
+    content BLOB,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_modified ON pages (modified);
+"""
+
+def open_mirror(path=MIRROR_FILE):
+    """Open (and create) the mirror database"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def compress(text):
+    """Compressed page content"""
+    return zlib.compress((text or "").encode('utf-8'), 6)
+
+def decompress(blob):
+    """Page content from its compressed form"""
+    return zlib.decompress(blob).decode('utf-8') if blob else ""
+
+def last_modified(conn):
+    """Newest modified date in the mirror (site time), or None when it is empty"""
+    return conn.execute("SELECT MAX(modified) FROM pages").fetchone()[0]
+
+def page_row(item):
+    """Mirror row for a page from the REST API (context=edit)"""
+    title = item.get("title") or {}
+    content = item.get("content") or {}
+    return (item["id"], item.get("slug") or "", item.get("parent") or 0, item.get("status"), item.get("modified"),
+            title.get("raw", title.get("rendered", "")), compress(content.get("raw", content.get("rendered", ""))),
+            json.dumps(item.get("meta") or {}, sort_keys=True))
+
+def sync(conn, full=False, workers=DEFAULT_WORKERS):
+    """Fetch new and changed pages into the mirror and drop deleted ones; returns (fetched, deleted)"""
+    params = {"context": "edit", "status": PAGE_STATUSES, "_fields": PAGE_FIELDS, "orderby": "modified", "order": "asc"}
+    since = None if full else last_modified(conn)
+    if since:
+        # Dates have one-second resolution: fetch the last second again, rows are replaced anyway
+        params["modified_after"] = (datetime.fromisoformat(since) - timedelta(seconds=1)).isoformat()
+        print(f"Fetching pages modified after {since}...")
+    else:
+        print("Fetching all pages...")
+
+    fetched = 0
+    batch = []
+    for item in iter_collection("pages", params, workers=workers):
+        batch.append(page_row(item))
+        if len(batch) >= 500:
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            conn.commit()  # Pages arrive oldest first, so a failed sync resumes from here
+            fetched += len(batch)
+            batch = []
+    conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    fetched += len(batch)
+
+    # Deleted pages never show up as modified, so compare the full list of IDs
+    site_ids = {item["id"] for item in iter_collection("pages", {"status": PAGE_STATUSES, "_fields": "id"}, workers=workers)}
+    local_ids = {row[0] for row in conn.execute("SELECT id FROM pages")}
+    deleted = sorted(local_ids - site_ids)
+    conn.executemany("DELETE FROM pages WHERE id = ?", [(page_id,) for page_id in deleted])
+    conn.commit()
+    return fetched, len(deleted)
+
+def slug_paths(pages):
+    """Map page ID to its slug path (parent/child/...) for {id: (slug, parent)}"""
+    paths = {}
+
+    def path(page_id, seen=()):
+        if page_id in paths:
+            return paths[page_id]
+        slug, parent = pages[page_id]
+        if parent in pages and parent not in seen:
+            result = f"{path(parent, seen + (page_id,))}/{slug}"
+        else:
+            result = slug
+        paths[page_id] = result
+        return result
+
+    for page_id in pages:
+        path(page_id)
+    return paths
+
+def mirror_pages(conn):
+    """Mirrored page IDs by slug path"""
+    pages = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT id, slug, parent FROM pages")}
+    paths = slug_paths(pages)
+    return {paths[page_id]: page_id for page_id in pages}
+
+def mirror_content(conn, page_id):
+    """Content of one mirrored page"""
+    row = conn.execute("SELECT content FROM pages WHERE id = ?", (page_id,)).fetchone()
+    return decompress(row[0]) if row else None
+
+def local_pages():
+    """Generated pages by slug path: {path: content}"""
+    pages, contents = {}, {}
+    for page in iter_pages():
+        pages[page["post_id"]] = (page["slug"], page["parent_id"])
+        contents[page["post_id"]] = page["content"]
+    paths = slug_paths(pages)
+    return {paths[page_id]: contents[page_id] for page_id in pages}
+
+def normalized(content):
+    """Content with whitespace and default Divi attributes normalised away"""
+    return minify(content.replace("\r\n", "\n")).strip()
+
+def drift_report(conn, limit=REPORT_LIMIT):
+    """Print how the mirror differs from the generated pages"""
+    site = mirror_pages(conn)
+    local = local_pages()
+    only_site = sorted(set(site) - set(local))
+    only_local = sorted(set(local) - set(site))
+    changed = []
+    for path in sorted(set(site) & set(local)):
+        before, after = normalized(local[path]), normalized(mirror_content(conn, site[path]))
+        if before != after:
+            ratio = difflib.SequenceMatcher(None, before, after, autojunk=False).quick_ratio()
+            changed.append((ratio, path))
+
+    print(f"Mirror: {len(site)} pages, generated: {len(local)} pages")
+    print(f"Identical: {len(set(site) & set(local)) - len(changed)}, differing: {len(changed)}, "
+          f"only on the site: {len(only_site)}, only generated: {len(only_local)}")
+    if changed:
+        print("\nDiffering pages (most changed first):")
+        for ratio, path in sorted(changed)[:limit]:
+            print(f"  {100 - ratio * 100:5.1f}% changed  {path}  (page {site[path]})")
+    for title, paths in (("Only on the site", only_site), ("Only generated (not uploaded)", only_local)):
+        if paths:
+            print(f"\n{title}:")
+            for path in paths[:limit]:
+                print(f"  {path}")
+            if len(paths) > limit:
+                print(f"  ... and {len(paths) - limit} more")
+
+def print_diff(conn, slug):
+    """Print a unified diff of one page: generated (before) against the site (after)"""
+    site = mirror_pages(conn)
+    local = local_pages()
+    matches = [path for path in site if path == slug or path.endswith("/" + slug)]
+    if not matches:
+        print(f"No mirrored page with slug {slug}")
+        return
+    for path in matches:
+        if path not in local:
+            print(f"{path}: no generated page to compare with")
+            continue
+        split = lambda content: normalized(content).replace("][", "]\n[").splitlines()
+        diff = difflib.unified_diff(split(local[path]), split(mirror_content(conn, site[path])),
+                                    f"generated/{path}", f"site/{path} (page {site[path]})", lineterm="")
+        print("\n".join(diff) or f"{path}: identical")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror the site's pages locally and report drift from the generated pages")
+    parser.add_argument('--sync', action='store_true', help='Fetch pages changed since the last sync')
+    parser.add_argument('--full', action='store_true', help='With --sync, fetch every page again')
+    parser.add_argument('--report', action='store_true', help='Compare the mirror with the generated pages')
+    parser.add_argument('--diff', metavar='SLUG', help='Show the differences for one page')
+    parser.add_argument('--mirror', default=MIRROR_FILE, help='Mirror database file')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Collection pages fetched in parallel')
+    args = parser.parse_args()
+
+    if not (args.sync or args.report or args.diff):
+        parser.print_help()
+        return
+
+    conn = open_mirror(args.mirror)
+    try:
+        if args.sync:
+            try:
+                fetched, deleted = sync(conn, args.full, args.workers)
+                print(f"Fetched {fetched} pages, removed {deleted} deleted pages")
+            except Exception as e:
+                print(f"Error syncing the mirror: {e}")
+                return
+        if args.report:
+            drift_report(conn)
+        if args.diff:
+            print_diff(conn, args.diff)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Preview Server for Bail Bonds Buddy Generated Pages
+
+Serves HTML previews of generated pages on demand instead of writing a
+second .html file next to every generated JSON. Previews are rendered
+lazily from the generated JSON in generated_pages/, or directly from the
+template + state_data/ when a page has not been generated yet. Recently
+viewed pages are kept in an in-memory LRU cache.
+
+Usage:
+  python3 preview_server.py                         # Serve on http://127.0.0.1:8000
+  python3 preview_server.py --port 8080             # Use a different port
+  python3 preview_server.py --dir ../generated_pages # Serve another output directory
+"""
+
+import os
+import json
+import argparse
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+from improved_page_generator_part1 import load_template, render_preview_html
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, "generated_pages")
+STATE_DATA_DIR = os.path.join(BASE_DIR, "state_data")
+PREVIEW_CACHE_SIZE = 128  # Number of rendered pages kept in memory
+
+def page_name_from_slug(slug):
+    """Convert a file slug like new_mexico into a display name like New Mexico"""
+    return slug.replace('_', ' ').replace('-', ' ').title()
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def render_generated_page(json_path, mtime):
+    """Render the preview for a generated JSON page (mtime keys the cache so edits show up)"""
+    with open(json_path, 'r') as f:
+        page_json = json.load(f)
+    slug = os.path.splitext(os.path.basename(json_path))[0]
+    return render_preview_html(page_name_from_slug(slug), page_json).encode('utf-8')
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def render_template_page(state_name, data_mtime):
+    """Render the preview straight from the template and state data without writing any files"""
+    # Imported here so serving already generated pages does not load the content generators
+    from improved_page_generator_part2 import build_state_page
+
+    template_json = load_template()
+    if not template_json:
+        return None
+    state_page = build_state_page(state_name, template_json)
+    if not state_page:
+        return None
+    return render_preview_html(state_name, state_page).encode('utf-8')
+
+def list_pages(output_dir):
+    """List generated pages and state data files that can be previewed"""
+    generated = set()
+    if os.path.isdir(output_dir):
+        generated = {f[:-5] for f in os.listdir(output_dir) if f.endswith('.json')}
+    available = set()
+    if os.path.isdir(STATE_DATA_DIR):
+        available = {f[:-5] for f in os.listdir(STATE_DATA_DIR) if f.endswith('.json')}
+    return sorted(generated), sorted(available - generated)
+
+def render_index(output_dir):
+    """Render a simple index page linking to every previewable page"""
+    generated, template_only = list_pages(output_dir)
+    items = "".join(f'<li><a href="/{slug}">{page_name_from_slug(slug)}</a></li>' for slug in generated)
+    template_items = "".join(f'<li><a href="/{slug}">{page_name_from_slug(slug)}</a> (rendered from template)</li>' for slug in template_only)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Generated Page Previews</title>
+    <meta charset="UTF-8">
+</head>
+<body>
+    <h1>Generated Page Previews</h1>
+    <ul>{items}</ul>
+    <h2>State data without a generated page</h2>
+    <ul>{template_items}</ul>
+</body>
+</html>""".encode('utf-8')
+
+def render_preview(slug, output_dir, source=None):
+    """Render the preview for a slug, preferring the generated JSON over the template"""
+    json_path = os.path.join(output_dir, f"{slug}.json")
+    if source != "template" and os.path.exists(json_path):
+        return render_generated_page(json_path, os.path.getmtime(json_path))
+
+    data_path = os.path.join(STATE_DATA_DIR, f"{slug}.json")
+    if os.path.exists(data_path):
+        return render_template_page(page_name_from_slug(slug), os.path.getmtime(data_path))
+    return None
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Request handler that renders page previews on demand"""
+    output_dir = OUTPUT_DIR
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        slug = unquote(url.path).strip('/')
+        if slug.endswith('.html'):
+            slug = slug[:-5]
+
+        # Only serve plain page slugs, never arbitrary paths
+        if slug and (os.sep in slug or '/' in slug or slug.startswith('.')):
+            self.send_error(404, "Page not found")
+            return
+
+        try:
+            if not slug:
+                body = render_index(self.output_dir)
+            else:
+                source = parse_qs(url.query).get("source", [None])[0]
+                body = render_preview(slug, self.output_dir, source)
+        except Exception as e:
+            print(f"Error rendering preview for {slug}: {e}")
+            self.send_error(500, "Error rendering preview")
+            return
+
+        if body is None:
+            self.send_error(404, "Page not found")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve HTML previews of generated pages on demand")
+    parser.add_argument('--host', default="127.0.0.1", help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--dir', default=OUTPUT_DIR, help='Directory containing generated page JSON files')
+    args = parser.parse_args()
+
+    PreviewHandler.output_dir = os.path.abspath(args.dir)
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    print(f"Serving previews from {PreviewHandler.output_dir}")
+    print(f"Open http://{args.host}:{args.port}/ to browse generated pages")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nPreview server stopped.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
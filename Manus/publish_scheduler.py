@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Drip Publishing Scheduler for Bail Bonds Buddy Pages
+
+The uploaders create every page as a draft. This script schedules the
+drafts for publication (status "future" with a publish date) at a
+controlled rate instead of publishing a wave at once, so the shared host
+does not have to render, index and purge tens of thousands of pages in
+the same hour. WordPress (and wp-scheduled-posts for missed schedules)
+then publishes each page at its time.
+
+- Rate curve: a cap per hour of the day (--per-hour), with a higher cap
+  in the off-peak window (--off-peak 1-6 --off-peak-per-hour 240), and
+  an optional --daily-cap. Pages in an hour are spread evenly over it.
+- Priority: state pages first, then county pages by county population
+  (counties.csv, and USA_DATA/county_data.json when present), each
+  county followed by its city pages. Pages with no known population go
+  last.
+- Pages already scheduled on the site count against the caps, so a
+  second run fills in around the first one.
+- The whole schedule is computed in one pass before anything is sent.
+  The dry run (the default) prints the expected load per hour: pages
+  published, LiteSpeed cache purges and the estimated server time.
+
+Usage:
+  python3 publish_scheduler.py                                   # Dry run for the site's drafts
+  python3 publish_scheduler.py --local                           # Dry run for the pages wxr_export.py would export
+  python3 publish_scheduler.py --per-hour 30 --off-peak 0-5 --off-peak-per-hour 200 --daily-cap 2000
+  python3 publish_scheduler.py --start "2025-06-01 02:00" --apply
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from wxr_export import STATE_NAMES, state_page_slug
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+USA_DATA_DIR = os.path.join(ROOT_DIR, "USA_DATA")
+COUNTIES_CSV = os.path.join(ROOT_DIR, "counties.csv")
+COUNTY_DATA_FILE = os.path.join(USA_DATA_DIR, "county_data.json")
+SCHEDULE_FILE = os.path.join(BASE_DIR, "journals", "publish_schedule.json")
+
+DEFAULT_PER_HOUR = 60
+DEFAULT_OFF_PEAK = "1-6"  # Site time
+DEFAULT_OFF_PEAK_PER_HOUR = 240
+DEFAULT_WORKERS = 4
+
+# Load model for the dry run: publishing a page purges it, its parent and the shared
+# listings (home page, sitemap) in LiteSpeed, and the next visits render them again
+PURGES_PER_PUBLISH = 3
+SERVER_SECONDS_PER_PURGE = 1.5  # PHP + Divi render of one purged page
+
+STATE_SLUGS = {state_page_slug(name): abbr for abbr, name in STATE_NAMES.items()}
+STATE_ABBR_BY_NAME = {name: abbr for abbr, name in STATE_NAMES.items()}
+
+def county_slug(name):
+    """Page slug for a county name (Harris County → harris-county)"""
+    return name.strip().lower().replace(' ', '-')
+
+def parse_hours(spec):
+    """Hours of the day in a spec like '1-6' or '0-5,22-23' (ranges are inclusive)"""
+    hours = set()
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        start, _, end = part.partition('-')
+        start, end = int(start), int(end or start)
+        if not (0 <= start <= 23 and 0 <= end <= 23):
+            raise ValueError(f"Hours must be between 0 and 23: {part}")
+        hour = start
+        while True:
+            hours.add(hour)
+            if hour == end:
+                break
+            hour = (hour + 1) % 24  # 22-2 wraps past midnight
+    return hours
+
+def hourly_caps(per_hour=DEFAULT_PER_HOUR, off_peak=DEFAULT_OFF_PEAK, off_peak_per_hour=DEFAULT_OFF_PEAK_PER_HOUR):
+    """Pages allowed in each hour of the day, as a list of 24 caps"""
+    off_peak_hours = parse_hours(off_peak) if off_peak else set()
+    return [off_peak_per_hour if hour in off_peak_hours else per_hour for hour in range(24)]
+
+def latest_value(series):
+    """Latest value of a {year: value} series, or the value itself"""
+    if isinstance(series, dict):
+        return series[max(series)] if series else None
+    return series
+
+def load_populations(csv_file=COUNTIES_CSV, county_data_file=COUNTY_DATA_FILE):
+    """Map (state abbreviation, county slug) to the county's population"""
+    populations = {}
+    if os.path.exists(county_data_file):
+        # county_loader lives with the data and streams it (or reads its SQLite copy)
+        sys.path.insert(0, USA_DATA_DIR)
+        try:
+            from county_loader import iter_counties
+        finally:
+            sys.path.remove(USA_DATA_DIR)
+        for record in iter_counties(county_data_file):
+            population = latest_value(record.get('population'))
+            if record.get('name') and population:
+                populations[(record.get('state'), county_slug(record['name']))] = float(population)
+
+    if os.path.exists(csv_file):
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                abbr = STATE_ABBR_BY_NAME.get(row.get('state', '').strip())
+                slug = (row.get('county_url_slug') or county_slug(row.get('county_name', ''))).strip()
+                try:
+                    populations.setdefault((abbr, slug), float(row['population']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    if not populations:
+        print("Warning: no county populations found; county pages are scheduled in site order")
+    return populations
+
+def site_pages(status):
+    """Pages with a status on the site, as {id, slug, parent, date}"""
+    from wp_api import iter_collection
+
+    pages = []
+    for item in iter_collection("pages", {"status": status, "_fields": "id,slug,parent,date,title"}):
+        slug = item.get("slug") or county_slug((item.get("title") or {}).get("rendered", ""))
+        pages.append({"id": item["id"], "slug": slug, "parent": item.get("parent") or 0, "date": item.get("date")})
+    return pages
+
+def local_pages():
+    """The pages wxr_export.py would export, in the same shape as site_pages()"""
+    from wxr_export import iter_pages
+
+    return [{"id": page["post_id"], "slug": page["slug"], "parent": page["parent_id"], "date": None}
+            for page in iter_pages()]
+
+def prioritize(pages, populations):
+    """Pages in publishing order: states, then counties by population with their cities after them"""
+    by_id = {page["id"]: page for page in pages}
+
+    def ancestors(page):
+        chain = []
+        seen = set()
+        while page and page["id"] not in seen:
+            seen.add(page["id"])
+            chain.append(page)
+            page = by_id.get(page["parent"])
+        return chain
+
+    def sort_key(page):
+        chain = ancestors(page)
+        abbr = next((STATE_SLUGS[p["slug"]] for p in chain if p["slug"] in STATE_SLUGS), None)
+        if page["slug"] in STATE_SLUGS:
+            return (0, -state_population.get(abbr, 0), 0, page["id"])
+        # The county is the page itself or its nearest ancestor with a known population
+        for depth, ancestor in enumerate(chain):
+            population = populations.get((abbr, ancestor["slug"]))
+            if population:
+                return (1, -population, ancestor["id"], depth, page["id"])
+        return (2, 0, len(chain), page["id"])
+
+    state_population = Counter()
+    for (abbr, _), population in populations.items():
+        state_population[abbr] += population
+    return sorted(pages, key=sort_key)
+
+def iter_slots(start, caps, occupied=None, daily_cap=None):
+    """Yield publish times from start on, spread evenly within each hour and within the caps"""
+    occupied = occupied or Counter()
+    hour_start = start.replace(minute=0, second=0, microsecond=0)
+    day_count = Counter()
+    for hour in occupied:
+        day_count[hour.date()] += occupied[hour]
+
+    while True:
+        free = max(caps[hour_start.hour] - occupied[hour_start], 0)
+        if daily_cap:
+            free = min(free, max(daily_cap - day_count[hour_start.date()], 0))
+        if free:
+            spacing = 3600 / free
+            for i in range(free):
+                slot = hour_start + timedelta(seconds=int(i * spacing))
+                if slot >= start:
+                    day_count[hour_start.date()] += 1
+                    yield slot
+        elif not any(caps) or (daily_cap is not None and daily_cap <= 0):
+            raise ValueError("The rate curve allows no pages at all")
+        hour_start += timedelta(hours=1)
+
+def scheduled_hours(pages):
+    """Pages already scheduled per hour (site time), from their publish dates"""
+    occupied = Counter()
+    for page in pages:
+        if page.get("date"):
+            occupied[datetime.fromisoformat(page["date"]).replace(minute=0, second=0, microsecond=0)] += 1
+    return occupied
+
+def build_schedule(pages, start, caps, occupied=None, daily_cap=None):
+    """Assign every page its publish time in one pass; returns [(page, datetime)]"""
+    return list(zip(pages, iter_slots(start, caps, occupied, daily_cap)))
+
+def simulate(schedule, occupied=None):
+    """Print the expected publishing and cache load per hour for a schedule"""
+    per_hour = Counter(when.replace(minute=0, second=0) for _, when in schedule)
+    occupied = occupied or Counter()
+    if not per_hour:
+        print("Nothing to schedule")
+        return
+    peak = max(per_hour[hour] + occupied[hour] for hour in per_hour)
+    print(f"{'Hour (site time)':<17} {'Pages':>6} {'Purges':>7} {'Server':>7}")
+    for hour in sorted(per_hour):
+        pages = per_hour[hour] + occupied[hour]
+        purges = pages * PURGES_PER_PUBLISH
+        busy = purges * SERVER_SECONDS_PER_PURGE / 3600
+        bar = "#" * max(1, round(40 * pages / peak))
+        print(f"{hour:%Y-%m-%d %H:00} {pages:>6} {purges:>7} {busy:>6.0%}  {bar}")
+
+    first, last = schedule[0][1], schedule[-1][1]
+    print(f"\n{len(schedule)} pages from {first:%Y-%m-%d %H:%M} to {last:%Y-%m-%d %H:%M} "
+          f"({(last - first).total_seconds() / 86400:.1f} days), at most {peak} pages in one hour")
+    print(f"Server time assumes {PURGES_PER_PUBLISH} purged pages per publish at {SERVER_SECONDS_PER_PURGE}s each")
+
+def schedule_page(page_id, when):
+    """Set one draft to be published at a time; returns True on success"""
+    from wp_api import get_session, api_url, DEFAULT_TIMEOUT
+
+    try:
+        response = get_session().post(api_url(f"pages/{page_id}"),
+                                      json={"status": "future", "date": when.isoformat(timespec="seconds")},
+                                      timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        print(f"Error scheduling page {page_id}: {e}")
+        return False
+
+def save_schedule(schedule, path=SCHEDULE_FILE):
+    """Write the schedule as JSON (page ID, slug, publish time)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump([{"id": page["id"], "slug": page["slug"], "date": when.isoformat(timespec="seconds")}
+                   for page, when in schedule], f, indent=2)
+    os.replace(tmp_path, path)
+
+def apply_schedule(schedule, workers=DEFAULT_WORKERS):
+    """Send the schedule to the site; returns the number of pages scheduled"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda item: schedule_page(item[0]["id"], item[1]), schedule)
+        return sum(results)
+
+def parse_start(value):
+    """Start time argument: 'YYYY-MM-DD HH:MM' in site time, default the next full hour"""
+    if value:
+        return datetime.fromisoformat(value)
+    return datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Schedule draft pages for publication at a controlled rate")
+    parser.add_argument('--start', help="First publish time in site time, 'YYYY-MM-DD HH:MM' (default: next hour)")
+    parser.add_argument('--per-hour', type=int, default=DEFAULT_PER_HOUR, help='Pages per hour outside the off-peak window')
+    parser.add_argument('--off-peak', default=DEFAULT_OFF_PEAK, help="Off-peak hours in site time, e.g. '1-6' or '0-5,22-23' ('' for none)")
+    parser.add_argument('--off-peak-per-hour', type=int, default=DEFAULT_OFF_PEAK_PER_HOUR, help='Pages per hour in the off-peak window')
+    parser.add_argument('--daily-cap', type=int, help='Most pages published per day')
+    parser.add_argument('--local', action='store_true', help='Schedule the locally generated pages instead of the site drafts (dry run only)')
+    parser.add_argument('--apply', action='store_true', help='Send the schedule to WordPress (default: dry run)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Parallel requests when applying')
+    args = parser.parse_args()
+
+    try:
+        caps = hourly_caps(args.per_hour, args.off_peak, args.off_peak_per_hour)
+        start = parse_start(args.start)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if args.local and args.apply:
+        print("Error: --local pages have no site IDs; upload them first and schedule the drafts")
+        return
+
+    if args.local:
+        pages, occupied = local_pages(), Counter()
+    else:
+        try:
+            pages = site_pages("draft")
+            occupied = scheduled_hours(site_pages("future"))
+        except Exception as e:
+            print(f"Error reading pages from WordPress: {e}")
+            return
+
+    try:
+        schedule = build_schedule(prioritize(pages, load_populations()), start, caps, occupied, args.daily_cap)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    simulate(schedule, occupied)
+    if not args.apply or not schedule:
+        return
+
+    save_schedule(schedule)
+    print(f"Schedule saved to {SCHEDULE_FILE}")
+    scheduled = apply_schedule(schedule, args.workers)
+    print(f"Scheduled {scheduled} of {len(schedule)} pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Retargeting Engine for the Oklahoma Template
+
+Rewrites a page exported for one location (the Oklahoma Divi export) for
+another location in a single pass. The whole source → target mapping
+(state name, abbreviation, nickname, capital, counties, cities,
+coordinates) is compiled once into one regular expression built from a
+trie of the source terms, so each position of the content is tested
+against all terms at once. Matching cost depends on the length of the
+content, not on how many terms there are.
+
+- The longest term wins ("Oklahoma City" before "Oklahoma").
+- Matches are whole words only.
+- Replacement text is never rescanned, so an "OK" produced by a
+  replacement is not substituted again.
+- Case-insensitive terms keep the case of the text they replace
+  (OKLAHOMA → TEXAS, oklahoma → texas, Oklahoma → Texas).
+
+Usage:
+  from retarget import OKLAHOMA_SOURCE, retarget
+  content = retarget(content, OKLAHOMA_SOURCE, TEXAS_DATA)
+
+  python3 retarget.py --state Texas   # Show the term table for a state_data/ file
+"""
+
+import os
+import re
+import json
+import argparse
+from functools import lru_cache
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DATA_DIR = os.path.join(BASE_DIR, "state_data")
+
+# The location the Divi export was built for
+OKLAHOMA_SOURCE = {
+    "name": "Oklahoma",
+    "abbreviation": "OK",
+    "nickname": "Sooner State",
+    "capital": "Oklahoma City",
+    "largest_counties": ["Oklahoma County", "Tulsa County", "Cleveland County"],
+    "major_cities": ["Oklahoma City", "Tulsa", "Norman"],
+    "lat": "35.4688692",
+    "lng": "-97.519539"
+}
+
+# Location fields in the order they claim a source term: when two fields
+# share a source (Oklahoma City is both a city and the capital) the first wins.
+# Each field is (key, case-insensitive match)
+LOCATION_FIELDS = (
+    ("largest_counties", True),
+    ("major_cities", True),
+    ("nickname", True),
+    ("capital", True),
+    ("name", True),
+    ("abbreviation", False),
+    ("lat", False),
+    ("lng", False),
+)
+
+def _names(value):
+    """Normalise a field to a list of names (county dicts use their 'name')"""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [str(v["name"] if isinstance(v, dict) else v) for v in value]
+
+def build_terms(source, target):
+    """Pair up the fields of two location dicts into (source, target, ignore_case) terms"""
+    terms = []
+    for key, ignore_case in LOCATION_FIELDS:
+        for old, new in zip(_names(source.get(key)), _names(target.get(key))):
+            if old and new:
+                terms.append((old, new, ignore_case))
+    return tuple(terms)
+
+def _trie_pattern(trie):
+    """Regex for all words in a character trie; '' marks the end of a word"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(trie.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in trie:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    # Greedy "?" tries the longer word first
+    return pattern + "?" if "" in trie else pattern
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return trie
+
+def match_case(matched, replacement):
+    """Give the replacement the case style of the matched text"""
+    if matched.isupper() and any(c.isalpha() for c in matched):
+        return replacement.upper()
+    if matched.islower():
+        return replacement.lower()
+    return replacement
+
+class Retargeter:
+    """A compiled source → target mapping that rewrites content in one pass"""
+
+    def __init__(self, terms):
+        self.exact = {}     # Case-sensitive source → target
+        self.folded = {}    # Lower-cased source → target
+        for source, target, ignore_case in terms:
+            if ignore_case:
+                self.folded.setdefault(source.lower(), target)
+            else:
+                self.exact.setdefault(source, target)
+
+        alternatives = []
+        if self.folded:
+            alternatives.append("(?i:" + _trie_pattern(_build_trie(self.folded)) + ")")
+        if self.exact:
+            alternatives.append(_trie_pattern(_build_trie(self.exact)))
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)") if alternatives else None
+
+    def _replace(self, match):
+        text = match.group(0)
+        if text in self.exact:
+            return self.exact[text]
+        return match_case(text, self.folded[text.lower()])
+
+    def rewrite(self, content):
+        """Rewrite every term in the content in a single pass"""
+        if not isinstance(content, str) or self.pattern is None:
+            return content
+        return self.pattern.sub(self._replace, content)
+
+@lru_cache(maxsize=128)
+def compile_terms(terms):
+    """Compile (and cache) a tuple of (source, target, ignore_case) terms"""
+    return Retargeter(terms)
+
+def rewrite_terms(content, terms):
+    """Rewrite content with a list of (source, target, ignore_case) terms"""
+    return compile_terms(tuple(terms)).rewrite(content)
+
+def retarget(content, source, target):
+    """Rewrite content written for the source location so it refers to the target location"""
+    return compile_terms(build_terms(source, target)).rewrite(content)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how the Oklahoma template terms map to another state")
+    parser.add_argument('--state', required=True, help='State name with a file in state_data/ (e.g. Texas)')
+    args = parser.parse_args()
+
+    data_file = os.path.join(STATE_DATA_DIR, f"{args.state.lower().replace(' ', '_')}.json")
+    try:
+        with open(data_file, 'r') as f:
+            target = json.load(f)
+    except Exception as e:
+        print(f"Error loading {data_file}: {e}")
+        return
+
+    terms = build_terms(OKLAHOMA_SOURCE, target)
+    for source, replacement, ignore_case in terms:
+        print(f"{source!r:24} -> {replacement!r}{'' if ignore_case else '  (exact case)'}")
+    print(f"\nPattern: {compile_terms(terms).pattern.pattern}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Static HTML Exporter for County and City Pages
+
+Renders every county profile page and city page from USA_DATA/county_data.json
+with the same renderer as USA_DATA/generate_county_pages.py (county and city
+templates, CountyTable metrics, the cities listed in
+USA_DATA/[ST]/counties/[County]/*-cities.txt), and writes each as a finished
+static file under the site's URL layout, so nginx can serve the long tail of
+pages without PHP or Divi rendering them on each request:
+
+  static_export/tx/harris-county/index.html
+  static_export/tx/harris-county/baytown/index.html
+  static_export/assets/styles.3f9a1c2b7d4e.css
+
+- Inline <style> blocks are moved into one shared stylesheet named after a
+  hash of its content. Pages built from the same template share one file,
+  which browsers cache once; a template change gets a new name.
+- Local images and files the pages refer to are copied to assets/ with
+  hashed names in the same way. Remote URLs are left as they are.
+- Each file gets a precompressed .gz copy, and a .br copy when the brotli
+  module is installed (pip install brotli), for gzip_static/brotli_static.
+- Files whose content has not changed are not rewritten, so an rsync to
+  the web server only sends changed pages.
+- County pages link to their city pages and city pages back to their
+  county with relative links, so the same pages work under WordPress.
+
+nginx (in the server block, before the WordPress location):
+  location /assets/ { gzip_static on; brotli_static on; expires max; add_header Cache-Control immutable; }
+  location ~ ^/[a-z]{2}/ { gzip_static on; brotli_static on; try_files $uri $uri/index.html @wordpress; }
+
+Usage:
+  python3 static_export.py                      # Export all states to static_export/
+  python3 static_export.py --state TX --state OK
+  python3 static_export.py --output /var/www/static --workers 8
+"""
+
+import os
+import re
+import sys
+import gzip
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wxr_export import STATE_NAMES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+USA_DATA_DIR = os.path.join(BASE_DIR, "..", "USA_DATA")
+COUNTY_DATA_FILE = os.path.join(USA_DATA_DIR, "county_data.json")
+STATIC_EXPORT_DIR = os.path.join(BASE_DIR, "static_export")
+ASSETS_URL = "/assets/"
+DEFAULT_WORKERS = 4
+COMPRESS_MIN_BYTES = 256  # Smaller files are not worth a compressed copy
+HASH_LENGTH = 12
+
+STYLE_PATTERN = re.compile(r'[ \t]*<style\b[^>]*>(.*?)</style>[ \t]*\n?', re.S | re.I)
+# src/href values that are relative file paths (not URLs, anchors or site paths)
+LOCAL_ASSET_PATTERN = re.compile(r'\b(src|href)="(?![a-z][a-z0-9+.-]*:|//|/|#)([^"?#]+)"', re.I)
+
+def content_hash(data):
+    """Short content hash used in asset file names"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def hashed_name(filename, data):
+    """File name with the content hash before the extension (logo.png → logo.1a2b3c4d5e6f.png)"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    return f"{stem}.{content_hash(data)}{ext}"
+
+def write_if_changed(path, data):
+    """Write bytes atomically unless the file already has them; returns True if written"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def write_static_file(path, data):
+    """Write a file with its precompressed .gz (and .br) copies; returns True if anything changed"""
+    changed = write_if_changed(path, data)
+    variants = {".gz": lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants[".br"] = lambda: brotli.compress(data)
+    for suffix, compress in variants.items():
+        variant_path = path + suffix
+        compressed = compress() if len(data) >= COMPRESS_MIN_BYTES else None
+        if compressed and len(compressed) < len(data):
+            changed = write_if_changed(variant_path, compressed) or changed
+        elif os.path.exists(variant_path):
+            os.remove(variant_path)  # A stale copy would be served instead of the new file
+            changed = True
+    return changed
+
+class AssetStore:
+    """Shared, content-hashed assets of an export, each written once"""
+
+    def __init__(self, export_dir):
+        self.assets_dir = os.path.join(export_dir, ASSETS_URL.strip("/"))
+        self._written = {}
+        self._lock = threading.Lock()
+
+    def add(self, filename, data):
+        """Store an asset and return its URL"""
+        name = hashed_name(filename, data)
+        with self._lock:
+            if name not in self._written:
+                self._written[name] = write_static_file(os.path.join(self.assets_dir, name), data)
+        return ASSETS_URL + name
+
+    def names(self):
+        """Names of the assets used by the pages exported so far"""
+        return set(self._written)
+
+def render_static_page(html, source_dir, assets):
+    """Page HTML with its inline styles moved to a shared stylesheet and local files moved to assets"""
+    css = "\n".join(m.group(1).strip() for m in STYLE_PATTERN.finditer(html))
+    if css:
+        stylesheet = assets.add("styles.css", (css + "\n").encode('utf-8'))
+        link = f'    <link rel="stylesheet" href="{stylesheet}">\n'
+        first = STYLE_PATTERN.search(html)
+        html = html[:first.start()] + link + STYLE_PATTERN.sub("", html[first.start():])
+
+    def replace_asset(match):
+        attribute, relative_path = match.groups()
+        asset_path = os.path.normpath(os.path.join(source_dir, relative_path))
+        if not os.path.isfile(asset_path) or asset_path.endswith(".html"):
+            return match.group(0)
+        with open(asset_path, 'rb') as f:
+            return f'{attribute}="{assets.add(asset_path, f.read())}"'
+
+    return LOCAL_ASSET_PATTERN.sub(replace_asset, html)
+
+def county_renderer():
+    """generate_county_pages, which lives with the data it renders"""
+    sys.path.insert(0, USA_DATA_DIR)
+    try:
+        import generate_county_pages
+    finally:
+        sys.path.remove(USA_DATA_DIR)
+    return generate_county_pages
+
+def iter_counties_to_render(renderer, county_data_file=COUNTY_DATA_FILE, states=None):
+    """Yield (county record, county seats data, metrics) for every county with a seats file"""
+    if not os.path.exists(county_data_file):
+        print(f"Warning: {county_data_file} does not exist; nothing to render")
+        return
+    records = [r for r in renderer.load_county_data(county_data_file) if not states or r.get('state') in states]
+    table = renderer.CountyTable(records)
+    table.compute_metrics()
+    for row, record in enumerate(records):
+        seats = renderer.load_county_seats(record['state'])
+        if seats:
+            yield record, seats, table.values(row)
+
+def export_page(html, url_path, export_dir, assets, source_dir):
+    """Export one rendered page to [url_path]/index.html; returns True if any file changed"""
+    html = render_static_page(html, source_dir, assets)
+    return write_static_file(os.path.join(export_dir, url_path, "index.html"), html.encode('utf-8'))
+
+def export_county(renderer, county, export_dir, assets):
+    """Render and export a county page and its city pages; returns (pages, pages changed)"""
+    record, seats, metrics = county
+    county_html, city_pages = renderer.render_county_pages(record, seats, metrics)
+    county_path = f"{record['state'].lower()}/{renderer.county_slug(record['name'].title())}"
+    changed = export_page(county_html, county_path, export_dir, assets, renderer.USA_DATA_DIR)
+    for slug, city_html in city_pages:
+        changed += export_page(city_html, f"{county_path}/{slug}", export_dir, assets, renderer.USA_DATA_DIR)
+    return 1 + len(city_pages), changed
+
+def export_static(county_data_file=COUNTY_DATA_FILE, export_dir=STATIC_EXPORT_DIR, states=None, workers=DEFAULT_WORKERS):
+    """Render and export the county and city pages as static files; returns (pages, pages changed)"""
+    renderer = county_renderer()
+    assets = AssetStore(export_dir)
+    pages = changed = failed = 0
+
+    def export(county):
+        try:
+            return export_county(renderer, county, export_dir, assets)
+        except Exception as e:
+            print(f"Error exporting {county[0].get('name')}, {county[0].get('state')}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(export, iter_counties_to_render(renderer, county_data_file, states)):
+            if result is None:
+                failed += 1
+                continue
+            pages += result[0]
+            changed += result[1]
+
+    if failed:
+        print(f"Warning: {failed} counties could not be exported")
+    print(f"Assets: {len(assets.names())} files in {assets.assets_dir}")
+    return pages, changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Render county and city pages as static HTML for nginx")
+    parser.add_argument('--state', action='append', type=str.upper, choices=sorted(STATE_NAMES), help='Only export this state (repeatable)')
+    parser.add_argument('--data', default=COUNTY_DATA_FILE, help='Path to county_data.json')
+    parser.add_argument('--output', default=STATIC_EXPORT_DIR, help='Export directory (the nginx root for these pages)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Pages exported in parallel')
+    args = parser.parse_args()
+
+    if not brotli:
+        print("Note: brotli is not installed; writing .gz copies only (pip install brotli for .br)")
+    pages, changed = export_static(args.data, args.output, set(args.state or ()), args.workers)
+    print(f"Exported {pages} pages to {args.output} ({changed} changed)")
+
+if __name__ == "__main__":
+    main()
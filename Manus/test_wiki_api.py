@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Offline test of wiki_api.py against the stand-in API
+
+Serves the recorded fixtures in fixtures/wiki_api (West Virginia: one batch
+of 50 titles whose intro extracts continue over three responses, then a
+batch of 5, with "Mcdowell County" redirected to "McDowell County") from
+StandInHandler on a free local port, and gathers the county facts from it.
+
+Usage:
+  python3 test_wiki_api.py
+  python3 -m pytest test_wiki_api.py
+"""
+
+import os
+import json
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+from wiki_api import ApiClient, StandInHandler, gather_county_facts
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures", "wiki_api")
+FIXTURE_STATE = "WV"
+FIXTURE_COUNTIES = 55
+FIXTURE_REQUESTS = 4  # 3 for the first 50 titles (20 extracts per response), 1 for the last 5
+
+class GatherCountyFactsTest(unittest.TestCase):
+
+    def setUp(self):
+        handler = type("FixtureHandler", (StandInHandler,), {"fixtures_dir": FIXTURES_DIR})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ApiClient(f"http://127.0.0.1:{self.server.server_address[1]}/w/api.php")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.facts_file = os.path.join(self.tmp_dir.name, "county_facts.json")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def gather(self):
+        queried, not_found = gather_county_facts(self.client, {FIXTURE_STATE}, self.facts_file)
+        with open(self.facts_file, 'r', encoding='utf-8') as f:
+            return queried, not_found, json.load(f)[FIXTURE_STATE]
+
+    def test_batches_and_continuation(self):
+        queried, not_found, facts = self.gather()
+        self.assertEqual(queried, FIXTURE_COUNTIES)
+        self.assertEqual(not_found, [])
+        self.assertEqual(self.client.requests, FIXTURE_REQUESTS)
+        self.assertEqual(len(facts), FIXTURE_COUNTIES)
+        # Extracts arrive in later responses than the coordinates; every county has both
+        for directory, county in facts.items():
+            self.assertTrue(county["extract"], directory)
+            self.assertIsNotNone(county["lat"], directory)
+
+    def test_redirect_maps_to_county_directory(self):
+        _, _, facts = self.gather()
+        self.assertEqual(facts["Mcdowell-County"]["title"], "McDowell County, West Virginia")
+        self.assertTrue(facts["Mcdowell-County"]["extract"].startswith("McDowell County"))
+
+    def test_stored_counties_are_skipped(self):
+        self.gather()
+        requests = self.client.requests
+        queried, _, _ = self.gather()
+        self.assertEqual(queried, 0)
+        self.assertEqual(self.client.requests, requests)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import json
 import requests
 import sys
 import traceback
+from wxr_export import state_page_slug
 
 # WordPress API details
 WP_BASE_URL = "https://bailbondsbuddy.com"
@@ -42,7 +43,7 @@ def upload_state_page(state_name):
 
         # Prepare the page data
         title = f"Find Local {state_name} Bail Bondsmen Near You | 24/7 Emergency Service"
-        slug = f"{state_name.lower().replace(' ', '-')}-bail-bondsman-24-hour-emergency-service-nearby"[:100]
+        slug = state_page_slug(state_name)
         
         page_data = {
             "title": title,
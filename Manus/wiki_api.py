@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Batched MediaWiki API Client for County Facts
+
+Gathers the Wikipedia intro text, coordinates and Wikidata item of every
+county in USA_DATA with the MediaWiki Action API instead of one page
+download per county (about 3,100 requests with a one-second pause each):
+
+- Up to 50 titles go into each query request (prop=extracts|coordinates|
+  pageprops); continuation tokens are followed until every property of
+  the batch is complete. Intro extracts come back at most 20 per response,
+  so a batch of 50 usually takes 3 requests.
+- Redirects and title normalisation are resolved by the API in the same
+  request (redirects=1) and mapped back to the county they were asked for.
+- Results are stored in USA_DATA/wikipedia/county_facts.json, keyed by
+  state abbreviation and county directory name (USA_DATA/[ST]/counties/
+  [directory]). The file is saved after every batch, and counties already
+  in it are skipped, so an interrupted run continues where it stopped.
+- Requests are sent one at a time with maxlag=5; a maxlag error or a 429
+  pauses for the Retry-After time.
+
+--record saves every API response as a fixture file, and --stand-in serves
+those fixtures on a local port, so runs can be repeated offline against
+the stand-in (--api-url http://127.0.0.1:8766/w/api.php). fixtures/wiki_api
+holds a West Virginia set (a 50-title batch with continuation and a
+redirect), which test_wiki_api.py runs the client against.
+
+Usage:
+  python3 wiki_api.py                          # All counties not gathered yet
+  python3 wiki_api.py --state TX --refresh     # Gather Texas again
+  python3 wiki_api.py --state DE --record fixtures/wiki_api
+  python3 wiki_api.py --stand-in --fixtures fixtures/wiki_api
+  python3 wiki_api.py --state DE --api-url http://127.0.0.1:8766/w/api.php --output /tmp/county_facts.json
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import argparse
+from urllib.parse import urlencode, urlsplit, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gazetteer import STATES
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+USA_DATA_DIR = os.path.join(BASE_DIR, "..", "USA_DATA")
+COUNTY_FACTS_FILE = os.path.join(USA_DATA_DIR, "wikipedia", "county_facts.json")
+API_URL = "https://en.wikipedia.org/w/api.php"
+USER_AGENT = "BailBondsBuddy-StateData/1.0 (https://bailbondsbuddy.com)"
+BATCH_SIZE = 50  # Titles per query (the API limit for normal accounts)
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRY_AFTER = 5
+MAX_ATTEMPTS = 5
+STAND_IN_PORT = 8766
+
+QUERY_PARAMS = {
+    "action": "query",
+    "format": "json",
+    "formatversion": "2",
+    "prop": "extracts|coordinates|pageprops",
+    "exintro": "1",
+    "explaintext": "1",
+    "exlimit": "max",
+    "colimit": "max",
+    "ppprop": "wikibase_item|wikibase-shortdesc",
+    "redirects": "1",
+    "maxlag": "5",
+}
+
+def county_names(st, usa_data_dir=USA_DATA_DIR):
+    """County names by directory from a state's county seat file (empty if unreadable)"""
+    names = {}
+    for seats_file in glob.glob(os.path.join(usa_data_dir, st, "*-seats.json")) + glob.glob(os.path.join(usa_data_dir, st, "*-parishes.json")):
+        try:
+            with open(seats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for name, info in (data.get("counties") or data.get("parishes") or {}).items():
+            if isinstance(info, dict) and info.get("directory"):
+                names[info["directory"]] = name
+    return names
+
+def county_titles(states=None, usa_data_dir=USA_DATA_DIR):
+    """Wikipedia title for every USA_DATA county directory: {(st, directory): title}"""
+    titles = {}
+    for st in sorted(STATES):
+        if states and st not in states:
+            continue
+        names = county_names(st, usa_data_dir)
+        for county_dir in sorted(glob.glob(os.path.join(usa_data_dir, st, "counties", "*")) +
+                                 glob.glob(os.path.join(usa_data_dir, st, "parishes", "*"))):
+            if not os.path.isdir(county_dir):
+                continue
+            directory = os.path.basename(county_dir)
+            name = names.get(directory) or directory.replace('-', ' ')
+            titles[(st, directory)] = f"{name}, {STATES[st][0]}"
+    return titles
+
+def fixture_key(params):
+    """File name of the fixture for a request"""
+    encoded = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest() + ".json"
+
+class ApiClient:
+    """MediaWiki Action API client that counts its requests and can record them as fixtures"""
+
+    def __init__(self, api_url=API_URL, record_dir=None):
+        import requests
+
+        self.api_url = api_url
+        self.record_dir = record_dir
+        self.requests = 0
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+
+    def get(self, params):
+        """One API request; retries on maxlag and 429"""
+        for attempt in range(MAX_ATTEMPTS):
+            response = self.session.get(self.api_url, params=params, timeout=DEFAULT_TIMEOUT)
+            self.requests += 1
+            data = response.json() if response.status_code == 200 else None
+            busy = response.status_code == 429 or (data and data.get("error", {}).get("code") == "maxlag")
+            if busy and attempt < MAX_ATTEMPTS - 1:
+                try:
+                    seconds = float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+                except ValueError:
+                    seconds = DEFAULT_RETRY_AFTER
+                print(f"API busy; pausing {seconds:.0f}s")
+                time.sleep(seconds)
+                continue
+            response.raise_for_status()
+            if data.get("error"):
+                raise RuntimeError(f"API error {data['error'].get('code')}: {data['error'].get('info')}")
+            if self.record_dir:
+                with open(os.path.join(self.record_dir, fixture_key(params)), 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+            return data
+        raise RuntimeError("API still busy after retries")
+
+    def query_pages(self, titles):
+        """Pages for up to BATCH_SIZE titles, following continuation; returns {asked title: page}"""
+        params = dict(QUERY_PARAMS, titles="|".join(titles))
+        pages, renamed = {}, {}
+        while True:
+            data = self.get(params)
+            query = data.get("query", {})
+            for entry in query.get("normalized", []) + query.get("redirects", []):
+                renamed[entry["from"]] = entry["to"]
+            for page in query.get("pages", []):
+                merged = pages.setdefault(page["title"], {})
+                for key, value in page.items():
+                    if isinstance(value, dict):
+                        merged.setdefault(key, {}).update(value)
+                    elif isinstance(value, list):
+                        merged.setdefault(key, []).extend(v for v in value if v not in merged.get(key, []))
+                    else:
+                        merged.setdefault(key, value)
+            if "continue" not in data:
+                break
+            params = dict(QUERY_PARAMS, titles="|".join(titles), **data["continue"])
+
+        results = {}
+        for title in titles:
+            resolved, seen = title, set()
+            while resolved in renamed and resolved not in seen:  # Normalised, then redirected
+                seen.add(resolved)
+                resolved = renamed[resolved]
+            results[title] = pages.get(resolved)
+        return results
+
+def page_facts(page):
+    """Stored facts of a page, or None when it does not exist"""
+    if not page or page.get("missing") or page.get("invalid"):
+        return None
+    coordinates = next((c for c in page.get("coordinates", []) if c.get("primary")), None) or \
+        next(iter(page.get("coordinates", [])), None)
+    pageprops = page.get("pageprops", {})
+    return {
+        "title": page["title"],
+        "pageid": page.get("pageid"),
+        "description": pageprops.get("wikibase-shortdesc", ""),
+        "wikidata": pageprops.get("wikibase_item", ""),
+        "lat": coordinates["lat"] if coordinates else None,
+        "lng": coordinates["lon"] if coordinates else None,
+        "extract": (page.get("extract") or "").strip(),
+    }
+
+def load_facts(path=COUNTY_FACTS_FILE):
+    """Stored county facts: {st: {directory: facts}}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_facts(facts, path=COUNTY_FACTS_FILE):
+    """Write the county facts atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(facts, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_file, path)
+
+def gather_county_facts(client, states=None, path=COUNTY_FACTS_FILE, refresh=False, batch_size=BATCH_SIZE):
+    """Query the counties not stored yet; returns (counties queried, counties not found)"""
+    facts = load_facts(path)
+    titles = county_titles(states)
+    pending = [(key, title) for key, title in titles.items()
+               if refresh or key[1] not in facts.get(key[0], {})]
+    print(f"{len(titles)} counties, {len(pending)} to query in batches of {batch_size}")
+
+    not_found = []
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        results = client.query_pages([title for _, title in batch])
+        for (st, directory), title in batch:
+            county = page_facts(results.get(title))
+            if county is None:
+                not_found.append(title)
+                continue
+            facts.setdefault(st, {})[directory] = county
+        save_facts(facts, path)
+        print(f"Queried {min(start + batch_size, len(pending))}/{len(pending)} counties ({client.requests} requests)")
+    return len(pending), not_found
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the API that answers from recorded fixture files"""
+    fixtures_dir = None
+
+    def do_GET(self):
+        params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        path = os.path.join(self.fixtures_dir, fixture_key(params))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                body = f.read()
+        else:
+            body = json.dumps({"error": {"code": "nofixture", "info": "No recorded response for this request"}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Gather Wikipedia facts for every USA_DATA county with batched API queries")
+    parser.add_argument('--state', action='append', help='Only this state (abbreviation, repeatable)')
+    parser.add_argument('--output', default=COUNTY_FACTS_FILE, help='County facts file')
+    parser.add_argument('--refresh', action='store_true', help='Query counties that are already stored too')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Titles per query (at most 50)')
+    parser.add_argument('--api-url', default=API_URL, help='MediaWiki API endpoint (or the stand-in)')
+    parser.add_argument('--record', metavar='DIR', help='Save every API response as a fixture in DIR')
+    parser.add_argument('--stand-in', action='store_true', help='Serve recorded fixtures instead of querying')
+    parser.add_argument('--fixtures', metavar='DIR', help='Fixture directory for --stand-in')
+    parser.add_argument('--port', type=int, default=STAND_IN_PORT, help='Port for --stand-in')
+    args = parser.parse_args()
+
+    if args.stand_in:
+        if not args.fixtures or not os.path.isdir(args.fixtures):
+            print("--stand-in needs --fixtures with a directory of recorded responses")
+            return
+        StandInHandler.fixtures_dir = args.fixtures
+        server = ThreadingHTTPServer(("127.0.0.1", args.port), StandInHandler)
+        print(f"Stand-in API on http://127.0.0.1:{args.port}/w/api.php")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStand-in server stopped.")
+        finally:
+            server.server_close()
+        return
+
+    states = None
+    if args.state:
+        states = {st.strip().upper() for st in args.state}
+        unknown = states - set(STATES)
+        if unknown:
+            print(f"Unknown state abbreviations: {', '.join(sorted(unknown))}")
+            return
+
+    client = ApiClient(args.api_url, args.record)
+    try:
+        queried, not_found = gather_county_facts(client, states, args.output, args.refresh, min(args.batch_size, BATCH_SIZE))
+    except Exception as e:
+        print(f"Error querying the API: {e}")
+        print(f"Counties queried so far are saved in {args.output}")
+        return
+    print(f"\n{queried} counties in {client.requests} API requests (one page fetch each would be {queried})")
+    if not_found:
+        print(f"No Wikipedia article for {len(not_found)} counties:")
+        for title in not_found[:25]:
+            print(f"  {title}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Wikipedia Extractor for State Data
+
+Fills the facts in state_data/*.json (nickname, capital, population, county
+count, largest counties and county seats) from a local snapshot of
+Wikipedia pages instead of one hand-written file per state:
+
+- The snapshot is USA_DATA/wikipedia/, two pages per state: the state
+  article and its "List of counties in X" page, saved as [Title].html
+  (python3 wiki_extract.py --fetch downloads the missing ones, one request
+  a second).
+- Only the tables are parsed: the infobox of the state article and the
+  county table of the list page. lxml is used when it is installed,
+  otherwise the standard library parser.
+- States are parsed in parallel by a process pool, so all 50 states take
+  a few seconds.
+- Extracted facts are validated (capital against the gazetteer, plausible
+  population, county table complete) before they are merged into the
+  state's JSON file. Hand-written text (economy, bail system, ...) and
+  county descriptions for unchanged counties are kept.
+
+Usage:
+  python3 wiki_extract.py                      # Extract all states into state_data/
+  python3 wiki_extract.py --state Texas        # One state
+  python3 wiki_extract.py --dry-run            # Show what would be written
+  python3 wiki_extract.py --fetch              # Download missing snapshot pages first
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+from html.parser import HTMLParser
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+from gazetteer import STATES, STATE_ABBREVIATIONS
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WIKI_CACHE_DIR = os.path.join(BASE_DIR, "..", "USA_DATA", "wikipedia")
+STATE_DATA_DIR = os.path.join(BASE_DIR, "state_data")
+WIKIPEDIA_RENDER_URL = "https://en.wikipedia.org/w/index.php?title={title}&action=render"
+USER_AGENT = "BailBondsBuddy-StateData/1.0 (https://bailbondsbuddy.com)"
+WIKIPEDIA_RATE_LIMIT = 1  # Seconds between page downloads
+DEFAULT_WORKERS = 4
+LARGEST_COUNTIES = 3
+
+# Article titles that differ from the state name
+STATE_ARTICLE_TITLES = {
+    "Georgia": "Georgia (U.S. state)",
+    "New York": "New York (state)",
+    "Washington": "Washington (state)",
+}
+COUNTY_LIST_TITLES = {
+    "Alaska": "List of boroughs and census areas in Alaska",
+    "Louisiana": "List of parishes in Louisiana",
+}
+
+FOOTNOTE_PATTERN = re.compile(r'\[(?:\d+|[a-z]|note \d+|citation needed)\]', re.I)
+NUMBER_PATTERN = re.compile(r'\d{1,3}(?:,\d{3})+|\d+')
+SKIPPED_TAGS = {"sup", "style", "script"}  # Footnote markers and inline styles
+CELL_TAGS = {"th", "td"}
+TABLE_TAG_PATTERN = re.compile(r'<(/?)table\b', re.I)
+VOID_TAGS = {"br", "img", "meta", "link", "wbr", "hr", "input", "source", "col", "area"}
+
+def state_article_title(state_name):
+    """Wikipedia title of a state's article"""
+    return STATE_ARTICLE_TITLES.get(state_name, state_name)
+
+def county_list_title(state_name):
+    """Wikipedia title of a state's county list"""
+    return COUNTY_LIST_TITLES.get(state_name, f"List of counties in {state_name}")
+
+def cache_path(title, cache_dir=WIKI_CACHE_DIR):
+    """Snapshot file of a Wikipedia page"""
+    return os.path.join(cache_dir, title.replace(' ', '_') + ".html")
+
+def clean_text(text):
+    """Cell text without footnote markers and extra whitespace"""
+    text = re.sub(r'[^\S\n]+', ' ', FOOTNOTE_PATTERN.sub('', text))
+    return re.sub(r' ?\n[\s]*', '\n', text).strip()
+
+class TableParser(HTMLParser):
+    """Collect the rows of every table: [(classes, [[(tag, text), ...], ...])]"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._stack = []  # Open tables (nested ones inside cells too): [classes, rows, row, cell]
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._skip or tag in SKIPPED_TAGS or "display:none" in (attrs.get("style") or "").replace(" ", ""):
+            if tag not in VOID_TAGS:
+                self._skip += 1
+            return
+        if tag == "table":
+            self._stack.append([(attrs.get("class") or "").split(), [], None, None])
+            return
+        if not self._stack:
+            return
+        table = self._stack[-1]
+        if tag == "tr":
+            table[2] = []
+        elif tag in CELL_TAGS and table[2] is not None:
+            table[3] = (tag, [])
+        elif tag == "br" and table[3]:
+            table[3][1].append("\n")
+
+    def handle_endtag(self, tag):
+        if self._skip:
+            if tag not in VOID_TAGS:
+                self._skip -= 1
+            return
+        if not self._stack:
+            return
+        table = self._stack[-1]
+        if tag in CELL_TAGS and table[3]:
+            table[2].append((table[3][0], "".join(table[3][1])))
+            table[3] = None
+        elif tag == "tr" and table[2] is not None:
+            table[1].append(table[2])
+            table[2] = None
+        elif tag == "table":
+            self._stack.pop()
+            self.tables.append((table[0], table[1]))
+
+    def handle_data(self, data):
+        if self._stack and self._stack[-1][3] and not self._skip:
+            self._stack[-1][3][1].append(data)
+
+def _lxml_tables(html):
+    """parse_tables() with lxml, for when it is installed"""
+    from lxml import html as lxml_html
+
+    document = lxml_html.fromstring(html)
+    for node in document.xpath('//sup | //style | //script | //*[contains(translate(@style, " ", ""), "display:none")]'):
+        node.drop_tree()
+    for br in document.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    tables = []
+    for table in document.iter("table"):
+        rows = []
+        for tr in table.xpath('./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr'):
+            rows.append([(cell.tag, cell.text_content()) for cell in tr if cell.tag in CELL_TAGS])
+        tables.append(((table.get("class") or "").split(), rows))
+    return tables
+
+def table_markup(html):
+    """Only the top-level <table> elements of a page, so the parser skips the article text"""
+    spans, depth, start = [], 0, 0
+    for match in TABLE_TAG_PATTERN.finditer(html):
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                spans.append(html[start:html.find('>', match.end()) + 1])
+    return "\n".join(spans)
+
+def parse_tables(html):
+    """Tables of a page as (classes, rows of (tag, cleaned text))"""
+    html = table_markup(html)
+    if not html:
+        return []
+    try:
+        tables = _lxml_tables(html)
+    except ImportError:
+        parser = TableParser()
+        parser.feed(html)
+        parser.close()
+        tables = parser.tables
+    return [(classes, [[(tag, clean_text(text)) for tag, text in row] for row in rows]) for classes, rows in tables]
+
+def parse_number(text):
+    """First number in a text (commas allowed), or None"""
+    match = NUMBER_PATTERN.search(text or "")
+    return int(match.group(0).replace(',', '')) if match else None
+
+def first_item(text):
+    """First entry of a list-like infobox value ("Old Line State, Free State" → "Old Line State")"""
+    item = re.split(r'[\n;,]|\s\(', text or "")[0].strip().strip('"“”')
+    return re.sub(r'^the\s+', '', item, flags=re.I)
+
+def parse_infobox(html):
+    """Nickname, capital and population from a state article's infobox"""
+    infobox = next((rows for classes, rows in parse_tables(html) if "infobox" in classes), None)
+    facts = {}
+    if not infobox:
+        return facts
+    section = ""
+    for row in infobox:
+        if len(row) == 1 and row[0][0] == "th":
+            section = row[0][1].lower()  # Section heading such as "Population"
+            continue
+        if len(row) < 2:
+            continue
+        label = row[0][1].lstrip("• ").replace('\n', ' ').lower()
+        value = row[-1][1]
+        if label.startswith("nickname") and "nickname" not in facts:
+            facts["nickname"] = first_item(value)
+        elif label == "capital" and "capital" not in facts:
+            facts["capital"] = first_item(value)
+        elif "population" not in facts and (label == "population" or (section.startswith("population") and label == "total")):
+            facts["population"] = parse_number(value)
+    return facts
+
+def _column(header, *words, exclude=()):
+    """Index of the first header cell containing one of the words, or None"""
+    for i, (_, text) in enumerate(header):
+        lowered = text.lower()
+        if any(word in lowered for word in words) and not any(word in lowered for word in exclude):
+            return i
+    return None
+
+def parse_county_table(html):
+    """Counties from a county list page: [{"name", "seat", "population"}]"""
+    for classes, rows in parse_tables(html):
+        if "wikitable" not in classes or not rows:
+            continue
+        header = rows[0]
+        name_col = _column(header, "county", "parish", "borough", "census area", exclude=("seat", "fips"))
+        population_col = _column(header, "population", "pop.", exclude=("density", "change"))
+        if name_col is None or population_col is None:
+            continue
+        seat_col = _column(header, "seat")
+        counties = []
+        for row in rows[1:]:
+            if len(row) <= max(name_col, population_col):
+                continue
+            name = row[name_col][1].replace('\n', ' ')
+            population = parse_number(row[population_col][1])
+            if not name or population is None or name.lower().startswith(("total", "state of")):
+                continue
+            seat = first_item(row[seat_col][1]) if seat_col is not None and seat_col < len(row) else ""
+            if seat.lower() in ("n/a", "none") or not re.search(r'[a-z]', seat, re.I):
+                seat = ""  # Independent cities and consolidated counties
+            counties.append({"name": name, "seat": seat, "population": population})
+        if counties:
+            return counties
+    return []
+
+def read_cached(title, cache_dir=WIKI_CACHE_DIR):
+    """HTML of a snapshot page, or None when it is missing"""
+    path = cache_path(title, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def county_description(county):
+    """Short description of one of the largest counties"""
+    text = f"Population {county['population']:,}"
+    if county.get("seat"):
+        text += f", county seat {county['seat']}"
+    return text
+
+def extract_state(state_name, cache_dir=WIKI_CACHE_DIR):
+    """Facts for a state from its snapshot pages; returns (facts, missing page titles)"""
+    missing = []
+    facts = {"name": state_name, "abbreviation": STATE_ABBREVIATIONS.get(state_name.lower(), "")}
+
+    article = read_cached(state_article_title(state_name), cache_dir)
+    if article is None:
+        missing.append(state_article_title(state_name))
+    else:
+        facts.update(parse_infobox(article))
+
+    county_list = read_cached(county_list_title(state_name), cache_dir)
+    if county_list is None:
+        missing.append(county_list_title(state_name))
+    else:
+        counties = parse_county_table(county_list)
+        largest = sorted(counties, key=lambda county: -county["population"])[:LARGEST_COUNTIES]
+        facts["num_counties"] = len(counties)
+        facts["largest_counties"] = [{"name": c["name"], "description": county_description(c)} for c in largest]
+        facts["county_seats"] = {c["name"]: c["seat"] for c in counties if c["seat"]}
+    return facts, missing
+
+def validate_facts(facts):
+    """Problems with extracted facts (empty when they can be written)"""
+    problems = []
+    abbr = facts.get("abbreviation")
+    if not facts.get("nickname"):
+        problems.append("no nickname")
+    if not facts.get("capital"):
+        problems.append("no capital")
+    elif abbr in STATES and facts["capital"].lower() != STATES[abbr][1].lower():
+        problems.append(f"capital {facts['capital']!r} is not {STATES[abbr][1]}")
+    if not isinstance(facts.get("population"), int) or not 100_000 <= facts["population"] <= 60_000_000:
+        problems.append(f"implausible population {facts.get('population')!r}")
+    if not facts.get("num_counties"):
+        problems.append("no county table")
+    elif len(facts.get("largest_counties") or []) < min(LARGEST_COUNTIES, facts["num_counties"]):
+        problems.append("too few counties")
+    return problems
+
+def state_data_file(state_name, state_data_dir=STATE_DATA_DIR):
+    """state_data file of a state (the one naming rule; the page generator reads and writes it through this)"""
+    return os.path.join(state_data_dir, f"{state_name.lower().replace(' ', '_')}.json")
+
+def merge_facts(existing, facts):
+    """State data with the extracted facts, keeping the hand-written fields"""
+    merged = dict(existing)
+    old_counties = {c.get("name"): c.get("description") for c in existing.get("largest_counties") or []}
+    largest = [dict(c, description=old_counties.get(c["name"]) or c["description"]) for c in facts.get("largest_counties", [])]
+    merged.update(facts)
+    merged["largest_counties"] = largest
+    return merged
+
+def write_state_data(state_name, facts, state_data_dir=STATE_DATA_DIR):
+    """Merge facts into a state's JSON file; returns True if it changed"""
+    path = state_data_file(state_name, state_data_dir)
+    existing = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    merged = merge_facts(existing, facts)
+    if merged == existing:
+        return False
+    os.makedirs(state_data_dir, exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
+    return True
+
+def fetch_pages(titles, cache_dir=WIKI_CACHE_DIR):
+    """Download snapshot pages that are missing; returns the titles downloaded"""
+    import requests
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    os.makedirs(cache_dir, exist_ok=True)
+    fetched = []
+    for title in titles:
+        path = cache_path(title, cache_dir)
+        if os.path.exists(path):
+            continue
+        try:
+            response = session.get(WIKIPEDIA_RENDER_URL.format(title=quote(title.replace(' ', '_'))), timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error downloading {title}: {e}")
+            continue
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        os.replace(path + ".tmp", path)
+        fetched.append(title)
+        time.sleep(WIKIPEDIA_RATE_LIMIT)
+    return fetched
+
+def extract_states(state_names, cache_dir=WIKI_CACHE_DIR, state_data_dir=STATE_DATA_DIR,
+                   workers=DEFAULT_WORKERS, dry_run=False):
+    """Extract and write the facts for several states; returns (written, failed) state names"""
+    written, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(extract_state, state_names, [cache_dir] * len(state_names))
+        for state_name, (facts, missing) in zip(state_names, results):
+            problems = ([f"missing snapshot page {title!r}" for title in missing] or validate_facts(facts))
+            if problems:
+                print(f"✗ {state_name}: {'; '.join(problems)}")
+                failed.append(state_name)
+                continue
+            summary = (f"{facts['nickname']}, capital {facts['capital']}, population {facts['population']:,}, "
+                       f"{facts['num_counties']} counties")
+            if dry_run:
+                print(f"  {state_name}: {summary}")
+                continue
+            if write_state_data(state_name, facts, state_data_dir):
+                print(f"✓ {state_name}: {summary}")
+                written.append(state_name)
+            else:
+                print(f"✓ {state_name}: {summary} (unchanged)")
+    return written, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract state facts from a local Wikipedia snapshot into state_data/")
+    parser.add_argument('--state', action='append', help='Only this state (repeatable)')
+    parser.add_argument('--snapshot', default=WIKI_CACHE_DIR, help='Directory with the saved Wikipedia pages')
+    parser.add_argument('--output', default=STATE_DATA_DIR, help='state_data directory to write')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Processes parsing pages')
+    parser.add_argument('--fetch', action='store_true', help='Download missing snapshot pages first')
+    parser.add_argument('--dry-run', action='store_true', help='Show the facts without writing them')
+    args = parser.parse_args()
+
+    state_names = [name for name, _ in STATES.values()]
+    if args.state:
+        by_name = {name.lower(): name for name in state_names}
+        unknown = [s for s in args.state if s.strip().lower() not in by_name]
+        if unknown:
+            print(f"Unknown states: {', '.join(unknown)}")
+            return
+        state_names = [by_name[s.strip().lower()] for s in args.state]
+
+    if args.fetch:
+        titles = [title for name in state_names for title in (state_article_title(name), county_list_title(name))]
+        print(f"Downloaded {len(fetch_pages(titles, args.snapshot))} pages")
+
+    started = time.perf_counter()
+    written, failed = extract_states(state_names, args.snapshot, args.output, args.workers, args.dry_run)
+    print(f"\n{len(state_names) - len(failed)} of {len(state_names)} states extracted in "
+          f"{time.perf_counter() - started:.1f}s" + (f", {len(written)} written" if not args.dry_run else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Work Queue for Distributed Page Generation
+
+A durable, SQLite-backed queue of locations (states now, counties and
+cities later). Locations are enqueued once and claimed by any number of
+worker processes, so throughput grows with the number of workers instead
+of with hand-made A-M / N-Z splits.
+
+- Claims are leases: a worker owns a job until its lease expires.
+- Workers heartbeat while they work; a crashed worker's job is claimed
+  again once its lease runs out.
+- Failed jobs are retried until they reach max_attempts.
+- A worker that loses its lease (another worker took the job over) drops
+  its result instead of completing the job; handlers call
+  job["lease"].check() before side effects such as uploads.
+
+Workers on other machines can share the queue file (the database uses a
+rollback journal, which works on shared filesystems that support locking)
+or talk to the small XML-RPC stand-in broker started with --serve. The
+broker has no authentication and binds to 127.0.0.1 unless --host is given;
+only expose it on a trusted network.
+
+Usage:
+  python3 work_queue.py --stats                    # Show job counts by status
+  python3 work_queue.py --serve --port 8765        # Share the queue with other machines
+  python3 work_queue.py --retry-failed             # Put failed jobs back in the queue
+
+  python3 improved_page_generator_part3.py --enqueue            # Queue all states
+  python3 improved_page_generator_part3.py --worker --workers 4 # Work the queue
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from xmlrpc.server import SimpleXMLRPCServer
+from socketserver import ThreadingMixIn
+from xmlrpc.client import ServerProxy
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_FILE = os.path.join(BASE_DIR, "work_queue.db")
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+DEFAULT_BROKER_PORT = 8765
+DEFAULT_BROKER_HOST = "127.0.0.1"  # The broker is unauthenticated
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    location TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, lease_expires);
+"""
+
+def default_worker_id():
+    """Worker name that is unique across machines and processes"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class WorkQueue:
+    """SQLite-backed queue with leases, heartbeats and retry counts"""
+
+    def __init__(self, path=QUEUE_FILE, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # A connection per call keeps the queue usable from threads and the broker
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _write(self, sql, params=()):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def enqueue(self, locations, kind="state", priority=0, payload=None):
+        """Add locations that are not queued yet; returns how many were added"""
+        now = time.time()
+        rows = [(location, kind, json.dumps(payload), priority, now) for location in locations]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (location, kind, payload, priority, updated) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def claim(self, worker_id, kind=None):
+        """Lease the next available job; returns a job dict or None when nothing is claimable"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose worker died on their last attempt will not be retried
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', last_error = COALESCE(last_error, 'lease expired'), lease_owner = NULL
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, self.max_attempts)
+            )
+            sql = """SELECT location, kind, payload, attempts FROM jobs
+                     WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                       AND attempts < ?"""
+            params = [now, self.max_attempts]
+            if kind:
+                sql += " AND kind = ?"
+                params.append(kind)
+            row = conn.execute(sql + " ORDER BY priority DESC, rowid LIMIT 1", params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                   attempts = attempts + 1, updated = ? WHERE location = ?""",
+                (worker_id, now + self.lease_seconds, now, row["location"])
+            )
+            conn.execute("COMMIT")
+            return {"location": row["location"], "kind": row["kind"],
+                    "payload": json.loads(row["payload"]) if row["payload"] else None,
+                    "attempt": row["attempts"] + 1}
+        finally:
+            conn.close()
+
+    def heartbeat(self, location, worker_id):
+        """Extend a lease; returns False if the worker no longer owns the job"""
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET lease_expires = ?, updated = ? WHERE location = ? AND status = 'leased' AND lease_owner = ?",
+            (now + self.lease_seconds, now, location, worker_id)
+        ) == 1
+
+    def complete(self, location, worker_id, result=None):
+        """Mark a leased job as done; returns False if the worker no longer owns it"""
+        return self._write(
+            "UPDATE jobs SET status = 'done', result = ?, last_error = NULL, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE location = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(result), time.time(), location, worker_id)
+        ) == 1
+
+    def fail(self, location, worker_id, error):
+        """Release a leased job after an error; it is retried until max_attempts is reached"""
+        return self._write(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "last_error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE location = ? AND lease_owner = ?",
+            (self.max_attempts, str(error), time.time(), location, worker_id)
+        ) == 1
+
+    def retry_failed(self):
+        """Give failed jobs a fresh set of attempts"""
+        return self._write(
+            "UPDATE jobs SET status = 'pending', attempts = 0, updated = ? WHERE status = 'failed'",
+            (time.time(),)
+        )
+
+    def stats(self):
+        """Job counts by status, plus failures with their last error"""
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            failed = dict(conn.execute("SELECT location, last_error FROM jobs WHERE status = 'failed'").fetchall())
+        finally:
+            conn.close()
+        return {"counts": counts, "failed": failed}
+
+class RemoteQueue:
+    """Client for a queue shared through the --serve broker (same methods as WorkQueue)"""
+
+    def __init__(self, url):
+        self.url = url
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        # ServerProxy is not thread-safe, so each thread gets its own
+        if not hasattr(self._local, "proxy"):
+            self._local.proxy = ServerProxy(self.url, allow_none=True)
+        return getattr(self._local.proxy, name)
+
+class LeaseLost(Exception):
+    """The worker no longer owns the job it is working on"""
+
+class Heartbeat:
+    """Context manager that keeps a job's lease alive from a background thread"""
+
+    def __init__(self, queue, location, worker_id, interval):
+        self.queue = queue
+        self.location = location
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.location, self.worker_id):
+                    self.lost = True
+                    print(f"Warning: lease on {self.location} was lost")
+                    return
+            except Exception as e:
+                print(f"Warning: heartbeat for {self.location} failed: {e}")
+
+    def check(self):
+        """Renew the lease now; raise LeaseLost if another worker may have taken the job over"""
+        if not self.lost and not self.queue.heartbeat(self.location, self.worker_id):
+            self.lost = True
+        if self.lost:
+            raise LeaseLost(f"lease on {self.location} was lost")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def open_queue(queue_file=QUEUE_FILE, broker_url=None):
+    """Return the shared queue: through the broker when a URL is given, else the SQLite file"""
+    if broker_url:
+        return RemoteQueue(broker_url)
+    return WorkQueue(queue_file)
+
+def run_worker(queue, handler, worker_id=None, kind=None, lease_seconds=LEASE_SECONDS):
+    """Claim and process jobs until the queue has nothing left to claim; returns (done, failed)"""
+    worker_id = worker_id or default_worker_id()
+    done = failed = lost = 0
+    while True:
+        job = queue.claim(worker_id, kind)
+        if not job:
+            break
+        print(f"[{worker_id}] {job['location']} (attempt {job['attempt']})")
+        with Heartbeat(queue, job["location"], worker_id, max(1, lease_seconds / 3)) as lease:
+            job["lease"] = lease
+            try:
+                result = handler(job)
+            except LeaseLost as e:
+                lost += 1
+                print(f"[{worker_id}] {job['location']} dropped: {e}")
+                continue
+            except Exception as e:
+                queue.fail(job["location"], worker_id, str(e))
+                failed += 1
+                print(f"[{worker_id}] {job['location']} failed: {e}")
+                continue
+        # complete() only succeeds while this worker still holds the lease
+        if queue.complete(job["location"], worker_id, result):
+            done += 1
+        else:
+            lost += 1
+            print(f"[{worker_id}] {job['location']} dropped: lease expired before the job was completed")
+    print(f"[{worker_id}] queue drained: {done} done, {failed} failed" + (f", {lost} lost to other workers" if lost else ""))
+    return done, failed
+
+class ThreadingXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+def serve_queue(queue_file=QUEUE_FILE, host=DEFAULT_BROKER_HOST, port=DEFAULT_BROKER_PORT):
+    """Expose a queue file over XML-RPC for workers that cannot share the file"""
+    queue = WorkQueue(queue_file)
+    server = ThreadingXMLRPCServer((host, port), allow_none=True, logRequests=False)
+    for name in ("enqueue", "claim", "heartbeat", "complete", "fail", "retry_failed", "stats"):
+        server.register_function(getattr(queue, name), name)
+    print(f"Serving {queue_file} on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nBroker stopped.")
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, share or reset the page generation work queue")
+    parser.add_argument('--queue', default=QUEUE_FILE, help='Queue database file (default: work_queue.db)')
+    parser.add_argument('--broker', help='URL of a queue broker instead of the local file')
+    parser.add_argument('--stats', action='store_true', help='Show job counts by status')
+    parser.add_argument('--retry-failed', action='store_true', help='Give failed jobs a fresh set of attempts')
+    parser.add_argument('--serve', action='store_true', help='Serve the queue file over XML-RPC')
+    parser.add_argument('--host', default=DEFAULT_BROKER_HOST,
+                        help='Broker host to bind (default: 127.0.0.1; the broker has no authentication)')
+    parser.add_argument('--port', type=int, default=DEFAULT_BROKER_PORT, help='Broker port (default: 8765)')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_queue(args.queue, args.host, args.port)
+        return
+
+    queue = open_queue(args.queue, args.broker)
+    if args.retry_failed:
+        print(f"Requeued {queue.retry_failed()} failed jobs")
+    stats = queue.stats()
+    print(", ".join(f"{status}: {count}" for status, count in sorted(stats["counts"].items())) or "Queue is empty")
+    for location, error in sorted(stats["failed"].items()):
+        print(f"  {location}: {error}")
+
+if __name__ == "__main__":
+    main()
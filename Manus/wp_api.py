@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+WordPress REST API Session for Bail Bonds Buddy Scripts
+
+One pooled, retrying requests.Session shared by the publishing scripts,
+so concurrent uploads reuse keep-alive connections instead of opening a
+new TLS connection per request, plus a helper that sweeps paginated
+collections (/wp/v2/media, /wp/v2/pages, ...) with parallel page fetches.
+
+Usage:
+  from wp_api import get_session, api_url, iter_collection
+
+  session = get_session()
+  response = session.post(api_url("pages"), json=page_data, timeout=30)
+  for item in iter_collection("media", {"_fields": "id,source_url"}):
+      ...
+"""
+
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# WordPress API details
+WP_BASE_URL = "https://bailbondsbuddy.com"
+WP_API_URL = f"{WP_BASE_URL}/wp-json/wp/v2"
+WP_AUTH = ("bbbuddy", "DpSm eiz8 yHjx Sqqk G3lG fqU6")
+
+POOL_SIZE = 16  # Keep-alive connections kept open to the site
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_TIMEOUT = 30
+PER_PAGE = 100  # Largest page size the REST API allows
+
+@lru_cache(maxsize=None)
+def get_session(pool_size=POOL_SIZE):
+    """Return the shared session (created on first use)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.auth = WP_AUTH
+    # Only idempotent requests are retried automatically; a retried POST could create a duplicate
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=RETRY_STATUSES, respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def api_url(endpoint):
+    """Full URL for a /wp/v2 endpoint such as 'pages' or 'media/12'"""
+    return f"{WP_API_URL}/{endpoint.lstrip('/')}"
+
+def get_page(endpoint, params, page, per_page=PER_PAGE):
+    """Fetch one page of a collection; returns (items, total_pages)"""
+    response = get_session().get(api_url(endpoint), params=dict(params, page=page, per_page=per_page), timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response.json(), int(response.headers.get("X-WP-TotalPages", 1))
+
+def iter_collection(endpoint, params=None, per_page=PER_PAGE, workers=4):
+    """Yield every item of a paginated collection, fetching the remaining pages in parallel"""
+    params = dict(params or {})
+    items, total_pages = get_page(endpoint, params, 1, per_page)
+    yield from items
+    if total_pages <= 1:
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages = pool.map(lambda page: get_page(endpoint, params, page, per_page)[0], range(2, total_pages + 1))
+        for items in pages:
+            yield from items
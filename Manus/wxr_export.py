@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+WXR Bulk Exporter for Bail Bonds Buddy Pages
+
+Streams every generated page into WordPress eXtended RSS (WXR) files for a
+server-side import (Tools → Import → WordPress, or `wp import`), instead of
+one REST call per page. State pages come from generated_pages/*.json, county
+profile pages from USA_DATA/county_profiles/[ST]/[county].html, and city pages
+from USA_DATA/county_profiles/[ST]/[county]/[city].html when present.
+
+Pages are exported state by state with parents before children, and only
+one page is read at a time. Output is split into chunk files of bounded
+size, written in parallel by a small thread pool. The WordPress importer
+only resolves parents it has seen in the same file, so each chunk starts
+by repeating the ancestors of its first page; the importer matches those
+to the pages it already created (same title and date) instead of
+duplicating them. Every page gets its own post date, counted back one second
+per page from the export time, so same-titled pages in different states, such
+as two "Washington County" profiles, are never mistaken for one another, and
+no date lies in the future (WordPress would schedule a published page dated
+ahead instead of publishing it). post_date is written in the site's timezone
+and post_date_gmt in UTC, as WordPress reads them.
+
+Usage:
+  python3 wxr_export.py                          # Export everything to wxr_export/
+  python3 wxr_export.py --max-mb 4 --workers 8   # Smaller chunks, more writers
+  python3 wxr_export.py --status publish         # Import pages as published
+  python3 wxr_export.py --timezone America/Chicago  # Site timezone for post_date
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATED_PAGES_DIR = os.path.join(BASE_DIR, "generated_pages")
+COUNTY_PROFILES_DIR = os.path.join(BASE_DIR, "..", "USA_DATA", "county_profiles")
+EXPORT_DIR = os.path.join(BASE_DIR, "wxr_export")
+WP_BASE_URL = "https://bailbondsbuddy.com"
+WXR_AUTHOR = "bbbuddy"  # WordPress login the imported pages are assigned to
+
+DEFAULT_MAX_MB = 8  # Keep chunks under common upload_max_filesize limits
+DEFAULT_WORKERS = 4
+DEFAULT_START_ID = 100000  # post_id values used inside the export files
+SLUG_MAX_LENGTH = 100  # State page slugs are cut to this length before upload
+SITE_TIMEZONE = "America/New_York"  # Settings → General → Timezone on the WordPress site
+
+# Divi meta set on every exported page (_et_pb_use_builder depends on the content)
+PAGE_META = {
+    "_et_pb_page_layout": "et_no_sidebar",
+    "_et_pb_side_nav": "off",
+    "_wp_page_template": "page-template-blank.php"
+}
+
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming'
+}
+
+INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+TITLE_PATTERN = re.compile(r'<title>(.*?)</title>', re.S | re.I)
+HEAD_PATTERN = re.compile(r'<head\b[^>]*>(.*?)</head>', re.S | re.I)
+BODY_PATTERN = re.compile(r'<body\b[^>]*>(.*)</body>', re.S | re.I)
+HEAD_ASSET_PATTERN = re.compile(r'<(style|script)\b.*?</\1>', re.S | re.I)
+
+def state_page_title(state_name):
+    """Title used for state pages (same as the REST uploaders)"""
+    return f"Find Local {state_name} Bail Bondsmen Near You | 24/7 Emergency Service"
+
+def state_page_slug(state_name):
+    """Slug used for state pages; the REST uploaders and link_checker.py import this rule"""
+    slug = f"{state_name.lower().replace(' ', '-')}-bail-bondsman-24-hour-emergency-service-nearby"
+    return slug[:SLUG_MAX_LENGTH]
+
+def read_state_page(json_path):
+    """Return the Divi content string from a generated state page JSON"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        page_json = json.load(f)
+    data = page_json.get("data")
+    if not isinstance(data, dict) or not data:
+        return None
+    return next(iter(data.values()))
+
+def read_html_page(html_path):
+    """Return (title, content) for a generated HTML page: head styles/scripts plus the body"""
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    title_match = TITLE_PATTERN.search(html)
+    title = title_match.group(1).strip() if title_match else None
+
+    body_match = BODY_PATTERN.search(html)
+    if not body_match:
+        return title, html
+    head_match = HEAD_PATTERN.search(html)
+    assets = [m.group(0) for m in HEAD_ASSET_PATTERN.finditer(head_match.group(1))] if head_match else []
+    return title, "\n".join(assets + [body_match.group(1).strip()])
+
+def page_name_from_file(filename):
+    """Turn a file name like harris-county.html into Harris County"""
+    return os.path.splitext(filename)[0].replace('-', ' ').replace('_', ' ').title()
+
+def find_state_pages(generated_dir):
+    """Map state abbreviations to their generated JSON page (files not named after a state are skipped)"""
+    abbr_by_slug = {name.lower().replace(' ', '_'): abbr for abbr, name in STATE_NAMES.items()}
+    pages = {}
+    if os.path.isdir(generated_dir):
+        for filename in os.listdir(generated_dir):
+            name, ext = os.path.splitext(filename)
+            slug = re.sub(r'[\s-]+', '_', name.lower())  # new_mexico.json, "new mexico.json" (cline generator)
+            if ext == ".json" and slug in abbr_by_slug:
+                path = os.path.join(generated_dir, filename)
+                previous = pages.get(abbr_by_slug[slug])
+                if previous is None or os.path.getmtime(path) > os.path.getmtime(previous):  # Newest of both spellings
+                    pages[abbr_by_slug[slug]] = path
+    return pages
+
+def list_html_files(directory):
+    """Sorted .html files in a directory (empty if it does not exist)"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f for f in os.listdir(directory) if f.endswith(".html"))
+
+def iter_pages(generated_dir=GENERATED_PAGES_DIR, county_dir=COUNTY_PROFILES_DIR, start_id=DEFAULT_START_ID):
+    """Yield pages state by state, parents first, reading one page file at a time"""
+    state_pages = find_state_pages(generated_dir)
+    county_states = set()
+    if os.path.isdir(county_dir):
+        county_states = {d for d in os.listdir(county_dir) if d in STATE_NAMES}
+
+    next_id = start_id
+    for abbr in sorted(set(state_pages) | county_states, key=lambda a: STATE_NAMES[a]):
+        state_name = STATE_NAMES[abbr]
+        state_id = 0
+        if abbr in state_pages:
+            content = read_state_page(state_pages[abbr])
+            if content:
+                state_id = next_id
+                next_id += 1
+                yield {"post_id": state_id, "parent_id": 0, "depth": 0, "state": abbr,
+                       "title": state_page_title(state_name), "slug": state_page_slug(state_name),
+                       "content": content}
+        if not state_id and abbr in county_states:
+            print(f"Warning: no generated state page for {state_name}; its county pages are exported without a parent")
+
+        state_county_dir = os.path.join(county_dir, abbr)
+        for county_file in list_html_files(state_county_dir):
+            title, content = read_html_page(os.path.join(state_county_dir, county_file))
+            county_id = next_id
+            next_id += 1
+            yield {"post_id": county_id, "parent_id": state_id, "depth": 1, "state": abbr,
+                   "title": title or f"{page_name_from_file(county_file)}, {state_name}",
+                   "slug": os.path.splitext(county_file)[0], "content": content}
+
+            city_dir = os.path.join(state_county_dir, os.path.splitext(county_file)[0])
+            for city_file in list_html_files(city_dir):
+                title, content = read_html_page(os.path.join(city_dir, city_file))
+                city_id = next_id
+                next_id += 1
+                yield {"post_id": city_id, "parent_id": county_id, "depth": 2, "state": abbr,
+                       "title": title or f"{page_name_from_file(city_file)}, {state_name}",
+                       "slug": os.path.splitext(city_file)[0], "content": content}
+
+def cdata(text):
+    """Wrap text in a CDATA section, splitting any ']]>' it contains"""
+    return "<![CDATA[" + INVALID_XML_CHARS.sub("", text).replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+def render_item(page, post_date, post_date_gmt, status):
+    """Render one page as a WXR <item>"""
+    meta = dict(PAGE_META)
+    meta["_et_pb_use_builder"] = "on" if page["content"].lstrip().startswith("[et_pb_") else "off"
+    meta_xml = "".join(
+        f"\n\t\t<wp:postmeta>\n\t\t\t<wp:meta_key>{key}</wp:meta_key>\n\t\t\t<wp:meta_value>{cdata(value)}</wp:meta_value>\n\t\t</wp:postmeta>"
+        for key, value in meta.items()
+    )
+    title = escape(INVALID_XML_CHARS.sub("", page["title"]))
+    return f"""
+	<item>
+		<title>{title}</title>
+		<link>{WP_BASE_URL}/?page_id={page["post_id"]}</link>
+		<dc:creator>{cdata(WXR_AUTHOR)}</dc:creator>
+		<guid isPermaLink="false">{WP_BASE_URL}/?page_id={page["post_id"]}</guid>
+		<description></description>
+		<content:encoded>{cdata(page["content"])}</content:encoded>
+		<excerpt:encoded><![CDATA[]]></excerpt:encoded>
+		<wp:post_id>{page["post_id"]}</wp:post_id>
+		<wp:post_date>{cdata(post_date)}</wp:post_date>
+		<wp:post_date_gmt>{cdata(post_date_gmt)}</wp:post_date_gmt>
+		<wp:comment_status><![CDATA[closed]]></wp:comment_status>
+		<wp:ping_status><![CDATA[closed]]></wp:ping_status>
+		<wp:post_name>{cdata(page["slug"])}</wp:post_name>
+		<wp:status>{cdata(status)}</wp:status>
+		<wp:post_parent>{page["parent_id"]}</wp:post_parent>
+		<wp:menu_order>0</wp:menu_order>
+		<wp:post_type><![CDATA[page]]></wp:post_type>
+		<wp:post_password><![CDATA[]]></wp:post_password>
+		<wp:is_sticky>0</wp:is_sticky>{meta_xml}
+	</item>"""
+
+def render_header(chunk_number):
+    """Opening of a WXR file, including the channel and author block"""
+    return f"""<?xml version="1.0" encoding="UTF-8" ?>
+<rss version="2.0"
+	xmlns:excerpt="http://wordpress.org/export/1.2/excerpt/"
+	xmlns:content="http://purl.org/rss/1.0/modules/content/"
+	xmlns:wfw="http://wellformedweb.org/CommentAPI/"
+	xmlns:dc="http://purl.org/dc/elements/1.1/"
+	xmlns:wp="http://wordpress.org/export/1.2/"
+>
+<channel>
+	<title>Bail Bonds Buddy pages (part {chunk_number})</title>
+	<link>{WP_BASE_URL}</link>
+	<description></description>
+	<language>en-US</language>
+	<wp:wxr_version>1.2</wp:wxr_version>
+	<wp:base_site_url>{WP_BASE_URL}</wp:base_site_url>
+	<wp:base_blog_url>{WP_BASE_URL}</wp:base_blog_url>
+	<wp:author>
+		<wp:author_login>{cdata(WXR_AUTHOR)}</wp:author_login>
+		<wp:author_display_name>{cdata(WXR_AUTHOR)}</wp:author_display_name>
+	</wp:author>
+"""
+
+WXR_FOOTER = "\n</channel>\n</rss>\n"
+
+def write_chunk(output_dir, chunk_number, items):
+    """Write one WXR chunk file (runs in the writer pool)"""
+    path = os.path.join(output_dir, f"bbb-pages-{chunk_number:03d}.xml")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_header(chunk_number))
+        f.writelines(items)
+        f.write(WXR_FOOTER)
+    os.replace(tmp_path, path)
+    return path
+
+def export_wxr(output_dir=EXPORT_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, workers=DEFAULT_WORKERS,
+               status="draft", generated_dir=GENERATED_PAGES_DIR, county_dir=COUNTY_PROFILES_DIR,
+               start_id=DEFAULT_START_ID, site_timezone=SITE_TIMEZONE):
+    """Stream all pages into size-bounded WXR chunks; returns (page count, chunk paths)"""
+    site_tz = ZoneInfo(site_timezone)
+    os.makedirs(output_dir, exist_ok=True)
+    export_time = datetime.now(timezone.utc).replace(microsecond=0)
+
+    # At most workers * 2 chunks are buffered or being written at once
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    futures = []
+    chunk_number = 0
+    items, size, own_items = [], 0, 0
+    ancestors = []  # Rendered items of the current page's parents, by depth
+    page_count = 0
+
+    def submit(chunk_items):
+        nonlocal chunk_number
+        chunk_number += 1
+        in_flight.acquire()
+        future = pool.submit(write_chunk, output_dir, chunk_number, chunk_items)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for page in iter_pages(generated_dir, county_dir, start_id):
+            # A unique date per page: the importer skips a page whose title and date it has already seen.
+            # Counted backwards, so a published page is never dated in the future
+            post_date = export_time - timedelta(seconds=page["post_id"] - start_id)
+            item = render_item(page, post_date.astimezone(site_tz).strftime("%Y-%m-%d %H:%M:%S"),
+                               post_date.strftime("%Y-%m-%d %H:%M:%S"), status)
+            item_size = len(item.encode('utf-8'))
+            ancestors = ancestors[:page["depth"]]
+
+            if own_items and size + item_size > max_bytes:
+                submit(items)
+                # Repeat the ancestors so the importer can resolve post_parent in this file
+                items = list(ancestors)
+                size = sum(len(a.encode('utf-8')) for a in ancestors)
+                own_items = 0
+
+            items.append(item)
+            size += item_size
+            own_items += 1
+            ancestors.append(item)
+            page_count += 1
+
+        if own_items:
+            submit(items)
+
+    paths = [future.result() for future in futures]
+    return page_count, paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Export generated pages to chunked WXR files for a WordPress import")
+    parser.add_argument('--output', default=EXPORT_DIR, help='Directory for the WXR files (default: wxr_export/)')
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB, help='Approximate maximum size of each WXR file in MB')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of chunk files written in parallel')
+    parser.add_argument('--status', default="draft", choices=["draft", "publish", "pending", "private"], help='Status of the imported pages')
+    parser.add_argument('--pages-dir', default=GENERATED_PAGES_DIR, help='Directory of generated state page JSON files')
+    parser.add_argument('--counties-dir', default=COUNTY_PROFILES_DIR, help='Directory of generated county profile pages')
+    parser.add_argument('--start-id', type=int, default=DEFAULT_START_ID, help='First post_id used in the export')
+    parser.add_argument('--timezone', default=SITE_TIMEZONE, help=f'WordPress site timezone for post_date (default: {SITE_TIMEZONE})')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    page_count, paths = export_wxr(args.output, int(args.max_mb * 1024 * 1024), args.workers, args.status,
+                                   args.pages_dir, args.counties_dir, args.start_id, args.timezone)
+    print(f"Exported {page_count} pages to {len(paths)} WXR file(s) in {time.perf_counter() - start:.1f}s")
+    for path in paths:
+        print(f"  {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+    if paths:
+        print("Import the files in order with Tools → Import → WordPress (or `wp import <file> --authors=create`).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import json
+import sqlite3
+import argparse
+
+CHUNK_SIZE = 1 << 16  # Characters read from the JSON file at a time
+INSERT_BATCH_SIZE = 500
+ITEM_DELIMITERS = ' \t\r\n,]'  # Characters that can follow a complete array item
+
+# Fields the county renderer uses: top-level key -> None to keep the whole
+# value, or a tuple of the sub-keys to keep from a nested block
+COUNTY_FIELDS = {
+    'name': None,
+    'state': None,
+    'population': None,
+    'male': None,
+    'female': None,
+    'land_area': None,
+    'latitude': None,
+    'longitude': None,
+    'zip-codes': None,
+    'avg_income': None,
+    'poverty-rate': None,
+    'cost-of-living': ('living_wage', 'housing_costs', 'food_costs', 'medical_costs'),
+    'noaa': ('temp', 'prcp', 'snow'),
+}
+
+def iter_json_array(json_file, chunk_size=CHUNK_SIZE):
+    """Yield the items of a top-level JSON array one at a time without loading the whole file"""
+    decoder = json.JSONDecoder()
+    with open(json_file, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        while not buffer:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer = chunk.lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{json_file} does not contain a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            # Skip separators between items
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                if pos >= len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, pos)
+                item, end = decoder.raw_decode(buffer, pos)
+                if not eof and (end >= len(buffer) or buffer[end] not in ITEM_DELIMITERS):
+                    # A number cut off by the end of the buffer ("12.5e" of "12.5e3") decodes too early
+                    raise json.JSONDecodeError("Need more data", buffer, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The item continues past the buffer: drop what was consumed and read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield item
+            pos = end
+
+def project_record(record, fields=COUNTY_FIELDS):
+    """Keep only the fields of a county record that the renderer uses"""
+    projected = {}
+    for key, sub_keys in fields.items():
+        if key not in record:
+            continue
+        value = record[key]
+        if sub_keys is not None and isinstance(value, dict):
+            value = {sub_key: value.get(sub_key) for sub_key in sub_keys}
+        projected[key] = value
+    return projected
+
+def iter_json_counties(json_file, fields=COUNTY_FIELDS):
+    """Stream projected county records from county_data.json"""
+    for record in iter_json_array(json_file):
+        yield project_record(record, fields)
+
+def convert_to_sqlite(json_file, db_file):
+    """Convert county_data.json once into a compact SQLite file of projected records"""
+    tmp_file = db_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        conn.execute("CREATE TABLE counties (id INTEGER PRIMARY KEY, state TEXT, name TEXT, data TEXT)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        count = 0
+        batch = []
+        for record in iter_json_counties(json_file):
+            batch.append((record.get('state'), record.get('name'), json.dumps(record, separators=(',', ':'))))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                conn.executemany("INSERT INTO counties (state, name, data) VALUES (?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT INTO counties (state, name, data) VALUES (?, ?, ?)", batch)
+            count += len(batch)
+
+        conn.execute("CREATE INDEX counties_state ON counties (state)")
+        conn.execute("INSERT INTO meta VALUES ('source_mtime', ?)", (str(os.path.getmtime(json_file)),))
+        conn.execute("INSERT INTO meta VALUES ('source_size', ?)", (str(os.path.getsize(json_file)),))
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, db_file)
+    print(f"Converted {count} counties from {json_file} to {db_file}")
+    return count
+
+def sqlite_is_current(json_file, db_file):
+    """Check whether the SQLite copy was built from the current county_data.json"""
+    if not os.path.exists(db_file):
+        return False
+    if not os.path.exists(json_file):
+        return True
+    try:
+        conn = sqlite3.connect(db_file)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return (meta.get('source_mtime') == str(os.path.getmtime(json_file))
+            and meta.get('source_size') == str(os.path.getsize(json_file)))
+
+def iter_sqlite_counties(db_file, state_abbr=None):
+    """Stream county records from the SQLite copy, optionally for one state"""
+    conn = sqlite3.connect(db_file)
+    try:
+        if state_abbr:
+            rows = conn.execute("SELECT data FROM counties WHERE state = ? ORDER BY id", (state_abbr,))
+        else:
+            rows = conn.execute("SELECT data FROM counties ORDER BY id")
+        for (data,) in rows:
+            yield json.loads(data)
+    finally:
+        conn.close()
+
+def default_db_file(json_file):
+    """SQLite path kept next to the JSON file (county_data.json -> county_data.db)"""
+    return os.path.splitext(json_file)[0] + ".db"
+
+def iter_counties(json_file, db_file=None, state_abbr=None):
+    """Stream projected county records, preferring an up-to-date SQLite copy over the raw JSON"""
+    db_file = db_file or default_db_file(json_file)
+    if sqlite_is_current(json_file, db_file):
+        yield from iter_sqlite_counties(db_file, state_abbr)
+        return
+    for record in iter_json_counties(json_file):
+        if state_abbr is None or record.get('state') == state_abbr:
+            yield record
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream county_data.json and convert it to a compact SQLite file")
+    parser.add_argument('--data', default='USA_DATA/county_data.json', help='Path to county_data.json')
+    parser.add_argument('--db', help='SQLite output path (default: next to the JSON file)')
+    parser.add_argument('--convert', action='store_true', help='Convert the JSON dataset to SQLite')
+    parser.add_argument('--state', help='Only count counties for one state (e.g. TX)')
+    args = parser.parse_args()
+
+    db_file = args.db or default_db_file(args.data)
+    if args.convert:
+        convert_to_sqlite(args.data, db_file)
+    else:
+        source = db_file if sqlite_is_current(args.data, db_file) else args.data
+        count = sum(1 for _ in iter_counties(args.data, db_file, args.state))
+        print(f"Read {count} counties from {source}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import time
+import argparse
+import numpy as np
+from county_loader import iter_counties
+
+# Numeric columns taken straight from each county record: column -> path in the record
+NUMERIC_FIELDS = {
+    'male': ('male',),
+    'female': ('female',),
+    'land_area': ('land_area',),
+    'latitude': ('latitude',),
+    'longitude': ('longitude',),
+    'avg_income': ('avg_income',),
+    'poverty_rate': ('poverty-rate',),
+    'living_wage': ('cost-of-living', 'living_wage'),
+    'housing_costs': ('cost-of-living', 'housing_costs'),
+    'food_costs': ('cost-of-living', 'food_costs'),
+    'medical_costs': ('cost-of-living', 'medical_costs'),
+    'avg_temp': ('noaa', 'temp'),
+    'precipitation': ('noaa', 'prcp'),
+    'snowfall': ('noaa', 'snow'),
+}
+
+# Decimal places the page shows for a value; rounded per county in values() with round(),
+# as the page generator always has (np.round rounds some halves differently)
+ROUND_DIGITS = {
+    'male_ratio': 1,
+    'female_ratio': 1,
+    'latitude': 4,
+    'longitude': 4,
+    'avg_temp': 1,
+    'precipitation': 1,
+    'snowfall': 1,
+}
+
+def _lookup(record, path):
+    """Follow a key path into a county record; returns (value, was an int), NaN when anything is missing"""
+    value = record
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return np.nan, False
+        value = value[key]
+    try:
+        return float(value), isinstance(value, int) and not isinstance(value, bool)
+    except (TypeError, ValueError):
+        return np.nan, False
+
+class CountyTable:
+    """Columnar, NumPy-backed view of county_data.json with derived metrics for every county"""
+
+    def __init__(self, records):
+        records = list(records)
+        self.size = len(records)
+        self.name = np.array([r.get('name', '').title() for r in records], dtype=object)
+        self.state = np.array([r.get('state', '') for r in records], dtype=object)
+        self.zip_codes = [r.get('zip-codes') or [] for r in records]
+        self.columns = {}
+        self.integer = {}  # Per column: which values were ints in the JSON (pages print them without ".0")
+        for column, path in NUMERIC_FIELDS.items():
+            looked_up = [_lookup(r, path) for r in records]
+            self.columns[column] = np.array([value for value, _ in looked_up], dtype=np.float64)
+            self.integer[column] = np.array([is_int for _, is_int in looked_up], dtype=bool)
+        self._load_population([r.get('population') or {} for r in records])
+        self.metrics = {}
+        self._state_rankings = None
+
+    def _load_population(self, series):
+        """Store the population time series as a (county x year) matrix"""
+        self.years = sorted({year for s in series for year in s})
+        year_index = {year: i for i, year in enumerate(self.years)}
+        self.population = np.full((self.size, len(self.years)), np.nan)
+        # Column of each county's latest year (even when its value is missing), -1 for no series
+        self.latest_column = np.full(self.size, -1, dtype=np.int64)
+        self.integer['current_population'] = np.zeros(self.size, dtype=bool)
+        for row, s in enumerate(series):
+            for year, value in s.items():
+                if value is not None:
+                    self.population[row, year_index[year]] = value
+            if s:
+                latest = s[max(s)]
+                self.latest_column[row] = year_index[max(s)]
+                self.integer['current_population'][row] = isinstance(latest, int) and not isinstance(latest, bool)
+
+    @classmethod
+    def from_json(cls, county_data_file):
+        """Load the table from county_data.json (streamed, or from its SQLite copy)"""
+        return cls(iter_counties(county_data_file))
+
+    def compute_metrics(self):
+        """Compute every derived value for all counties in one vectorised pass"""
+        c = self.columns
+        metrics = {}
+
+        # Latest population: the value of each county's most recent year
+        if self.years:
+            latest = self.population[np.arange(self.size), np.maximum(self.latest_column, 0)]
+            latest[self.latest_column < 0] = np.nan
+        else:
+            latest = np.full(self.size, np.nan)
+        metrics['current_population'] = latest
+
+        # Gender ratios
+        total = c['male'] + c['female']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['male_ratio'] = c['male'] / total * 100
+            metrics['female_ratio'] = c['female'] / total * 100
+
+        # Location, climate, money and area fields as stored (rounded for display in values())
+        for column in ('latitude', 'avg_temp', 'precipitation', 'snowfall', 'land_area', 'avg_income',
+                       'living_wage', 'housing_costs', 'food_costs', 'medical_costs', 'poverty_rate'):
+            metrics[column] = c[column]
+        metrics['longitude'] = np.abs(c['longitude'])
+
+        # Population rank within each state (1 = largest)
+        order = self._ranking_order(latest)
+        rank = np.zeros(self.size, dtype=np.int64)
+        states_in_order = self.state[order]
+        starts = np.r_[0, np.flatnonzero(states_in_order[1:] != states_in_order[:-1]) + 1]
+        group_sizes = np.diff(np.r_[starts, self.size])
+        rank[order] = np.arange(self.size) - np.repeat(starts, group_sizes) + 1
+        metrics['state_rank'] = rank
+
+        self.metrics = metrics
+        self._state_rankings = None
+        return metrics
+
+    def _ranking_order(self, population):
+        """Row order grouped by state, largest population first (missing populations last)"""
+        sort_population = np.where(np.isnan(population), -np.inf, population)
+        return np.lexsort((-sort_population, self.state.astype(str)))
+
+    def state_rankings(self):
+        """Map each state abbreviation to its county row indexes, largest first"""
+        if self._state_rankings is None:
+            if not self.metrics:
+                self.compute_metrics()
+            order = self._ranking_order(self.metrics['current_population'])
+            rankings = {}
+            for row in order:
+                rankings.setdefault(self.state[row], []).append(row)
+            self._state_rankings = rankings
+        return self._state_rankings
+
+    def largest_counties(self, state_abbr, count=3):
+        """Names of the most populous counties in a state"""
+        rows = self.state_rankings().get(state_abbr, [])[:count]
+        return [self.name[row] for row in rows]
+
+    def largest_counties_by_state(self, count=3):
+        """Largest counties for every state, e.g. for the state templates' county sections"""
+        return {state: [self.name[row] for row in rows[:count]] for state, rows in self.state_rankings().items()}
+
+    def values(self, row):
+        """Derived values for one county as plain Python numbers, rounded for display (NaN becomes None)"""
+        if not self.metrics:
+            self.compute_metrics()
+        values = {'name': self.name[row], 'state': self.state[row], 'zip_codes': self.zip_codes[row]}
+        for key, column in self.metrics.items():
+            value = column[row].item()
+            if isinstance(value, float) and np.isnan(value):
+                value = None
+            else:
+                if key in self.integer and self.integer[key][row]:
+                    value = int(value)
+                if key in ROUND_DIGITS:
+                    value = round(value, ROUND_DIGITS[key])
+            values[key] = value
+        return values
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute county statistics and state rankings from county_data.json")
+    parser.add_argument('--data', default='USA_DATA/county_data.json', help='Path to county_data.json')
+    parser.add_argument('--state', help='Print the largest counties for one state (e.g. TX)')
+    parser.add_argument('--count', type=int, default=3, help='Number of counties to rank per state')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = CountyTable.from_json(args.data)
+    loaded = time.perf_counter()
+    table.compute_metrics()
+    table.state_rankings()
+    computed = time.perf_counter()
+
+    print(f"Loaded {table.size} counties in {loaded - start:.2f}s")
+    print(f"Computed metrics and rankings in {(computed - loaded) * 1000:.1f}ms")
+
+    if args.state:
+        print(f"Largest counties in {args.state}: {', '.join(table.largest_counties(args.state, args.count))}")
+    else:
+        for state, counties in sorted(table.largest_counties_by_state(args.count).items()):
+            print(f"{state}: {', '.join(counties)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,92 @@
 import os
+import re
+import glob
 import json
 from datetime import datetime
 import math
+from functools import lru_cache
+from county_stats import CountyTable
+from county_loader import iter_counties
+
+USA_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+COUNTY_TEMPLATE = os.path.join(USA_DATA_DIR, 'county_profile_template.html')
+CITY_TEMPLATE = os.path.join(USA_DATA_DIR, 'city_page_template.html')
+COUNTY_DATA_FILE = os.path.join(USA_DATA_DIR, 'county_data.json')
+COUNTY_PROFILES_DIR = os.path.join(USA_DATA_DIR, 'county_profiles')
 
 def load_county_data(county_data_file):
-    """Load the comprehensive county dataset"""
-    with open(county_data_file, 'r') as f:
-        return json.load(f)
+    """Load the fields we use from the comprehensive county dataset
+
+    Records are streamed and projected by county_loader, from the SQLite copy
+    when one is current (python3 USA_DATA/county_loader.py --convert).
+    """
+    return list(iter_counties(county_data_file))
 
+@lru_cache(maxsize=None)
 def load_county_seats(state_abbr):
     """Load county seats data for a state"""
-    filename = f"USA_DATA/{state_abbr}/{state_abbr.lower()}-{'parish' if state_abbr == 'LA' else 'county'}-seats.json"
+    filename = os.path.join(USA_DATA_DIR, state_abbr, f"{state_abbr.lower()}-{'parish' if state_abbr == 'LA' else 'county'}-seats.json")
     try:
         with open(filename, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
         return None
 
+def compact_key(name):
+    """Lowercase letters and digits only ('De Kalb-County' and 'DeKalb County' agree)"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+@lru_cache(maxsize=None)
+def load_county_city_files(state_abbr):
+    """Map compact county names of a state to their *-cities.txt files (USA_DATA/[ST]/counties/[County]/)"""
+    files = {}
+    for county_dir in glob.glob(os.path.join(USA_DATA_DIR, state_abbr, "counties", "*")) + glob.glob(os.path.join(USA_DATA_DIR, state_abbr, "parishes", "*")):
+        files[compact_key(os.path.basename(county_dir))] = sorted(glob.glob(os.path.join(county_dir, "*-cities.txt")))
+    return files
+
+def load_county_cities(state_abbr, county_name):
+    """City names listed for a county, in file order without duplicates"""
+    cities = {}
+    for cities_file in load_county_city_files(state_abbr).get(compact_key(county_name), []):
+        with open(cities_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    cities.setdefault(line.strip().lower(), line.strip())
+    return list(cities.values())
+
+def county_slug(county_name):
+    """File and URL name of a county page"""
+    return county_name.lower().replace(' ', '-')
+
+def city_slug(city_name):
+    """File and URL name of a city page"""
+    return re.sub(r'[^a-z0-9]+', '-', city_name.lower()).strip('-')
+
 def format_number(num):
     """Format numbers with commas"""
     if isinstance(num, (int, float)):
         return "{:,}".format(round(num))
     return num
 
-def get_latest_population(population_data):
-    """Get the most recent population figure"""
-    if not population_data:
-        return None
-    latest_year = max(population_data.keys())
-    return population_data[latest_year]
+@lru_cache(maxsize=None)
+def load_template(template_path):
+    """Read a page template once"""
+    with open(template_path, 'r') as f:
+        return f.read()
 
-def calculate_percentages(male, female):
-    """Calculate gender ratio percentages"""
-    total = male + female
-    return round(male/total * 100, 1), round(female/total * 100, 1)
+def fill_template(template, replacements):
+    """Replace every {{placeholder}} of a template"""
+    page_content = template
+    for key, value in replacements.items():
+        page_content = page_content.replace(key, str(value))
+    return page_content
 
-def generate_county_page(county_data, county_seats_data, template_path, output_dir):
-    """Generate a county profile page using the template"""
-    with open(template_path, 'r') as f:
-        template = f.read()
+def county_replacements(county_data, county_seats_data, metrics=None):
+    """Template values of a county page
 
+    metrics is the row of precomputed values from CountyTable.values(); when it is
+    missing the derived values are computed for this county alone.
+    """
     # Extract county name and state
     county_name = county_data['name'].title()
     state_abbr = county_data['state']
@@ -52,54 +99,87 @@ def generate_county_page(county_data, county_seats_data, template_path, output_d
             county_seat = county_seats_data['counties'][county_key]['county_seat']
 
     # Calculate latest population and gender ratios
-    current_population = get_latest_population(county_data['population'])
-    male_ratio, female_ratio = calculate_percentages(county_data['male'], county_data['female'])
+    if metrics is None:
+        metrics = CountyTable([county_data]).values(0)
 
     # Prepare replacement dictionary
     replacements = {
         '{{county_name}}': county_name,
         '{{state_name}}': county_seats_data['metadata']['state'],
         '{{county_seat}}': county_seat,
-        '{{land_area}}': format_number(county_data['land_area']),
-        '{{latitude}}': round(county_data['latitude'], 4),
-        '{{longitude}}': abs(round(county_data['longitude'], 4)),
+        '{{land_area}}': format_number(metrics['land_area']),
+        '{{latitude}}': metrics['latitude'],
+        '{{longitude}}': metrics['longitude'],
         '{{zip_codes}}': ', '.join(county_data['zip-codes'][:5]) + ('...' if len(county_data['zip-codes']) > 5 else ''),
-        '{{current_population}}': format_number(current_population),
-        '{{male_ratio}}': male_ratio,
-        '{{female_ratio}}': female_ratio,
-        '{{avg_income}}': format_number(county_data['avg_income']),
-        '{{living_wage}}': format_number(county_data['cost-of-living']['living_wage']),
-        '{{poverty_rate}}': county_data['poverty-rate'],
-        '{{avg_temp}}': round(county_data['noaa']['temp'], 1),
-        '{{precipitation}}': round(county_data['noaa']['prcp'], 1),
-        '{{snowfall}}': round(county_data['noaa']['snow'], 1),
-        '{{housing_costs}}': format_number(county_data['cost-of-living']['housing_costs']),
-        '{{food_costs}}': format_number(county_data['cost-of-living']['food_costs']),
-        '{{medical_costs}}': format_number(county_data['cost-of-living']['medical_costs'])
+        '{{current_population}}': format_number(metrics['current_population']),
+        '{{male_ratio}}': metrics['male_ratio'],
+        '{{female_ratio}}': metrics['female_ratio'],
+        '{{avg_income}}': format_number(metrics['avg_income']),
+        '{{living_wage}}': format_number(metrics['living_wage']),
+        '{{poverty_rate}}': metrics['poverty_rate'],
+        '{{avg_temp}}': metrics['avg_temp'],
+        '{{precipitation}}': metrics['precipitation'],
+        '{{snowfall}}': metrics['snowfall'],
+        '{{housing_costs}}': format_number(metrics['housing_costs']),
+        '{{food_costs}}': format_number(metrics['food_costs']),
+        '{{medical_costs}}': format_number(metrics['medical_costs'])
     }
 
-    # Replace all placeholders in template
-    page_content = template
-    for key, value in replacements.items():
-        page_content = page_content.replace(key, str(value))
+    return replacements
+
+def render_county_pages(county_data, county_seats_data, metrics=None,
+                        county_template=COUNTY_TEMPLATE, city_template=CITY_TEMPLATE):
+    """Render a county page and its city pages; returns (county HTML, [(city slug, city HTML)])"""
+    replacements = county_replacements(county_data, county_seats_data, metrics)
+    cities = load_county_cities(county_data['state'], replacements['{{county_name}}'])
+
+    # County pages link to their cities and city pages back to the county, relative to /[ST]/[county]/
+    replacements['{{city_links}}'] = '\n'.join(
+        f'                    <li><a href="{city_slug(city)}/">{city}</a></li>' for city in cities) or \
+        '                    <li>No cities listed</li>'
+    city_pages = []
+    for city in cities:
+        city_replacements = dict(replacements)
+        city_replacements['{{city_name}}'] = city
+        city_pages.append((city_slug(city), fill_template(load_template(city_template), city_replacements)))
+    return fill_template(load_template(county_template), replacements), city_pages
+
+def generate_county_page(county_data, county_seats_data, template_path, output_dir, metrics=None,
+                         city_template=CITY_TEMPLATE):
+    """Generate a county profile page using the template, and its city pages in a folder named after it"""
+    county_html, city_pages = render_county_pages(county_data, county_seats_data, metrics, template_path, city_template)
+    county_name = county_data['name'].title()
+    state_abbr = county_data['state']
 
     # Create output directory if it doesn't exist
     state_dir = os.path.join(output_dir, state_abbr)
     os.makedirs(state_dir, exist_ok=True)
 
     # Write the generated page
-    output_file = os.path.join(state_dir, f"{county_name.lower().replace(' ', '-')}.html")
+    output_file = os.path.join(state_dir, f"{county_slug(county_name)}.html")
     with open(output_file, 'w') as f:
-        f.write(page_content)
+        f.write(county_html)
 
-    print(f"Generated profile page for {county_name}, {state_abbr}")
+    # City pages: [ST]/[county]/[city].html
+    if city_pages:
+        city_dir = os.path.join(state_dir, county_slug(county_name))
+        os.makedirs(city_dir, exist_ok=True)
+        for slug, city_html in city_pages:
+            with open(os.path.join(city_dir, f"{slug}.html"), 'w') as f:
+                f.write(city_html)
+
+    print(f"Generated profile page for {county_name}, {state_abbr} ({len(city_pages)} city pages)")
 
 def main():
     # Load the comprehensive county dataset
-    county_data = load_county_data('USA_DATA/county_data.json')
+    county_data = load_county_data(COUNTY_DATA_FILE)
+
+    # Compute derived values for every county in one vectorised pass
+    county_table = CountyTable(county_data)
+    county_table.compute_metrics()
 
     # Process each county
-    for county in county_data:
+    for row, county in enumerate(county_data):
         state_abbr = county['state']
         county_seats_data = load_county_seats(state_abbr)
         
@@ -107,8 +187,9 @@ def main():
             generate_county_page(
                 county,
                 county_seats_data,
-                'USA_DATA/county_profile_template.html',
-                'USA_DATA/county_profiles'
+                COUNTY_TEMPLATE,
+                COUNTY_PROFILES_DIR,
+                county_table.values(row)
             )
 
 if __name__ == "__main__":
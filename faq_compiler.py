@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+FAQ Compiler for Bail Bonds Buddy Pages
+
+Parses FAQ.md once into a cached bank of pre-tokenised questions and
+answers, builds a per-state table of placeholder values ([state_name],
+[premium_rate], [premium_example], ...), and renders selected FAQs with a
+single join per item instead of a chain of str.replace calls.
+
+Usage:
+  python3 faq_compiler.py                 # Show the compiled bank summary
+  python3 faq_compiler.py --state Texas   # Render 5 random FAQs for a state
+"""
+
+import os
+import re
+import random
+import argparse
+from collections import namedtuple
+from functools import lru_cache
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FAQ_FILE = os.path.join(BASE_DIR, "FAQ.md")
+PLACEHOLDER_PATTERN = re.compile(r'\[([a-z_]+)\]')
+
+# Premium rates by state (percent of the bail amount)
+DEFAULT_PREMIUM_RATE = 15
+PREMIUM_RATES = {
+    "Texas": 10,
+    "Florida": 10,
+    "California": 10
+}
+PREMIUM_EXAMPLE_BAIL = 10000  # Bail amount used in the "[premium_example]" answers
+
+# State specific replacements
+STATE_SPECIFICS = {
+    "Oklahoma": {
+        "recent_state_change": "recent reforms in bail procedures",
+        "state_specific_factor": "county-specific bail schedules"
+    },
+    "Texas": {
+        "recent_state_change": "the 2021 bail reform legislation",
+        "state_specific_factor": "different county bail practices"
+    },
+    "Florida": {
+        "recent_state_change": "updated pretrial release guidelines",
+        "state_specific_factor": "varying bail schedules by judicial circuit"
+    }
+}
+
+# A compiled FAQ keeps the raw text plus its tokens. Tokens alternate
+# literal text (even indexes) and placeholder names (odd indexes).
+CompiledFaq = namedtuple("CompiledFaq", ["question", "answer", "question_tokens", "answer_tokens"])
+
+def tokenize(text):
+    """Split text into alternating literal and placeholder-name tokens"""
+    return tuple(PLACEHOLDER_PATTERN.split(text))
+
+def parse_faq_markdown(content):
+    """Parse FAQ.md content into a list of question/answer dicts"""
+    faqs = []
+    lines = content.strip().split("\n")
+
+    # Skip the title line
+    current_question = None
+    current_answer = ""
+
+    for line in lines[1:]:
+        line = line.strip()
+        if not line:
+            # Empty line separates Q&A
+            if current_question and current_answer:
+                faqs.append({
+                    "question": current_question,
+                    "answer": current_answer.strip()
+                })
+                current_question = None
+                current_answer = ""
+        elif not current_question:
+            # This is a question
+            current_question = line
+        else:
+            # This is part of the answer
+            current_answer += line + " "
+
+    # Add the last FAQ if it exists
+    if current_question and current_answer:
+        faqs.append({
+            "question": current_question,
+            "answer": current_answer.strip()
+        })
+
+    return faqs
+
+@lru_cache(maxsize=8)
+def _compile_faq_file(faq_file, mtime):
+    """Read and tokenise an FAQ file (cached per file and modification time)"""
+    with open(faq_file, "r") as f:
+        return compile_faq_list(parse_faq_markdown(f.read()))
+
+def compile_faq_list(faqs):
+    """Tokenise question/answer dicts that did not come from the cached bank"""
+    return tuple(
+        CompiledFaq(faq["question"], faq["answer"], tokenize(faq["question"]), tokenize(faq["answer"]))
+        for faq in faqs
+    )
+
+def compile_faqs(faq_file=FAQ_FILE):
+    """Return the compiled FAQ bank, parsing the markdown only when it has changed"""
+    try:
+        return _compile_faq_file(faq_file, os.path.getmtime(faq_file))
+    except Exception as e:
+        print(f"Error loading FAQs: {str(e)}")
+        return ()
+
+def load_faqs(faq_file=FAQ_FILE):
+    """Return the FAQ bank as plain question/answer dicts"""
+    return [{"question": faq.question, "answer": faq.answer} for faq in compile_faqs(faq_file)]
+
+@lru_cache(maxsize=None)
+def get_state_values(state_name):
+    """Build the placeholder value table for a state"""
+    premium_rate = PREMIUM_RATES.get(state_name, DEFAULT_PREMIUM_RATE)
+    values = {
+        "state_name": state_name,
+        "premium_rate": str(premium_rate),
+        "premium_example": str(PREMIUM_EXAMPLE_BAIL * premium_rate // 100)
+    }
+    values.update(STATE_SPECIFICS.get(state_name, {}))
+    return values
+
+def build_state_value_tables(state_names):
+    """Precompute placeholder value tables for a batch of states"""
+    return {state_name: get_state_values(state_name) for state_name in state_names}
+
+def render_tokens(tokens, values):
+    """Render a token tuple in one pass; unknown placeholders are left as-is"""
+    parts = list(tokens)
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        parts[i] = values.get(name, f"[{name}]")
+    return "".join(parts)
+
+def render_faq(faq, values):
+    """Render a compiled FAQ with a state's value table"""
+    return {
+        "question": render_tokens(faq.question_tokens, values),
+        "answer": render_tokens(faq.answer_tokens, values)
+    }
+
+def select_faqs(state_name, count=5, faq_bank=None, rng=random):
+    """Select random FAQs from the compiled bank and render them for the state"""
+    if faq_bank is None:
+        faq_bank = compile_faqs()
+    if len(faq_bank) <= count:
+        selected = faq_bank
+    else:
+        selected = rng.sample(faq_bank, count)
+
+    values = get_state_values(state_name)
+    return [render_faq(faq, values) for faq in selected]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile FAQ.md and render FAQs for a state")
+    parser.add_argument('--state', type=str, help='Render random FAQs for this state')
+    parser.add_argument('--count', type=int, default=5, help='Number of FAQs to render (default: 5)')
+    parser.add_argument('--file', default=FAQ_FILE, help='FAQ markdown file (default: FAQ.md)')
+    args = parser.parse_args()
+
+    faq_bank = compile_faqs(args.file)
+    placeholders = sorted({name for faq in faq_bank for name in faq.question_tokens[1::2] + faq.answer_tokens[1::2]})
+    print(f"Compiled {len(faq_bank)} FAQs from {args.file}")
+    print(f"Placeholders: {', '.join(placeholders)}")
+
+    if args.state:
+        for i, faq in enumerate(select_faqs(args.state, args.count, faq_bank)):
+            print(f"\n{i+1}. {faq['question']}")
+            print(f"   {faq['answer']}")
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,12 @@ import random
 import requests
 from datetime import datetime
 
+# Shared generator modules live in Manus/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Manus"))
+from retarget import OKLAHOMA_SOURCE, retarget, rewrite_terms
+from gazetteer import capital_coordinates
+from page_model import PageModel
+
 # Constants for local system
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_FILE = os.path.join(BASE_DIR, "Oklahoma Bail Bondsman Emergency 24_7 Service.json")
@@ -45,8 +51,6 @@ TEXAS_DATA = {
         "Dallas",
         "San Antonio"
     ],
-    "lat": "31.9686",
-    "lng": "-99.9018",
     "economic_info": "Texas's economy has traditionally centered around energy production and technology, with oil and natural gas remaining significant industries. However, recent economic diversification has expanded into aerospace, biotechnology, telecommunications, and healthcare.",
     "bail_system": "The state maintains a robust bail system governed by the Texas Occupations Code Chapter 1704 (Bail Bond Sureties), which requires all bondsmen to be licensed through the Texas Department of Insurance.",
     "criminal_justice": "Recent criminal justice reform initiatives in Texas have aimed to improve the state's bail system, focusing on risk assessment rather than financial ability. These reforms have modified certain bail procedures, especially for non-violent offenses.",
@@ -70,45 +74,29 @@ def replace_state_references(content, old_state, new_state):
     if not isinstance(content, str):
         return content
     
-    # Replace state name with proper capitalization
-    content = re.sub(r'\b' + re.escape(old_state) + r'\b', new_state, content, flags=re.IGNORECASE)
-    
-    # Replace state abbreviation
-    old_abbr = "OK"
-    new_abbr = TEXAS_DATA["abbreviation"]
-    content = re.sub(r'\b' + re.escape(old_abbr) + r'\b', new_abbr, content)
-    
-    return content
+    # State name (any case) and abbreviation (exact case) in one pass
+    return rewrite_terms(content, [(old_state, new_state, True), ("OK", TEXAS_DATA["abbreviation"], False)])
 
 def replace_nickname_references(content, old_nickname, new_nickname):
     """Replace state nickname references"""
     if not isinstance(content, str):
         return content
     
-    content = re.sub(r'\b' + re.escape(old_nickname) + r'\b', new_nickname, content, flags=re.IGNORECASE)
-    return content
+    return rewrite_terms(content, [(old_nickname, new_nickname, True)])
 
 def replace_county_references(content, old_counties, new_counties):
     """Replace county references"""
     if not isinstance(content, str):
         return content
     
-    for i, old_county in enumerate(old_counties):
-        if i < len(new_counties):
-            content = re.sub(r'\b' + re.escape(old_county) + r'\b', new_counties[i], content, flags=re.IGNORECASE)
-    
-    return content
+    return rewrite_terms(content, [(old, new, True) for old, new in zip(old_counties, new_counties)])
 
 def replace_city_references(content, old_cities, new_cities):
     """Replace city references"""
     if not isinstance(content, str):
         return content
     
-    for i, old_city in enumerate(old_cities):
-        if i < len(new_cities):
-            content = re.sub(r'\b' + re.escape(old_city) + r'\b', new_cities[i], content, flags=re.IGNORECASE)
-    
-    return content
+    return rewrite_terms(content, [(old, new, True) for old, new in zip(old_cities, new_cities)])
 
 def create_unique_intro(state_name):
     """Generate unique intro paragraph"""
@@ -237,13 +225,13 @@ def create_unique_state_description(state_data):
     
     return "\n\n".join(paragraphs)
 
-def update_map_coordinates(content, lat, lng, state_name):
+def update_map_coordinates(content, lat, lng, address):
     """Update the map coordinates in the content"""
     if not isinstance(content, str):
         return content
     
     # Replace map address, lat and lng
-    content = re.sub(r'address="Oklahoma City, OK, USA"', f'address="{state_name}, USA"', content)
+    content = re.sub(r'\baddress="[^"]+"', f'address="{address}"', content)
     content = re.sub(r'address_lat="[^"]+"', f'address_lat="{lat}"', content)
     content = re.sub(r'address_lng="[^"]+"', f'address_lng="{lng}"', content)
     
@@ -309,26 +297,18 @@ def replace_headers_and_titles(content, old_state, new_state):
 
 def modify_divi_content(content, state_data):
     """Modify the DIVI content to create a unique page for Texas"""
-    old_state = "Oklahoma"
+    old_state = OKLAHOMA_SOURCE["name"]
     new_state = state_data["name"]
-    old_nickname = "Sooner State"
-    new_nickname = state_data["nickname"]
-    old_counties = ["Oklahoma County", "Tulsa County", "Cleveland County"]
-    new_counties = state_data["largest_counties"]
-    old_cities = ["Oklahoma City", "Tulsa", "Norman"]
-    new_cities = state_data["major_cities"]
-    
-    # First, update all basic text references
-    content = replace_state_references(content, old_state, new_state)
-    content = replace_nickname_references(content, old_nickname, new_nickname)
-    content = replace_county_references(content, old_counties, new_counties)
-    content = replace_city_references(content, old_cities, new_cities)
+    
+    # First, update all basic text references (state, abbreviation, nickname,
+    # counties, cities and coordinates) in a single pass
+    content = retarget(content, OKLAHOMA_SOURCE, state_data)
     
     # Update headers and titles specifically
     content = replace_headers_and_titles(content, old_state, new_state)
     
     # Update map coordinates and center
-    content = update_map_coordinates(content, state_data["lat"], state_data["lng"], new_state)
+    content = update_map_coordinates(content, state_data["lat"], state_data["lng"], f"{state_data['capital']}, {state_data['abbreviation']}, USA")
     
     # Update the main title section
     content = re.sub(
@@ -488,7 +468,7 @@ def modify_divi_content(content, state_data):
     
     return content
 
-def generate_page():
+def generate_page(write_preview=True):
     """Generate a customized Texas page"""
     # Create output directory if it doesn't exist
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -512,11 +492,18 @@ def generate_page():
         print("Error: Could not extract content from template")
         return False
     
+    # Pin the map on the capital (coordinates from the offline gazetteer)
+    coordinates = capital_coordinates(TEXAS_DATA["name"], TEXAS_DATA["capital"])
+    if not coordinates:
+        print(f"Error: no coordinates for {TEXAS_DATA['capital']}; build the gazetteer with python3 Manus/gazetteer.py --build")
+        return False
+    state_data = dict(TEXAS_DATA, **coordinates)
+    
     # Modify content for Texas
-    modified_content = modify_divi_content(template_content, TEXAS_DATA)
+    modified_content = modify_divi_content(template_content, state_data)
     
-    # Create new JSON structure
-    texas_json = template_json.copy()
+    # Create new JSON structure (shares the template's images and presets, owns its data)
+    texas_json = PageModel(template_json)
     
     # Update the content
     for key in texas_json["data"]:
@@ -528,7 +515,10 @@ def generate_page():
         json.dump(texas_json, f, indent=2)
     print(f"Generated JSON saved to {OUTPUT_JSON}")
     
-    # Create an HTML preview
+    # Create an HTML preview (skipped with --no-preview)
+    if not write_preview:
+        return True
+    
     title = f"{TEXAS_DATA['name']} Bail Bondsman 24/7 Emergency Service | BailBondsBuddy.com"
     
     html = f"""<!DOCTYPE html>
@@ -626,7 +616,7 @@ def main():
     print("Generating a unique Texas page with customized content for ALL sections...")
     
     # Generate the page
-    if generate_page():
+    if generate_page(write_preview="--no-preview" not in sys.argv):
         print("\nGeneration successful!")
         
         # Ask if user wants to upload to WordPress
@@ -0,0 +1,46 @@
+<?php
+/**
+ * Plugin Name: BBB Listing Import Fields
+ * Description: Exposes Directorist listings, their locations and the listing fields written by Manus/listing_importer.py to the REST API.
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+// Directorist listing fields set by the importer (_bbb_* fields identify imported listings)
+const BBB_LISTING_META = array(
+    '_phone', '_email', '_website', '_address', '_zip', '_manual_lat', '_manual_lng',
+    '_never_expire', '_directory_type', '_bbb_license', '_bbb_import_key', '_bbb_import_hash',
+);
+
+add_filter('register_post_type_args', function ($args, $post_type) {
+    if ('at_biz_dir' === $post_type) {
+        $args['show_in_rest'] = true;
+        $args['rest_base'] = 'at_biz_dir';
+        // Post meta is only part of the REST schema for post types with custom-fields
+        $args['supports'] = array_merge((array) ($args['supports'] ?? array('title', 'editor')), array('custom-fields'));
+    }
+    return $args;
+}, 10, 2);
+
+add_filter('register_taxonomy_args', function ($args, $taxonomy) {
+    if (in_array($taxonomy, array('at_biz_dir-location', 'atbdp_listing_types'), true)) {
+        $args['show_in_rest'] = true;
+        $args['rest_base'] = $taxonomy;
+    }
+    return $args;
+}, 10, 2);
+
+add_action('init', function () {
+    foreach (BBB_LISTING_META as $key) {
+        register_post_meta('at_biz_dir', $key, array(
+            'type' => 'string',
+            'single' => true,
+            'show_in_rest' => true,
+            'auth_callback' => function () {
+                return current_user_can('edit_posts');
+            },
+        ));
+    }
+});
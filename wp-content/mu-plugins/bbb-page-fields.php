@@ -0,0 +1,47 @@
+<?php
+/**
+ * Plugin Name: BBB Page Fields
+ * Description: Stores the location fields of data-only pages (Manus/page_meta.py) as bbb_* post meta and prints them with [bbb_field name="..."].
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+const BBB_FIELD_PREFIX = 'bbb_';
+
+add_action('rest_api_init', function () {
+    // "bbb_fields": {"bbb_state_name": "Texas", ...}; any bbb_* key is accepted
+    register_rest_field('page', 'bbb_fields', array(
+        'get_callback' => function ($page) {
+            $fields = array();
+            foreach (get_post_meta($page['id']) as $key => $values) {
+                if (0 === strpos($key, BBB_FIELD_PREFIX)) {
+                    $fields[$key] = $values[0];
+                }
+            }
+            return $fields;
+        },
+        'update_callback' => function ($fields, $post) {
+            if (!current_user_can('edit_post', $post->ID)) {
+                return new WP_Error('rest_forbidden', 'Cannot edit this page.', array('status' => 403));
+            }
+            foreach ((array) $fields as $key => $value) {
+                if (0 === strpos($key, BBB_FIELD_PREFIX) && preg_match('/^[a-z0-9_]+$/', $key)) {
+                    update_post_meta($post->ID, $key, wp_kses_post($value));
+                }
+            }
+            return true;
+        },
+        'schema' => array('type' => 'object', 'context' => array('view', 'edit')),
+    ));
+});
+
+// [bbb_field name="state_name"] prints the current page's bbb_state_name field
+add_shortcode('bbb_field', function ($atts) {
+    $atts = shortcode_atts(array('name' => ''), $atts, 'bbb_field');
+    $key = BBB_FIELD_PREFIX . sanitize_key($atts['name']);
+    $value = get_post_meta(get_queried_object_id(), $key, true);
+    // Fields can hold several paragraphs; shortcode output is not run through wpautop
+    return wp_kses_post(nl2br($value));
+});